@@ -1,84 +1,683 @@
 #!/usr/bin/env python3
 import argparse
 import sys
-import json
 import os
 
 from awareness.core.search_tracker import GoogleSearchTracker
-from awareness.core.project_rank_tracker import ProjectRankTracker
+from awareness.core.project_rank_tracker import (
+    ProjectRankTracker, GroupRankTracker, group_output_path, merge_group_results
+)
+from awareness.core.providers import PROVIDERS, build_providers, fan_out
+from awareness.core.rate_controller import get_rate_controller
+from awareness.core.records import counts_from_rankings, is_unchanged, result_default
+from awareness.core.variants import flatten_variants, is_matrix, load_variants
+from awareness.utils.metrics import get_registry
+from awareness.utils.profiling import profile_session, span
+from awareness.utils.console import get_console
+from awareness.utils.serialization import dump
 from awareness.charts.generate_charts import main as generate_charts
+from awareness.charts.downsample import DEFAULT_MAX_POINTS, METHODS as DOWNSAMPLE_METHODS
 
-def search_command(args):
-    """Handle search-related commands"""
-    tracker = GoogleSearchTracker(args.key, args.cx)
-    
-    if args.usage:
-        usage = tracker.get_remaining_calls()
-        print(f"\nAPI Usage for {usage['date']}:")
-        print(f"Queries used today: {usage['used_today']}")
-        print(f"Free queries remaining: {usage['free_remaining']}")
-        if usage['used_today'] >= 100:
-            print("You are now in the paid tier ($0.005 per query)")
+def configure_rate_limits(args, providers=('google',)):
+    """Apply rate floor/ceiling options to each provider's rate controller; False if they are invalid"""
+    if args.min_rate is not None or args.max_rate is not None:
+        for name in providers:
+            try:
+                get_rate_controller(name).configure(min_rate=args.min_rate, max_rate=args.max_rate)
+            except ValueError as e:
+                print(f"Error: {str(e)}")
+                return False
+    return True
+
+def make_trackers(args, tracker_class, *tracker_args):
+    """One tracker per selected provider, keyed by provider name"""
+    providers = build_providers(args.providers, args.key, args.cx, args.searxng_url)
+    if [p.name for p in providers] == ['google']:
+        # The default provider is built by the tracker itself
+        return {'google': tracker_class(args.key, args.cx, *tracker_args)}
+    return {p.name: tracker_class(args.key, args.cx, *tracker_args, provider=p) for p in providers}
+
+def attach_text_index(args, trackers):
+    """Index every fetched title/snippet/link into --text-index if requested"""
+    if args.text_index:
+        from awareness.utils.text_index import TextIndex
+        index = TextIndex(args.text_index)
+        for tracker in trackers.values():
+            tracker.text_index = index
+
+def attach_discovery(args, trackers):
+    """Stream every fetched page into a competitor discovery sketch if --discover is set"""
+    if not args.discover:
+        return None
+    from awareness.core.discovery import CompetitorDiscovery
+    # Every provider's tracker shares the same project rules
+    discovery = CompetitorDiscovery(next(iter(trackers.values())).matcher)
+    for tracker in trackers.values():
+        tracker.discovery = discovery
+    return discovery
+
+def report_discovery(args, discovery):
+    """Print (and optionally save) the top unknown domains and repos, folding the run into --discovery-state"""
+    if discovery is None:
         return
+    from awareness.core.discovery import HeavyHitters
+    discovery.close()
+    history = None
+    if args.discovery_state:
+        history = HeavyHitters.load(args.discovery_state) if os.path.exists(args.discovery_state) \
+            else HeavyHitters(discovery.hitters.k, discovery.hitters.sketch.width, discovery.hitters.sketch.depth)
+        history.merge(discovery.hitters)
+        history.save(args.discovery_state)
+    report = discovery.report(args.discover, history)
+    sections = [('this run', report['run'])]
+    if history is not None:
+        sections.append(('all runs', report['history']))
+    for label, rows in sections:
+        print(f"\nTop unknown domains and repos ({label}, weighted by 1/rank):")
+        for row in rows:
+            best = f"best #{row['best_rank']}" if row['best_rank'] else "best rank n/a"
+            print(f"{row['score']:8.2f}  {row['share']:6.1%}  {row['key']} ({row['kind']}, {best})")
+    if args.discovery_output:
+        dump(report, args.discovery_output)
+        print(f"Discovery report saved to {args.discovery_output}")
 
-    # Get terms
+def attach_fingerprints(args, trackers):
+    """Compare each term's links and ranks with the previous run if --fingerprints is set"""
+    if not args.fingerprints:
+        return None
+    from awareness.core.fingerprints import FingerprintStore
+    store = FingerprintStore(args.fingerprints)
+    for tracker in trackers.values():
+        tracker.fingerprints = store
+    return store
+
+def finish_change_detection(args, store, results_by_key):
+    """Save the fingerprints, report unchanged terms and apply --changes-only"""
+    if store is None:
+        return results_by_key
+    store.save()
+    filtered = {}
+    for key, results in results_by_key.items():
+        if not results:
+            filtered[key] = results
+            continue
+        records = flatten_variants(results)
+        unchanged = sum(1 for record in records.values() if is_unchanged(record))
+        label = f" ({key})" if len(results_by_key) > 1 else ""
+        print(f"{unchanged} of {len(records)} terms unchanged since the previous run{label}")
+        if args.changes_only:
+            # Unchanged and carried-forward records are not news to an alerting pipeline
+            def changed(record):
+                return not is_unchanged(record) and not record.get('carried_forward')
+            if is_matrix(results):
+                results = {term: {name: record for name, record in by_variant.items() if changed(record)}
+                           for term, by_variant in results.items()}
+                results = {term: by_variant for term, by_variant in results.items() if by_variant}
+            else:
+                results = {term: record for term, record in results.items() if changed(record)}
+        filtered[key] = results
+    return filtered
+
+def attach_hedging(args, trackers):
+    """Give each provider's tracker its own hedging policy if --hedge-percentile is set"""
+    if args.hedge_percentile is None:
+        return
+    from awareness.core.hedging import HedgePolicy
+    for tracker in trackers.values():
+        tracker.hedging = HedgePolicy(args.hedge_percentile / 100, args.hedge_max)
+
+def print_usage(tracker):
+    """Print the daily API usage ledger"""
+    usage = tracker.get_remaining_calls()
+    print(f"\nAPI Usage for {usage['date']}:")
+    print(f"Queries used today: {usage['used_today']}")
+    if tracker.daily_usage.get('hedged'):
+        print(f"  of which hedged duplicates: {tracker.daily_usage['hedged']} "
+              f"({tracker.daily_usage.get('hedged_won', 0)} won, "
+              f"{tracker.daily_usage.get('hedged_wasted', 0)} wasted)")
+    print(f"Free queries remaining: {usage['free_remaining']}")
+    if usage['used_today'] >= 100:
+        print("You are now in the paid tier ($0.005 per query)")
+
+def write_metrics(args):
+    """Write collected metrics in Prometheus text format if requested"""
+    if args.metrics_file:
+        get_registry().write_prometheus(args.metrics_file)
+        print(f"Metrics written to {args.metrics_file}")
+
+def load_terms(args):
+    """Return terms from -t/--terms or -f/--file; None if the file can't be loaded"""
+    if getattr(args, 'term_groups', None):
+        groups = load_term_groups(args)
+        return None if groups is None else [term for terms in groups.values() for term in terms]
     if args.file:
         try:
             from awareness.utils.search_terms import SearchTermsLoader
-            terms = SearchTermsLoader.load_terms(args.file)
+            with span('load_terms', file=args.file):
+                return SearchTermsLoader.load_terms(args.file)
         except Exception as e:
             print(f"Error loading terms from file: {str(e)}")
-            return
+            return None
+    return args.terms
+
+def load_term_groups(args):
+    """Return terms grouped into strata; None if the file can't be loaded"""
+    if not args.term_groups:
+        terms = load_terms(args)
+        return None if terms is None else {'all': terms}
+    try:
+        from awareness.utils.search_terms import SearchTermsLoader
+        with span('load_terms', file=args.term_groups):
+            return SearchTermsLoader.load_term_groups(args.term_groups)
+    except Exception as e:
+        print(f"Error loading term groups: {str(e)}")
+        return None
+
+def sample_terms(args):
+    """Draw this run's stratified sample; returns (plan, terms) or (None, None) on error"""
+    from awareness.core.sampling import SamplePlan, SamplingError
+    groups = load_term_groups(args)
+    if groups is None:
+        return None, None
+    try:
+        plan = SamplePlan(groups, args.sample_budget, args.sample_state)
+    except (OSError, ValueError) as e:
+        print(f"Error: {str(e)}")
+        return None, None
+    terms = plan.select()
+    total = sum(len(terms) for terms in plan.groups.values())
+    print(f"Sampling {len(terms)} of {total} terms across {len(plan.groups)} groups")
+    return plan, terms
+
+def report_estimates(args, plan, results):
+    """Advance the sample rotation and report group-level estimates"""
+    from awareness.core.sampling import estimate_groups
+    if not results:
+        return
+    plan.save()
+    estimates = estimate_groups(plan, results, args.confidence)
+    print(f"\nEstimated result counts ({args.confidence:.0%} confidence):")
+    for group, estimate in estimates['groups'].items():
+        print(f"{group}: {estimate['total_count']:,} total ({estimate['ci_low']:,} - {estimate['ci_high']:,}), "
+              f"sampled {estimate['sampled']} of {estimate['terms']} terms, "
+              f"every term refreshed within {estimate['cycle_runs']} runs")
+    if args.estimates_output:
+        dump(estimates, args.estimates_output, args.format)
+        print(f"Estimates saved to {args.estimates_output}")
+
+def load_variants_arg(args):
+    """Parse --variants; returns (ok, variants or None)"""
+    if not args.variants:
+        return True, None
+    try:
+        variants = load_variants(args.variants)
+    except (OSError, ValueError) as e:
+        print(f"Error loading variants: {str(e)}")
+        return False, None
+    for option, enabled in (('--sample-budget', getattr(args, 'sample_budget', None)),
+                            ('--refresh-budget', getattr(args, 'refresh_budget', None))):
+        if enabled:
+            print(f"Error: --variants cannot be combined with {option}")
+            return False, None
+    print(f"Querying {len(variants)} variants: {', '.join(v['name'] for v in variants)}")
+    return True, variants
+
+def variant_kwargs(variants):
+    """Tracker keyword arguments for a variant matrix run"""
+    return {'variants': variants} if variants else {}
+
+def provider_dir(path, provider=None):
+    """History or rollup directory for one of several providers: fills {provider} or suffixes the name"""
+    if provider is None:
+        return path
+    if '{provider}' in path:
+        return path.format(provider=provider)
+    return f"{path.rstrip('/' + os.sep)}_{provider}"
+
+def append_history(args, results, provider=None):
+    """Append a run's results to the binary history store if requested"""
+    if results and args.history:
+        from awareness.utils.history_store import HistoryStore
+        directory = provider_dir(args.history, provider)
+        with span('write_history', file=directory):
+            # A variant matrix is stored per "term [variant]"
+            written = HistoryStore(directory).append_results(flatten_variants(results))
+        print(f"{written} records appended to history in {directory}")
+
+def update_rollups(args, results, provider=None):
+    """Fold a run's results into the daily/weekly rollups if requested"""
+    if results and args.rollup_dir:
+        from awareness.utils.rollups import RollupStore
+        directory = provider_dir(args.rollup_dir, provider)
+        with span('update_rollups', dir=directory):
+            written = RollupStore(directory).update(flatten_variants(results))
+        print(f"Updated {written['daily']} daily and {written['weekly']} weekly rollups in {directory}")
+
+def save_results(args, results_by_provider):
+    """Write each provider's results, history and rollups (per-provider directories when there are several)"""
+    for provider, results in results_by_provider.items():
+        if results and args.output:
+            path = args.output
+            if len(results_by_provider) > 1:
+                path = group_output_path(args.output, provider, placeholder='provider')
+            with span('write_output', file=path):
+                dump(results, path, args.format, default=result_default)
+            print(f"\nResults saved to {path}")
+    for provider, results in results_by_provider.items():
+        append_history(args, results, provider if len(results_by_provider) > 1 else None)
+        update_rollups(args, results, provider if len(results_by_provider) > 1 else None)
+
+def save_counts(args, results_by_provider):
+    """Write search-compatible result counts derived from rank results"""
+    if not args.counts_output:
+        return
+    for provider, results in results_by_provider.items():
+        if not results:
+            continue
+        path = args.counts_output
+        if len(results_by_provider) > 1:
+            path = group_output_path(args.counts_output, provider, placeholder='provider')
+        if is_matrix(results):
+            counts = {term: counts_from_rankings(by_variant) for term, by_variant in results.items()}
+        else:
+            counts = counts_from_rankings(results)
+        with span('write_output', file=path):
+            dump(counts, path, args.format, default=result_default)
+        print(f"Result counts saved to {path}")
+
+def search_command(args):
+    """Handle search-related commands"""
+    if not configure_rate_limits(args, args.providers):
+        return
+    try:
+        trackers = make_trackers(args, GoogleSearchTracker)
+    except ValueError as e:
+        print(f"Error: {str(e)}")
+        return
+    
+    if args.usage:
+        print_usage(next(iter(trackers.values())))
+        return
+
+    # Get terms, or this run's sample of them
+    plan = None
+    if args.sample_budget:
+        plan, terms = sample_terms(args)
     else:
-        terms = args.terms
+        terms = load_terms(args)
+    if terms is None:
+        return
+    ok, variants = load_variants_arg(args)
+    if not ok:
+        return
+    attach_hedging(args, trackers)
 
-    # Perform search
-    results = tracker.search(terms)
+    # Perform search, querying the providers concurrently
+    results_by_provider = fan_out(trackers, lambda tracker: tracker.search(terms, **variant_kwargs(variants)))
     
     # Save results if output file specified
+    save_results(args, results_by_provider)
+    if plan is not None:
+        report_estimates(args, plan, next(iter(results_by_provider.values())))
+    write_metrics(args)
+
+def load_projects(args):
+    """Return project names or match rules from the command line arguments"""
+    if args.project_rules:
+        from awareness.core.matcher import load_project_rules
+        return load_project_rules(args.project_rules)
+    return args.projects
+
+def rank_groups_command(args, terms):
+    """Rank several project groups over shared fetches and write one file per group"""
+    from awareness.core.matcher import load_project_groups
+    try:
+        groups = load_project_groups(args.groups)
+    except Exception as e:
+        print(f"Error loading project groups: {str(e)}")
+        return
+    if len(args.providers) > 1:
+        print("Error: --groups supports a single provider")
+        return
+    try:
+        trackers = make_trackers(args, GroupRankTracker, groups)
+    except ValueError as e:
+        print(f"Error: {str(e)}")
+        return
+    if args.usage:
+        print_usage(next(iter(trackers.values())))
+        return
+    attach_text_index(args, trackers)
+    attach_hedging(args, trackers)
+    discovery = attach_discovery(args, trackers)
+    fingerprints = attach_fingerprints(args, trackers)
+    tracker = next(iter(trackers.values()))
+    results = tracker.search_group_ranks(terms, args.num_results)
+    if results:
+        results = finish_change_detection(args, fingerprints, results)
     if results and args.output:
-        with open(args.output, 'w') as f:
-            json.dump(results, f, indent=4)
-        print(f"\nResults saved to {args.output}")
+        for group, group_results in results.items():
+            path = group_output_path(args.output, group)
+            with span('write_output', file=path):
+                dump(group_results, path, args.format, default=result_default)
+            print(f"Results for group '{group}' saved to {path}")
+    if results:
+        # Every group shares the same fetches, so any group's totals will do
+        save_counts(args, {'groups': next(iter(results.values()))})
+        merged = merge_group_results(results)
+        append_history(args, merged)
+        update_rollups(args, merged)
+    report_discovery(args, discovery)
+
+def plan_refresh(args, terms):
+    """Pick the terms to re-rank under --refresh-budget from the volatility of past results"""
+    from awareness.core.query_service import ResultStore
+    from awareness.core.refresh import RefreshScheduler
+    scheduler = RefreshScheduler(ResultStore(args.refresh_from), args.num_results, args.max_age_hours)
+    plan = scheduler.plan(terms, args.refresh_budget)
+    print(f"Refreshing {len(plan.refresh)} of {len(terms)} terms "
+          f"(budget {args.refresh_budget} queries, up to {scheduler.term_cost()} per term); "
+          f"carrying forward {len(plan.carried)}")
+    return plan
+
+def output_path(args, trackers, provider):
+    """The --output path a provider's results are written to"""
+    if len(trackers) > 1:
+        return group_output_path(args.output, provider, placeholder='provider')
+    return args.output
+
+def pipeline_ranks(args, trackers, terms, variants):
+    """Rank with fetch, match, persist and render overlapping (--pipeline).
+
+    Each term is appended to <output>.partial.jsonl as soon as it is ranked,
+    and with --pipeline-charts its chart is rendered right away. Returns the
+    results per provider and the open partial outputs.
+    """
+    from awareness.core.pipeline import PartialOutput
+    from awareness.charts.generate_charts import save_ranking_chart
+    partials = {}
+    if args.output:
+        partials = {provider: PartialOutput(output_path(args, trackers, provider) + '.partial.jsonl')
+                    for provider in trackers}
+    if args.pipeline_charts:
+        os.makedirs(args.pipeline_charts, exist_ok=True)
+
+    def rank(tracker):
+        provider = tracker.provider.name
+        partial = partials.get(provider)
+        chart_file = os.path.basename(output_path(args, trackers, provider)) if args.output else 'rankings.json'
+
+        def render(term, variant, record):
+            # Same file names as `awareness charts` would give a variant's facet
+            if 'project_rankings' in record:
+                root, ext = os.path.splitext(chart_file)
+                filename = f"{root}_{variant['name']}{ext}" if variant else chart_file
+                save_ranking_chart(args.pipeline_charts, filename, term, record)
+
+        return tracker.pipeline_project_ranks(
+            terms, args.num_results, persist=partial.write if partial else None,
+            render=render if args.pipeline_charts else None, depth=args.pipeline_depth,
+            **variant_kwargs(variants))
+
+    return fan_out(trackers, rank), partials
 
 def rank_command(args):
     """Handle project ranking commands"""
-    tracker = ProjectRankTracker(args.key, args.cx, args.projects)
+    if not configure_rate_limits(args, args.providers):
+        return
+    if args.changes_only and not args.fingerprints:
+        print("Error: --changes-only requires --fingerprints")
+        return
+    if args.pipeline_charts and not args.pipeline:
+        print("Error: --pipeline-charts requires --pipeline")
+        return
+    if args.groups and args.variants:
+        print("Error: --variants cannot be combined with --groups")
+        return
+    if args.groups and args.pipeline:
+        print("Error: --pipeline cannot be combined with --groups")
+        return
+    if args.groups and args.refresh_budget is not None:
+        print("Error: --refresh-budget cannot be combined with --groups")
+        return
+    if args.groups:
+        # --usage only needs a tracker, not the terms
+        terms = None if args.usage else load_terms(args)
+        if args.usage or terms is not None:
+            rank_groups_command(args, terms)
+            write_metrics(args)
+        return
+    try:
+        projects = load_projects(args)
+    except Exception as e:
+        print(f"Error loading project rules: {str(e)}")
+        return
+    try:
+        trackers = make_trackers(args, ProjectRankTracker, projects)
+    except ValueError as e:
+        print(f"Error: {str(e)}")
+        return
     
     if args.usage:
-        usage = tracker.get_remaining_calls()
-        print(f"\nAPI Usage for {usage['date']}:")
-        print(f"Queries used today: {usage['used_today']}")
-        print(f"Free queries remaining: {usage['free_remaining']}")
-        if usage['used_today'] >= 100:
-            print("You are now in the paid tier ($0.005 per query)")
+        print_usage(next(iter(trackers.values())))
         return
 
     # Get terms
-    if args.file:
-        try:
-            from awareness.utils.search_terms import SearchTermsLoader
-            terms = SearchTermsLoader.load_terms(args.file)
-        except Exception as e:
-            print(f"Error loading terms from file: {str(e)}")
+    terms = load_terms(args)
+    if terms is None:
+        return
+    ok, variants = load_variants_arg(args)
+    if not ok:
+        return
+    attach_text_index(args, trackers)
+    attach_hedging(args, trackers)
+    discovery = attach_discovery(args, trackers)
+    fingerprints = attach_fingerprints(args, trackers)
+
+    # Only re-rank the terms that are due, carrying the rest forward
+    plan = None
+    if args.refresh_budget is not None:
+        if len(trackers) > 1:
+            print("Error: --refresh-budget supports a single provider")
             return
-    else:
-        terms = args.terms
+        plan = plan_refresh(args, terms)
+        all_terms, terms = terms, plan.refresh
 
-    # Perform ranking search
-    results = tracker.search_project_ranks(terms, args.num_results)
+    # Perform ranking search, querying the providers concurrently
+    partials = {}
+    if args.pipeline:
+        results_by_provider, partials = pipeline_ranks(args, trackers, terms, variants)
+    else:
+        results_by_provider = fan_out(trackers, lambda tracker: tracker.search_project_ranks(
+            terms, args.num_results, **variant_kwargs(variants)))
+    if plan is not None:
+        results_by_provider = {provider: plan.merge(all_terms, results)
+                               for provider, results in results_by_provider.items()}
+    results_by_provider = finish_change_detection(args, fingerprints, results_by_provider)
     
     # Save results if output file specified
-    if results and args.output:
-        with open(args.output, 'w') as f:
-            json.dump(results, f, indent=4)
-        print(f"\nResults saved to {args.output}")
+    save_results(args, results_by_provider)
+    save_counts(args, results_by_provider)
+    for partial in partials.values():
+        # The full output now holds every term
+        partial.close(remove=True)
+    report_discovery(args, discovery)
+    write_metrics(args)
+
+def watch_command(args):
+    """Handle the long-running scheduler daemon"""
+    from awareness.core.watch import WatchDaemon, ScheduleError
+    if not configure_rate_limits(args):
+        return
+    try:
+        daemon = WatchDaemon(args.key, args.cx, args.schedule, inbox_dir=args.inbox)
+    except (OSError, ScheduleError) as e:
+        print(f"Error loading schedule: {str(e)}")
+        return
+    if args.metrics_port:
+        from awareness.utils.metrics import start_http_exporter
+        start_http_exporter(args.metrics_port)
+        print(f"Serving metrics on port {args.metrics_port}")
+    if args.once:
+        daemon.run_once()
+    else:
+        try:
+            daemon.run_forever()
+        except KeyboardInterrupt:
+            daemon.stop()
+    write_metrics(args)
+
+def serve_command(args):
+    """Handle the local HTTP query service"""
+    from awareness.core.query_service import ResultStore, QueryService, make_server
+    tracker = None
+    if args.key and args.cx and args.projects:
+        if not configure_rate_limits(args):
+            return
+        tracker = ProjectRankTracker(args.key, args.cx, args.projects)
+        tracker.interactive = False
+    service = QueryService(ResultStore(args.results_dir), tracker, cache_size=args.cache_size,
+                           max_age=args.max_age, num_results=args.num_results)
+    server = make_server(service, args.port, args.host)
+    print(f"Serving results from '{args.results_dir}' on http://{args.host or 'localhost'}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+    write_metrics(args)
 
 def charts_command(args):
     """Handle chart generation commands"""
     sys.argv = [sys.argv[0]] + ['--input-dir', args.input_dir, '--output-dir', args.output_dir]
+    if args.history:
+        sys.argv += ['--history', args.history]
+    if args.granularity != 'run':
+        sys.argv += ['--granularity', args.granularity, '--rollup-dir', args.rollup_dir]
+    if args.chart_format != 'png':
+        sys.argv += ['--format', args.chart_format]
+    if args.layout != 'single':
+        sys.argv += ['--layout', args.layout]
+    if args.layout != 'single' or args.chart_format == 'pdf':
+        sys.argv += ['--per-page', str(args.per_page)]
+    if args.downsample != 'minmax' or args.max_points != DEFAULT_MAX_POINTS:
+        sys.argv += ['--downsample', args.downsample, '--max-points', str(args.max_points)]
     generate_charts()
 
+def rollup_command(args):
+    """Rebuild the daily/weekly rollups from stored result files"""
+    from awareness.utils.rollups import RollupStore
+    store = RollupStore(args.rollup_dir)
+    try:
+        files = store.rebuild(args.input_dir)
+    except (OSError, ValueError) as e:
+        print(f"Error rebuilding rollups: {str(e)}")
+        return
+    print(f"Rebuilt rollups in {args.rollup_dir} from {files} files: "
+          f"{len(store.buckets('daily'))} days, {len(store.buckets('weekly'))} weeks")
+
+def history_command(args):
+    """Import JSON outputs into the binary history store, or summarize it"""
+    from awareness.utils.history_store import HistoryStore, convert_json_files, from_epoch
+    if args.import_files:
+        try:
+            files, records = convert_json_files(args.import_files, args.history_dir)
+        except (OSError, ValueError) as e:
+            print(f"Error importing results: {str(e)}")
+            return
+        print(f"Imported {records} records from {files} files into {args.history_dir}")
+    store = HistoryStore(args.history_dir)
+    records = store.records()
+    print(f"\nHistory in {args.history_dir}:")
+    print(f"Records: {len(records):,}")
+    print(f"Terms: {len(store.terms)}, projects: {len(store.projects)}")
+    if len(records):
+        print(f"Runs from {from_epoch(records['run_time'].min())} to {from_epoch(records['run_time'].max())}")
+
+def grep_command(args):
+    """Search the full-text index of archived titles, snippets and links"""
+    from awareness.utils.text_index import TextIndex, phrase_query
+    if not os.path.exists(args.text_index):
+        print(f"Error: no text index at {args.text_index} (build one with rank --text-index)")
+        return
+    index = TextIndex(args.text_index)
+    query = args.phrase if args.raw else phrase_query(args.phrase, args.prefix)
+    for extra in args.near or []:
+        query += f" AND {phrase_query(extra)}"
+    try:
+        if args.first:
+            rows = index.first_seen(query)
+            if args.term:
+                rows = [row for row in rows if row['term'] == args.term]
+        else:
+            rows = index.search(query, args.term, args.limit, latest_first=args.latest)
+    except Exception as e:
+        # sqlite3.OperationalError for malformed --raw queries
+        print(f"Error: invalid query {query!r}: {str(e)}")
+        return
+    if not rows:
+        stats = index.stats()
+        index.close()
+        print(f"No matches for {query} in {stats['items']:,} items from {stats['runs']} runs")
+        return
+    index.close()
+    if args.first:
+        print(f"First appearance of {query} by search term:")
+        for row in rows:
+            print(f"{row['first_seen']}  {row['term']}  (last seen {row['last_seen']}, "
+                  f"{row['runs']} runs, best position #{row['best_position']})")
+        return
+    for row in rows:
+        print(f"{row['run_time']}  {row['term']}  #{row['position']} [{row['provider']}]  {row['title']}")
+        print(f"    {row['link']}")
+        if row['snippet']:
+            print(f"    {row['snippet']}")
+
+def add_rate_arguments(parser):
+    """Add the rate limit and instrumentation options shared by API commands"""
+    parser.add_argument('--min-rate', type=float,
+                        help='Lowest request rate in queries/second when throttled (default: 0.1)')
+    parser.add_argument('--max-rate', type=float,
+                        help='Highest request rate in queries/second (default: 1.5)')
+    parser.add_argument('--metrics-file',
+                        help='Write Prometheus text-format metrics to this file after the run')
+
+def add_hedging_arguments(parser):
+    """Add the tail-latency hedging options shared by search and rank"""
+    parser.add_argument('--hedge-percentile', type=float, metavar='P',
+                        help='Duplicate a request once it is slower than this percentile of recent latencies '
+                             '(e.g. 95) and use whichever copy answers first')
+    parser.add_argument('--hedge-max', type=int, default=10,
+                        help='Most duplicate (billed) requests per provider per run (default: 10)')
+
+def add_provider_arguments(parser):
+    """Add the search provider options shared by search and rank"""
+    parser.add_argument('--providers', nargs='+', choices=PROVIDERS, default=['google'],
+                        help='Search backends to query concurrently; with several, -o writes one file per '
+                             'provider (use {provider} in the name to place it) (default: google)')
+    parser.add_argument('--searxng-url', help='Base URL of a SearXNG instance for the searxng provider')
+
+def add_variant_argument(parser):
+    """Add the locale variant matrix option shared by search and rank"""
+    parser.add_argument('--variants', nargs='+', metavar='VARIANT',
+                        help='Query every term in each locale variant, e.g. us:gl=us,hl=en de:gl=de,hl=de '
+                             '(or a YAML/JSON file of variants); results are keyed by term, then variant')
+
+def add_format_argument(parser):
+    """Add the output file format option"""
+    parser.add_argument('--format', choices=['json', 'msgpack'], default='json',
+                        help='Output file format; msgpack is compact binary and needs the msgpack package '
+                             '(default: json)')
+
+def add_profiling_arguments(parser):
+    """Add the profiling and logging options shared by every command"""
+    parser.add_argument('--profile', metavar='TRACE_FILE',
+                        help='Record per-stage timings as a Chrome trace (.json) or JSON lines (.jsonl)')
+    parser.add_argument('--cprofile', metavar='STATS_FILE',
+                        help='Also write a cProfile dump readable with pstats/snakeviz')
+    parser.add_argument('--log-format', choices=['text', 'json'], default='text',
+                        help='Progress output format (default: text)')
+
 def main():
     parser = argparse.ArgumentParser(
         description='Project Awareness Toolkit - Track and analyze open source project visibility'
@@ -87,26 +686,85 @@ def main():
     
     # Search command
     search_parser = subparsers.add_parser('search', help='Track search result counts')
-    search_parser.add_argument('--key', required=True, help='Google Custom Search API key')
-    search_parser.add_argument('--cx', required=True, help='Google Custom Search Engine ID')
+    search_parser.add_argument('--key', help='Google Custom Search API key (required for the google provider)')
+    search_parser.add_argument('--cx', help='Google Custom Search Engine ID (required for the google provider)')
     search_parser.add_argument('--usage', action='store_true', help='Show API usage and exit')
     term_group = search_parser.add_mutually_exclusive_group()
     term_group.add_argument('-t', '--terms', nargs='+', help='Space-separated search terms')
     term_group.add_argument('-f', '--file', help='File with search terms (one per line)')
+    term_group.add_argument('--term-groups',
+                            help='YAML/JSON file of named term groups, or CSV with the group in column 2')
     search_parser.add_argument('-o', '--output', help='Save results to JSON file')
+    search_parser.add_argument('--sample-budget', type=int,
+                               help='Query only this many terms per run, as a stratified rotating sample')
+    search_parser.add_argument('--sample-state', default='sample_state.json',
+                               help='File that keeps the sample rotation between runs (default: sample_state.json)')
+    search_parser.add_argument('--estimates-output', help='Save group-level estimates to this file')
+    search_parser.add_argument('--confidence', type=float, default=0.95,
+                               help='Confidence level of the estimate intervals (default: 0.95)')
+    add_format_argument(search_parser)
+    add_provider_arguments(search_parser)
+    add_variant_argument(search_parser)
+    add_hedging_arguments(search_parser)
+    search_parser.add_argument('--history', help='Also append results to this binary history directory')
+    search_parser.add_argument('--rollup-dir', help='Also update daily/weekly rollups in this directory')
+    add_rate_arguments(search_parser)
     
     # Rank command
     rank_parser = subparsers.add_parser('rank', help='Track project rankings in search results')
-    rank_parser.add_argument('--key', required=True, help='Google Custom Search API key')
-    rank_parser.add_argument('--cx', required=True, help='Google Custom Search Engine ID')
+    rank_parser.add_argument('--key', help='Google Custom Search API key (required for the google provider)')
+    rank_parser.add_argument('--cx', help='Google Custom Search Engine ID (required for the google provider)')
     rank_parser.add_argument('--usage', action='store_true', help='Show API usage and exit')
-    rank_parser.add_argument('--projects', nargs='+', required=True, help='Projects to track')
+    project_group = rank_parser.add_mutually_exclusive_group(required=True)
+    project_group.add_argument('--projects', nargs='+', help='Projects to track')
+    project_group.add_argument('--project-rules',
+                               help='YAML/JSON file with per-project match rules (domains, repos, tokens)')
+    project_group.add_argument('--groups',
+                               help='YAML/JSON file of named project groups ranked over shared fetches')
     term_group = rank_parser.add_mutually_exclusive_group()
     term_group.add_argument('-t', '--terms', nargs='+', help='Space-separated search terms')
     term_group.add_argument('-f', '--file', help='File with search terms (one per line)')
     rank_parser.add_argument('--num-results', type=int, default=100,
                           help='Number of results to check (default: 100)')
-    rank_parser.add_argument('-o', '--output', help='Save results to JSON file')
+    rank_parser.add_argument('-o', '--output',
+                             help='Save results to JSON file (with --groups, one file per group; '
+                                  'use {group} in the name to place it)')
+    add_format_argument(rank_parser)
+    add_provider_arguments(rank_parser)
+    add_variant_argument(rank_parser)
+    add_hedging_arguments(rank_parser)
+    rank_parser.add_argument('--pipeline', action='store_true',
+                             help='Overlap fetching, matching, persisting and chart rendering; each ranked term '
+                                  'is appended to <output>.partial.jsonl as soon as it is done')
+    rank_parser.add_argument('--pipeline-depth', type=int, default=16,
+                             help='Terms each pipeline stage may queue before the one feeding it waits (default: 16)')
+    rank_parser.add_argument('--pipeline-charts', metavar='DIR',
+                             help='With --pipeline, render each term\'s ranking chart into DIR as soon as it is ranked')
+    rank_parser.add_argument('--refresh-budget', type=int,
+                             help='Re-rank only the most volatile or stale terms within this many queries; '
+                                  'the rest are carried forward from earlier results')
+    rank_parser.add_argument('--refresh-from', default='output',
+                             help='Directory of earlier rank results used to score terms (default: output)')
+    rank_parser.add_argument('--max-age-hours', type=float,
+                             help='Always refresh terms whose latest ranking is at least this old')
+    rank_parser.add_argument('--counts-output',
+                             help='Also save search-compatible result counts from the same fetches')
+    rank_parser.add_argument('--history', help='Also append results to this binary history directory')
+    rank_parser.add_argument('--fingerprints',
+                             help='JSON file of per-term result fingerprints; terms whose links and ranks '
+                                  'match the previous run are written as "unchanged since" records')
+    rank_parser.add_argument('--changes-only', action='store_true',
+                             help='With --fingerprints, only write terms whose results changed')
+    rank_parser.add_argument('--discover', type=int, metavar='N',
+                             help='Report the N highest-ranking domains and repos not owned by a tracked project')
+    rank_parser.add_argument('--discovery-state',
+                             help='Sketch file (.npz) that accumulates --discover across runs')
+    rank_parser.add_argument('--discovery-output', help='Save the --discover report to this JSON file')
+    rank_parser.add_argument('--text-index',
+                             help='Also index fetched titles, snippets and links into this SQLite file '
+                                  'for awareness grep')
+    rank_parser.add_argument('--rollup-dir', help='Also update daily/weekly rollups in this directory')
+    add_rate_arguments(rank_parser)
     
     # Charts command
     charts_parser = subparsers.add_parser('charts', help='Generate charts from JSON results')
@@ -114,6 +772,83 @@ def main():
                            help='Directory containing JSON files (default: output)')
     charts_parser.add_argument('--output-dir', default='charts',
                            help='Directory to save charts (default: charts)')
+    charts_parser.add_argument('--history', help='Binary history directory to chart rankings over time')
+    charts_parser.add_argument('--granularity', choices=['run', 'daily', 'weekly'], default='run',
+                               help='Chart each run from the raw files, or daily/weekly rollups (default: run)')
+    charts_parser.add_argument('--rollup-dir', default='rollups',
+                               help='Directory of materialized rollups (default: rollups)')
+    charts_parser.add_argument('--format', dest='chart_format', choices=['png', 'pdf', 'html'], default='png',
+                               help='PNG files, a single multi-page charts.pdf with ranking grids, '
+                                    'or a single HTML dashboard with sharded data (default: png)')
+    charts_parser.add_argument('--layout', choices=['single', 'grid'], default='single',
+                               help='One ranking chart per term, or pages of ranking panels (default: single)')
+    charts_parser.add_argument('--per-page', type=int, default=12,
+                               help='Ranking panels per grid page (default: 12)')
+    charts_parser.add_argument('--downsample', choices=DOWNSAMPLE_METHODS, default='minmax',
+                               help='How long time-series lines are thinned before drawing (default: minmax)')
+    charts_parser.add_argument('--max-points', type=int, default=DEFAULT_MAX_POINTS,
+                               help=f'Most points drawn per line (default: {DEFAULT_MAX_POINTS})')
+    
+    # Rollup command
+    rollup_parser = subparsers.add_parser('rollup', help='Rebuild daily/weekly rollups from stored results')
+    rollup_parser.add_argument('--input-dir', default='output',
+                               help='Directory containing result files (default: output)')
+    rollup_parser.add_argument('--rollup-dir', default='rollups',
+                               help='Directory of materialized rollups (default: rollups)')
+    
+    # History command
+    history_parser = subparsers.add_parser('history', help='Build or inspect the binary result history')
+    history_parser.add_argument('--history-dir', default='history',
+                                help='Binary history directory (default: history)')
+    history_parser.add_argument('--import', dest='import_files', nargs='+', metavar='JSON_FILE',
+                                help='Search/rank JSON outputs to import (files already imported are skipped)')
+    
+    # Grep command
+    grep_parser = subparsers.add_parser('grep', help='Search archived titles and snippets for a phrase')
+    grep_parser.add_argument('phrase', help='Phrase to find (an FTS5 query with --raw)')
+    grep_parser.add_argument('--text-index', default='output/text_index.db',
+                             help='Full-text index written by rank --text-index (default: output/text_index.db)')
+    grep_parser.add_argument('--prefix', action='store_true', help='Let the last word match as a prefix')
+    grep_parser.add_argument('--raw', action='store_true',
+                             help='Pass the phrase through as FTS5 query syntax (AND, OR, NEAR, prefix*)')
+    grep_parser.add_argument('--near', nargs='+', metavar='TEXT',
+                             help='Only items that also mention these phrases, e.g. a project name')
+    grep_parser.add_argument('--term', help='Only results for this search term')
+    grep_parser.add_argument('--first', action='store_true',
+                             help='Show when the phrase first appeared for each search term')
+    grep_parser.add_argument('--latest', action='store_true', help='List the newest matches first')
+    grep_parser.add_argument('--limit', type=int, default=20, help='Matches to list (default: 20)')
+    
+    # Watch command
+    watch_parser = subparsers.add_parser('watch', help='Run scheduled jobs in a long-running process')
+    watch_parser.add_argument('--key', required=True, help='Google Custom Search API key')
+    watch_parser.add_argument('--cx', required=True, help='Google Custom Search Engine ID')
+    watch_parser.add_argument('--schedule', required=True, help='YAML/JSON schedule file (reloaded on change)')
+    watch_parser.add_argument('--inbox', help='Directory polled for one-off job files')
+    watch_parser.add_argument('--metrics-port', type=int, help='Serve Prometheus metrics on this port')
+    watch_parser.add_argument('--once', action='store_true', help='Run every job once and exit')
+    add_rate_arguments(watch_parser)
+    
+    # Serve command
+    serve_parser = subparsers.add_parser('serve', help='Serve stored results over a local HTTP API')
+    serve_parser.add_argument('--results-dir', default='output',
+                              help='Directory containing JSON results (default: output)')
+    serve_parser.add_argument('--host', default='127.0.0.1', help='Address to bind (default: 127.0.0.1)')
+    serve_parser.add_argument('--port', type=int, default=8080, help='Port to listen on (default: 8080)')
+    serve_parser.add_argument('--cache-size', type=int, default=1024,
+                              help='Number of lookups kept in the LRU cache (default: 1024)')
+    serve_parser.add_argument('--key', help='Google Custom Search API key (enables refresh=1)')
+    serve_parser.add_argument('--cx', help='Google Custom Search Engine ID (enables refresh=1)')
+    serve_parser.add_argument('--projects', nargs='+', help='Projects to rank when refreshing a term')
+    serve_parser.add_argument('--num-results', type=int, default=100,
+                              help='Number of results to check when refreshing (default: 100)')
+    serve_parser.add_argument('--max-age', type=float, default=3600,
+                              help='Seconds before a stored ranking is refetched on refresh (default: 3600)')
+    add_rate_arguments(serve_parser)
+    
+    for subparser in (search_parser, rank_parser, charts_parser, history_parser, rollup_parser,
+                      grep_parser, watch_parser, serve_parser):
+        add_profiling_arguments(subparser)
     
     args = parser.parse_args()
     
@@ -121,13 +856,21 @@ def main():
         parser.print_help()
         return
     
+    get_console().configure(fmt=args.log_format)
+    
     # Execute the appropriate command
-    if args.command == 'search':
-        search_command(args)
-    elif args.command == 'rank':
-        rank_command(args)
-    elif args.command == 'charts':
-        charts_command(args)
+    commands = {
+        'search': search_command,
+        'rank': rank_command,
+        'charts': charts_command,
+        'history': history_command,
+        'rollup': rollup_command,
+        'grep': grep_command,
+        'watch': watch_command,
+        'serve': serve_command
+    }
+    with profile_session(args.profile, args.cprofile):
+        commands[args.command](args)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,282 @@
+import glob
+import json
+import math
+import os
+import zlib
+from typing import Dict, Optional
+
+from awareness.utils.rollups import RollupStore
+
+# Terms per data shard; the page fetches one shard when a term is opened
+SHARD_TERMS = 50
+NOT_FOUND_RANK = 101
+DATA_DIR = 'data'
+BUCKET_LABELS = {'run': 'run', 'daily': 'day', 'weekly': 'week'}
+
+
+def _term(series: Dict, term: str) -> Dict:
+    return series.setdefault(term, {'rankings': {}, 'counts': [], 'total_results': []})
+
+
+def collect_runs(data: Dict[str, Dict]) -> Dict[str, Dict]:
+    """Per-term rank and count series from loaded result files.
+
+    Each series is a time-ordered list of ``[timestamp, value]``; a run that
+    appears in several files is kept once, and carried-forward and unchanged
+    records are skipped because they repeat an earlier run.
+    """
+    series: Dict[str, Dict] = {}
+    for results in data.values():
+        if not isinstance(results, dict):
+            continue
+        for term, info in results.items():
+            if not hasattr(info, 'get') or 'timestamp' not in info or info.get('carried_forward') \
+                    or 'unchanged_since' in info:
+                continue
+            timestamp = info['timestamp']
+            entry = _term(series, term)
+            if 'project_rankings' in info:
+                for project, rank in info['project_rankings'].items():
+                    entry['rankings'].setdefault(project, {})[timestamp] = rank
+                if info.get('total_results') is not None:
+                    entry['total_results'].append((timestamp, info['total_results']))
+            elif 'count' in info:
+                entry['counts'].append((timestamp, info['count']))
+    return {term: _finish(entry) for term, entry in series.items()}
+
+
+def collect_rollups(store: RollupStore, granularity: str) -> Dict[str, Dict]:
+    """Per-term series from daily/weekly rollups: average rank and last count per bucket"""
+    series: Dict[str, Dict] = {}
+    for row in store.ranking_report(granularity):
+        _term(series, row['term'])['rankings'].setdefault(row['project'], {})[row['bucket']] = row['average_rank']
+    for row in store.count_report(granularity):
+        _term(series, row['term'])['counts'].append((row['bucket'], row['last_count']))
+    return {term: _finish(entry) for term, entry in series.items()}
+
+
+def _finish(entry: Dict) -> Dict:
+    return {
+        'rankings': {project: sorted([x, rank] for x, rank in points.items())
+                     for project, points in sorted(entry['rankings'].items())},
+        'counts': sorted([x, count] for x, count in dict(entry['counts']).items()),
+        'total_results': sorted([x, total] for x, total in dict(entry['total_results']).items()),
+    }
+
+
+def _summary(term: str, entry: Dict, shard: int) -> Dict:
+    """One row of the term table: latest rank per project and latest result count"""
+    latest = {project: points[-1][1] for project, points in entry['rankings'].items() if points}
+    counts = entry['counts'] or entry['total_results']
+    runs = {x for points in entry['rankings'].values() for x, _ in points} | {x for x, _ in counts}
+    return {'term': term, 'shard': shard, 'latest': latest,
+            'count': counts[-1][1] if counts else None,
+            'last_run': max(runs) if runs else None, 'runs': len(runs)}
+
+
+def shard_of(term: str, shards: int) -> int:
+    """Stable shard number for a term"""
+    return zlib.crc32(term.encode('utf-8')) % shards
+
+
+def _write_json(path: str, obj):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(obj, f, separators=(',', ':'))
+
+
+def write_dashboard(series: Dict[str, Dict], output_dir: str, title: str = 'Project Awareness',
+                    granularity: str = 'run') -> Dict[str, int]:
+    """Write index.html, data/index.json and data/shard_NNN.json; returns term and shard counts"""
+    data_dir = os.path.join(output_dir, DATA_DIR)
+    os.makedirs(data_dir, exist_ok=True)
+    # Shards from an earlier, larger run would otherwise linger
+    for stale in glob.glob(os.path.join(data_dir, 'shard_*.json')):
+        os.remove(stale)
+
+    shards = max(1, math.ceil(len(series) / SHARD_TERMS))
+    buckets: Dict[int, Dict] = {}
+    rows = []
+    for term in sorted(series):
+        shard = shard_of(term, shards)
+        buckets.setdefault(shard, {})[term] = series[term]
+        rows.append(_summary(term, series[term], shard))
+    for shard, terms in buckets.items():
+        _write_json(os.path.join(data_dir, f'shard_{shard:03d}.json'), terms)
+    projects = sorted({project for entry in series.values() for project in entry['rankings']})
+    _write_json(os.path.join(data_dir, 'index.json'),
+                {'title': title, 'granularity': granularity, 'bucket': BUCKET_LABELS[granularity],
+                 'not_found_rank': NOT_FOUND_RANK,
+                 'projects': projects, 'terms': rows})
+    with open(os.path.join(output_dir, 'index.html'), 'w', encoding='utf-8') as f:
+        f.write(PAGE.replace('__TITLE__', title))
+    return {'terms': len(rows), 'shards': len(buckets)}
+
+
+def generate_dashboard(output_dir: str, data: Optional[Dict] = None, store: Optional[RollupStore] = None,
+                       granularity: str = 'run') -> Dict[str, int]:
+    """Build the HTML dashboard from loaded result files or, for daily/weekly, from rollups"""
+    if granularity == 'run':
+        series = collect_runs(data or {})
+    else:
+        series = collect_rollups(store, granularity)
+    return write_dashboard(series, output_dir, granularity=granularity)
+
+
+PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>__TITLE__</title>
+<style>
+body { font-family: sans-serif; margin: 1.5em; color: #222; }
+#layout { display: flex; gap: 2em; }
+#terms { width: 45%; }
+#detail { flex: 1; }
+input { width: 100%; padding: .4em; margin-bottom: .5em; }
+table { border-collapse: collapse; width: 100%; font-size: 90%; }
+th, td { text-align: left; padding: .25em .5em; border-bottom: 1px solid #eee; }
+th { cursor: pointer; }
+tr.term { cursor: pointer; }
+tr.term:hover, tr.selected { background: #eef4ff; }
+.muted { color: #888; }
+svg text { font-size: 11px; }
+</style>
+</head>
+<body>
+<h1>__TITLE__</h1>
+<p class="muted" id="status">Loading&hellip;</p>
+<div id="layout">
+  <div id="terms">
+    <input id="filter" placeholder="Filter terms">
+    <table><thead><tr>
+      <th data-key="term">Term</th><th data-key="best">Best rank</th>
+      <th data-key="count">Results</th><th data-key="last_run">Last run</th>
+    </tr></thead><tbody id="rows"></tbody></table>
+    <p class="muted" id="more"></p>
+  </div>
+  <div id="detail"><p class="muted">Select a term to load its history.</p></div>
+</div>
+<script>
+// Data lives in data/index.json and data/shard_NNN.json; serve this directory over HTTP
+// (e.g. python -m http.server) since browsers block fetch() from file:// pages.
+const MAX_ROWS = 200;
+const COLORS = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b', '#e377c2', '#7f7f7f'];
+const shards = {};
+let index = null, sortKey = 'term', sortDir = 1, selected = null;
+
+function loadShard(n) {
+  if (!shards[n]) {
+    const name = 'data/shard_' + String(n).padStart(3, '0') + '.json';
+    shards[n] = fetch(name).then(r => r.json());
+  }
+  return shards[n];
+}
+
+function best(row) {
+  const ranks = Object.values(row.latest).filter(r => r !== null);
+  return ranks.length ? Math.min(...ranks) : Infinity;
+}
+
+function esc(s) {
+  return String(s).replace(/[&<>"]/g, c => ({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'}[c]));
+}
+
+function fmt(n) { return n === null || n === undefined ? '' : Number(n).toLocaleString(); }
+
+function renderRows() {
+  const needle = document.getElementById('filter').value.toLowerCase();
+  const rows = index.terms.filter(r => r.term.toLowerCase().includes(needle));
+  rows.sort((a, b) => {
+    const x = sortKey === 'best' ? best(a) : a[sortKey], y = sortKey === 'best' ? best(b) : b[sortKey];
+    return (x > y ? 1 : x < y ? -1 : 0) * sortDir;
+  });
+  const body = document.getElementById('rows');
+  body.innerHTML = '';
+  for (const row of rows.slice(0, MAX_ROWS)) {
+    const tr = document.createElement('tr');
+    tr.className = 'term' + (row.term === selected ? ' selected' : '');
+    const b = best(row);
+    for (const value of [row.term, b === Infinity ? 'not found' : '#' + b, fmt(row.count), row.last_run || '']) {
+      const td = document.createElement('td');
+      td.textContent = value;
+      tr.appendChild(td);
+    }
+    tr.onclick = () => showTerm(row);
+    body.appendChild(tr);
+  }
+  document.getElementById('more').textContent =
+    rows.length > MAX_ROWS ? `Showing ${MAX_ROWS} of ${rows.length} matching terms; refine the filter.` : '';
+}
+
+function lineChart(title, series, opts) {
+  const W = 640, H = 300, L = 70, R = 130, T = 30, B = 60;
+  const xs = [...new Set(series.flatMap(s => s.points.map(p => p[0])))].sort();
+  const values = series.flatMap(s => s.points.map(p => p[1]));
+  if (!xs.length || !values.length) return '';
+  let lo = opts.min !== undefined ? opts.min : Math.min(...values), hi = opts.max !== undefined ? opts.max : Math.max(...values);
+  if (lo === hi) { lo -= 1; hi += 1; }
+  const x = v => L + (xs.length === 1 ? (W - L - R) / 2 : xs.indexOf(v) * (W - L - R) / (xs.length - 1));
+  const y = v => opts.invert ? T + (v - lo) / (hi - lo) * (H - T - B) : H - B - (v - lo) / (hi - lo) * (H - T - B);
+  let svg = `<svg width="${W}" height="${H}"><text x="${L}" y="18" font-weight="bold">${title}</text>`;
+  svg += `<line x1="${L}" y1="${H - B}" x2="${W - R}" y2="${H - B}" stroke="#ccc"/>`;
+  for (const t of [lo, (lo + hi) / 2, hi]) {
+    svg += `<text x="${L - 6}" y="${y(t) + 4}" text-anchor="end">${opts.label(t)}</text>`;
+    svg += `<line x1="${L}" y1="${y(t)}" x2="${W - R}" y2="${y(t)}" stroke="#f0f0f0"/>`;
+  }
+  const step = Math.max(1, Math.ceil(xs.length / 6));
+  xs.forEach((v, i) => {
+    if (i % step === 0 || i === xs.length - 1)
+      svg += `<text x="${x(v)}" y="${H - B + 16}" text-anchor="middle">${String(v).slice(0, 10)}</text>`;
+  });
+  series.forEach((s, i) => {
+    const color = COLORS[i % COLORS.length];
+    const pts = s.points.map(p => `${x(p[0])},${y(p[1])}`).join(' ');
+    svg += `<polyline fill="none" stroke="${color}" stroke-width="2" points="${pts}"/>`;
+    for (const p of s.points) svg += `<circle cx="${x(p[0])}" cy="${y(p[1])}" r="3" fill="${color}"><title>${p[0]}: ${opts.label(p[1])}</title></circle>`;
+    svg += `<text x="${W - R + 8}" y="${T + 14 * i + 10}" fill="${color}">${esc(s.name)}</text>`;
+  });
+  return svg + '</svg>';
+}
+
+async function showTerm(row) {
+  selected = row.term;
+  renderRows();
+  const detail = document.getElementById('detail');
+  detail.innerHTML = '<p class="muted">Loading&hellip;</p>';
+  const entry = (await loadShard(row.shard))[row.term];
+  const nf = index.not_found_rank;
+  const ranks = Object.entries(entry.rankings).map(([name, points]) =>
+    ({name, points: points.map(p => [p[0], p[1] === null ? nf : p[1]])}));
+  const counts = entry.counts.length ? entry.counts : entry.total_results;
+  const heading = document.createElement('h2');
+  heading.textContent = row.term;
+  detail.innerHTML = '';
+  detail.appendChild(heading);
+  const charts = document.createElement('div');
+  charts.innerHTML =
+    lineChart(index.granularity === 'run' ? 'Rank per run' : 'Average rank per ' + index.bucket,
+              ranks, {min: 1, max: nf, invert: true, label: v => v >= nf ? 'not found' : '#' + Math.round(v)}) +
+    lineChart('Search results', counts.length ? [{name: 'results', points: counts}] : [], {label: fmt});
+  detail.appendChild(charts);
+}
+
+document.querySelectorAll('th').forEach(th => th.onclick = () => {
+  sortDir = sortKey === th.dataset.key ? -sortDir : 1;
+  sortKey = th.dataset.key;
+  renderRows();
+});
+document.getElementById('filter').oninput = renderRows;
+
+fetch('data/index.json').then(r => r.json()).then(data => {
+  index = data;
+  document.getElementById('status').textContent =
+    `${index.terms.length} terms, ${index.projects.length} projects (${index.granularity})`;
+  renderRows();
+}).catch(err => {
+  document.getElementById('status').textContent = 'Could not load data/index.json: ' + err +
+    ' (serve this directory over HTTP, e.g. python -m http.server)';
+});
+</script>
+</body>
+</html>
+"""
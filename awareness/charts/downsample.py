@@ -0,0 +1,71 @@
+import numpy as np
+
+# Lines are drawn on 12-inch-wide figures at matplotlib's default 100 dpi
+DEFAULT_MAX_POINTS = 1200
+METHODS = ('minmax', 'lttb', 'none')
+
+
+def minmax(x, y, max_points: int = DEFAULT_MAX_POINTS) -> np.ndarray:
+    """Indices of the first, last, lowest and highest point of each bucket.
+
+    ``x`` and ``y`` are split into ``max_points // 2`` equal buckets of
+    consecutive points. Every bucket's extremes are kept, so a one-run rank
+    spike survives however long the series gets. The result has at most
+    ``max_points + 2`` indices, in order.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    buckets = max(1, max_points // 2)
+    if n <= max(max_points, 2):
+        return np.arange(n)
+    size = -(-n // buckets)
+    buckets = -(-n // size)
+    # Pad the last bucket with NaN so every bucket is one row of the same length
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    rows = padded.reshape(buckets, size)
+    offsets = np.arange(buckets) * size
+    keep = np.concatenate([[0, n - 1], offsets + np.nanargmin(rows, axis=1), offsets + np.nanargmax(rows, axis=1)])
+    return np.unique(keep)
+
+
+def lttb(x, y, max_points: int = DEFAULT_MAX_POINTS) -> np.ndarray:
+    """Indices chosen by Largest-Triangle-Three-Buckets.
+
+    The first and last points are always kept. Between them, each bucket
+    keeps the point that forms the largest triangle with the previously
+    kept point and the mean of the next bucket. That preserves the visual
+    shape of the line with exactly ``max_points`` points. Within a bucket
+    the areas are computed with NumPy.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n <= max(max_points, 3):
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    keep = np.empty(max_points, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(max_points - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        following = slice(stop, edges[bucket + 2] if bucket + 2 < len(edges) else n)
+        mean_x, mean_y = x[following].mean(), y[following].mean()
+        areas = np.abs((x[previous] - mean_x) * (y[start:stop] - y[previous]) -
+                       (x[previous] - x[start:stop]) * (mean_y - y[previous]))
+        previous = start + int(np.argmax(areas))
+        keep[bucket + 1] = previous
+    return keep
+
+
+def downsample(x, y, max_points: int = DEFAULT_MAX_POINTS, method: str = 'minmax'):
+    """Return ``x`` and ``y`` (lists or arrays) cut down to about ``max_points`` points"""
+    if method not in METHODS:
+        raise ValueError(f"Unknown downsampling method '{method}'")
+    if method == 'none' or len(y) <= max_points:
+        return x, y
+    numeric_x = np.arange(len(y)) if len(x) and not np.issubdtype(np.asarray(x).dtype, np.number) else x
+    keep = (minmax if method == 'minmax' else lttb)(numeric_x, y, max_points)
+    if isinstance(x, np.ndarray) and isinstance(y, np.ndarray):
+        return x[keep], y[keep]
+    return [x[i] for i in keep], [y[i] for i in keep]
@@ -1,20 +1,46 @@
 #!/usr/bin/env python3
-import json
 import glob
 import os
 import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.figure import Figure
 from datetime import datetime
 import argparse
+from awareness.utils.profiling import span
+from awareness.utils.history_store import HistoryStore, NO_PROJECT, NOT_FOUND, from_epoch
+from awareness.utils.serialization import RESULT_PATTERNS, load
+from awareness.utils.rollups import RollupStore, bucket_start
+from awareness.charts.downsample import DEFAULT_MAX_POINTS, METHODS, downsample
+from awareness.charts.dashboard import generate_dashboard
+from awareness.core.variants import flatten_variants, is_matrix, split_variants
+
+BUCKET_NAMES = {'daily': 'Day', 'weekly': 'Week'}
+# Longer lines are drawn without per-point markers
+MARKER_POINTS = 100
+
+def result_entries(results):
+    """The term records (or per-variant records) of a loaded file, dropping anything else."""
+    if not isinstance(results, dict):
+        return {}
+    return {term: info for term, info in results.items()
+            if hasattr(info, 'get') and ('timestamp' in info or is_matrix({term: info}))}
 
 def load_json_files(directory):
-    """Load all JSON files from the specified directory."""
-    json_files = glob.glob(os.path.join(directory, '*.json'))
+    """Load all result files (JSON or msgpack) from the specified directory.
+
+    Other JSON written next to the results, such as --estimates-output or
+    --discovery-output reports, has no term records and is skipped.
+    """
+    result_files = [path for pattern in RESULT_PATTERNS for path in glob.glob(os.path.join(directory, pattern))]
     data = {}
-    for file_path in json_files:
+    for file_path in result_files:
         if file_path.endswith('api_usage.json'):
             continue
-        with open(file_path, 'r') as f:
-            data[os.path.basename(file_path)] = json.load(f)
+        with span('load_results', file=os.path.basename(file_path)):
+            results = result_entries(load(file_path))
+        if results:
+            data[os.path.basename(file_path)] = results
     return data
 
 def format_number(num):
@@ -25,18 +51,85 @@ def format_number(num):
         return f'{num/1_000:.1f} thousand'
     return str(num)
 
-def generate_search_count_chart(data, output_dir):
+def save_figure(path, pdf=None):
+    """Save the current figure as a PNG at path, or as the next page of an open PdfPages."""
+    if pdf is not None:
+        pdf.savefig()
+    else:
+        plt.savefig(path)
+    plt.close()
+
+def facet_variants(data):
+    """Split variant-matrix files into one entry per variant (rankings_us-en.json) so each gets its own charts"""
+    faceted = {}
+    for filename, results in data.items():
+        if isinstance(results, dict) and is_matrix(results):
+            root, ext = os.path.splitext(filename)
+            for variant, variant_results in split_variants(results).items():
+                faceted[f"{root}_{variant}{ext}"] = variant_results
+        else:
+            faceted[filename] = results
+    return faceted
+
+def generate_variant_charts(data, output_dir, pdf=None):
+    """Generate side-by-side charts comparing locale variants of each term."""
+    for filename, results in data.items():
+        if not (isinstance(results, dict) and is_matrix(results)):
+            continue
+        stem = os.path.splitext(filename)[0]
+        count_terms = []
+        for term, by_variant in results.items():
+            variants = list(by_variant)
+            if any('project_rankings' in record for record in by_variant.values()):
+                projects = sorted({p for record in by_variant.values() for p in record.get('project_rankings', {})})
+                width = 0.8 / len(variants)
+                plt.figure(figsize=(max(8, len(projects) * len(variants) * 0.6), 6))
+                for i, variant in enumerate(variants):
+                    rankings = by_variant[variant].get('project_rankings', {})
+                    ranks = [rankings.get(p) or 100 for p in projects]
+                    plt.bar([x + i * width for x in range(len(projects))], ranks, width, label=variant)
+                plt.xticks([x + width * (len(variants) - 1) / 2 for x in range(len(projects))], projects,
+                           rotation=45, ha='right')
+                plt.title(f'Project Rankings by Variant for "{term}"')
+                plt.ylabel('Rank Position (100 = not found)')
+                plt.ylim(0, 105)
+                plt.gca().invert_yaxis()
+                plt.grid(axis='y', linestyle='--', alpha=0.3)
+                plt.legend()
+                plt.tight_layout()
+                save_figure(os.path.join(output_dir, f'rankings_variants_{term}_{stem}.png'), pdf)
+            elif any('count' in record for record in by_variant.values()):
+                count_terms.append(term)
+        if count_terms:
+            variants = sorted({v for term in count_terms for v in results[term]})
+            width = 0.8 / len(variants)
+            plt.figure(figsize=(max(8, len(count_terms) * len(variants) * 0.6), 6))
+            for i, variant in enumerate(variants):
+                counts = [results[term].get(variant, {}).get('count', 0) for term in count_terms]
+                plt.bar([x + i * width for x in range(len(count_terms))], counts, width, label=variant)
+            plt.xticks([x + width * (len(variants) - 1) / 2 for x in range(len(count_terms))], count_terms,
+                       rotation=45, ha='right')
+            plt.title('Search Results Count by Variant')
+            plt.ylabel('Number of Results')
+            plt.grid(axis='y', linestyle='--', alpha=0.3)
+            plt.legend()
+            plt.tight_layout()
+            save_figure(os.path.join(output_dir, f'search_counts_variants_{stem}.png'), pdf)
+
+def generate_search_count_chart(data, output_dir, pdf=None):
     """Generate line charts for search result counts over time."""
     for filename, results in data.items():
         terms = []
         counts = []
         timestamps = []
+        carried = []
         
         for term, info in results.items():
             if 'count' in info:  # Basic search results
                 terms.append(term)
                 counts.append(info['count'])
                 timestamps.append(datetime.strptime(info['timestamp'], "%Y-%m-%d %H:%M:%S"))
+                carried.append(info.get('carried_forward', False))
         
         if terms:  # Basic search results
             plt.figure(figsize=(12, 6))
@@ -44,6 +137,11 @@ def generate_search_count_chart(data, output_dir):
             # Create bar plot
             ax = plt.gca()
             bars = plt.bar(terms, counts)
+            # Carried-forward counts were not re-queried this run; draw them muted
+            for bar, is_carried in zip(bars, carried):
+                if is_carried:
+                    bar.set_color('lightgray')
+                    bar.set_hatch('//')
             
             # Determine if we should use log scale
             count_range = max(counts) / (min(counts) if min(counts) > 0 else 1)
@@ -61,63 +159,271 @@ def generate_search_count_chart(data, output_dir):
             plt.xticks(rotation=45, ha='right')
             plt.ylabel('Number of Results (log scale)' if ax.get_yscale() == 'log' else 'Number of Results')
             plt.tight_layout()
-            plt.savefig(os.path.join(output_dir, f'search_counts_{os.path.splitext(filename)[0]}.png'))
-            plt.close()
+            save_figure(os.path.join(output_dir, f'search_counts_{os.path.splitext(filename)[0]}.png'), pdf)
+
+def draw_ranking_panel(ax, term, info, compact=False):
+    """Draw one term's project ranking bars on an axes; compact panels use smaller labels."""
+    rankings = info['project_rankings']
+    projects = list(rankings.keys())
+    ranks = [rankings[p] if rankings[p] is not None else 100 for p in projects]
+    total_results = info.get('total_results') or 0
+    # Carried-forward rankings were not re-queried this run; draw them muted
+    carried = info.get('carried_forward', False)
+    bars = ax.bar(range(len(projects)), ranks, color='lightgray' if carried else 'C0',
+                  hatch='//' if carried else None)
+    ax.set_xticks(range(len(projects)), projects, rotation=45, ha='right', fontsize=7 if compact else None)
+    ax.set_xlim(-0.6, len(projects) - 0.4)
+    
+    # Add value labels on top of each bar
+    for bar in bars:
+        height = bar.get_height()
+        label = ('-' if compact else 'Not found') if height == 100 else f'#{int(height)}'
+        # Position the text inside the bar for better visibility
+        ax.text(bar.get_x() + bar.get_width()/2., height - 5,
+               label,
+               ha='center', va='top', rotation=0,
+               color='white', fontweight='bold', fontsize=7 if compact else None)
+    
+    if compact:
+        title = f'"{term}" ({format_number(total_results)})'
+        if carried:
+            title += f" - {info.get('age_hours', 0):.0f}h old"
+        # A fixed title position skips measuring the tick labels on every draw
+        ax.set_title(title, fontsize=9, y=1.0)
+    else:
+        title = f'Project Rankings for "{term}"\n(Total Results: {format_number(total_results)})'
+        if carried:
+            title += f"\nCarried forward from {info['timestamp']} ({info.get('age_hours', 0):.0f}h old)"
+        ax.set_title(title)
+        ax.set_ylabel('Rank Position')
+    ax.set_ylim(105, 0)  # Inverted so better ranks are higher, with space for the labels
+    
+    # Add grid for better readability
+    ax.grid(axis='y', linestyle='--', alpha=0.3)
+
+def save_ranking_chart(output_dir, filename, term, info):
+    """Render one term's ranking chart to rankings_<term>_<file>.png.
+
+    The figure is built without pyplot, so charts can be rendered from a
+    worker thread while a run is still fetching.
+    """
+    fig = Figure(figsize=(10, 6))
+    draw_ranking_panel(fig.add_subplot(), term, info)
+    fig.tight_layout()
+    fig.savefig(os.path.join(output_dir, f'rankings_{term}_{os.path.splitext(filename)[0]}.png'))
 
 def generate_ranking_charts(data, output_dir):
     """Generate charts for project rankings."""
     for filename, results in data.items():
         for term, info in results.items():
             if 'project_rankings' in info:  # Project rankings
-                rankings = info['project_rankings']
-                projects = list(rankings.keys())
-                ranks = [rankings[p] if rankings[p] is not None else 100 for p in projects]
-                total_results = info.get('total_results', 0)
-                
-                plt.figure(figsize=(10, 6))
-                ax = plt.gca()
-                bars = plt.bar(projects, ranks)
-                
-                # Add value labels on top of each bar
-                for bar in bars:
-                    height = bar.get_height()
-                    label = 'Not found' if height == 100 else f'#{int(height)}'
-                    # Position the text inside the bar for better visibility
-                    ax.text(bar.get_x() + bar.get_width()/2., height - 5,
-                           label,
-                           ha='center', va='top', rotation=0,
-                           color='white', fontweight='bold')
-                
-                plt.title(f'Project Rankings for "{term}"\n(Total Results: {format_number(total_results)})')
-                plt.xticks(rotation=45, ha='right')
-                plt.ylabel('Rank Position')
-                plt.ylim(0, 105)  # Give some space for the labels
-                plt.gca().invert_yaxis()  # Invert Y-axis so better ranks are higher
-                
-                # Add grid for better readability
-                plt.grid(axis='y', linestyle='--', alpha=0.3)
-                
-                plt.tight_layout()
-                plt.savefig(os.path.join(output_dir, f'rankings_{term}_{os.path.splitext(filename)[0]}.png'))
-                plt.close()
+                save_ranking_chart(output_dir, filename, term, info)
+
+def grid_shape(per_page):
+    """Columns and rows of a page holding ``per_page`` panels, at most four columns wide."""
+    columns = min(4, per_page)
+    return columns, -(-per_page // columns)
+
+def generate_ranking_grid(data, output_dir, per_page=12, pdf=None):
+    """Pack ranking panels for many terms onto shared pages.
+
+    One figure with ``per_page`` panels and a shared rank axis is built once
+    and redrawn for every page, so figure, axes and tick setup are paid once
+    rather than per term. Pages go to ``rankings_grid_<file>_<page>.png``, or
+    onto an open ``PdfPages`` when ``pdf`` is given. Returns the number of
+    pages written.
+    """
+    columns, rows = grid_shape(per_page)
+    fig, axes = plt.subplots(rows, columns, figsize=(4 * columns, 3.2 * rows), sharey=True, squeeze=False)
+    axes = axes.ravel()
+    for ax in axes:
+        ax.set_yticks([1, 25, 50, 75, 100])
+    for ax in axes[::columns]:
+        ax.set_ylabel('Rank Position')
+    # Fixed margins instead of tight_layout, which measures every label on the page
+    fig.subplots_adjust(left=0.06, right=0.98, top=1 - 0.6 / (3.2 * rows), bottom=0.9 / (3.2 * rows),
+                        wspace=0.12, hspace=0.75)
+    pages = 0
+    try:
+        for filename, results in data.items():
+            stem = os.path.splitext(filename)[0]
+            terms = [term for term, info in results.items() if 'project_rankings' in info]
+            page_count = -(-len(terms) // per_page)
+            for page, first in enumerate(range(0, len(terms), per_page), 1):
+                page_terms = terms[first:first + per_page]
+                for ax in axes:
+                    # Drop the previous page's bars and labels but keep the axes and their ticks
+                    for artist in ax.patches + ax.texts:
+                        artist.remove()
+                    ax.containers.clear()
+                    ax.set_visible(False)
+                for ax, term in zip(axes, page_terms):
+                    ax.set_visible(True)
+                    draw_ranking_panel(ax, term, results[term], compact=True)
+                fig.suptitle(f'Project Rankings - {filename} (page {page} of {page_count})')
+                if pdf is not None:
+                    pdf.savefig(fig)
+                else:
+                    fig.savefig(os.path.join(output_dir, f'rankings_grid_{stem}_{page:03d}.png'))
+                pages += 1
+    finally:
+        plt.close(fig)
+    return pages
+
+def plot_series(x, y, label, max_points=DEFAULT_MAX_POINTS, method='minmax'):
+    """Plot one line, downsampled to at most about max_points points; markers only on short lines."""
+    x, y = downsample(x, y, max_points, method)
+    plt.plot(x, y, marker='o' if len(y) <= MARKER_POINTS else None, label=label)
+
+def generate_history_charts(store, output_dir, pdf=None, max_points=DEFAULT_MAX_POINTS, method='minmax'):
+    """Generate rank-over-time charts per term from a binary history store."""
+    records = store.records()
+    if len(records) == 0:
+        return
+    rankings = records[records['project_id'] != NO_PROJECT]
+    for term_id in sorted(set(rankings['term_id'].tolist())):
+        term_records = rankings[rankings['term_id'] == term_id]
+        if len(set(term_records['run_time'].tolist())) < 2:
+            continue  # A single run is already covered by the per-file charts
+        term = store.terms[term_id]
+        plt.figure(figsize=(12, 6))
+        for project_id in sorted(set(term_records['project_id'].tolist())):
+            series = term_records[term_records['project_id'] == project_id]
+            series = series[series['run_time'].argsort(kind='stable')]
+            ranks = series['rank'].astype(float)
+            ranks[ranks == NOT_FOUND] = 100
+            # Downsample on epoch seconds so only the kept points are converted to datetimes
+            run_times, ranks = downsample(series['run_time'].astype(np.int64), ranks, max_points, method)
+            plt.plot([from_epoch(t) for t in run_times], ranks,
+                     marker='o' if len(ranks) <= MARKER_POINTS else None, label=store.projects[project_id])
+        plt.title(f'Project Rankings over Time for "{term}"')
+        plt.ylabel('Rank Position')
+        plt.ylim(0, 105)
+        plt.gca().invert_yaxis()
+        plt.grid(axis='y', linestyle='--', alpha=0.3)
+        plt.legend()
+        plt.xticks(rotation=45, ha='right')
+        plt.tight_layout()
+        save_figure(os.path.join(output_dir, f'rankings_history_{term}.png'), pdf)
+
+def generate_rollup_charts(store, granularity, output_dir, pdf=None, max_points=DEFAULT_MAX_POINTS, method='minmax'):
+    """Generate average-rank and result-count trend charts from daily/weekly rollups."""
+    rank_rows = store.ranking_report(granularity)
+    for term in sorted({row['term'] for row in rank_rows}):
+        plt.figure(figsize=(12, 6))
+        term_rows = [row for row in rank_rows if row['term'] == term]
+        for project in sorted({row['project'] for row in term_rows}):
+            series = [row for row in term_rows if row['project'] == project]
+            plot_series([bucket_start(row['bucket'], granularity) for row in series],
+                        [row['average_rank'] if row['average_rank'] is not None else 100 for row in series],
+                        project, max_points, method)
+        plt.title(f'Average Project Rank per {BUCKET_NAMES[granularity]} for "{term}"')
+        plt.ylabel('Average Rank Position')
+        plt.ylim(0, 105)
+        plt.gca().invert_yaxis()
+        plt.grid(axis='y', linestyle='--', alpha=0.3)
+        plt.legend()
+        plt.xticks(rotation=45, ha='right')
+        plt.tight_layout()
+        save_figure(os.path.join(output_dir, f'rankings_{granularity}_{term}.png'), pdf)
+
+    count_rows = store.count_report(granularity)
+    if count_rows:
+        plt.figure(figsize=(12, 6))
+        for term in sorted({row['term'] for row in count_rows}):
+            series = [row for row in count_rows if row['term'] == term]
+            plot_series([bucket_start(row['bucket'], granularity) for row in series],
+                        [row['last_count'] for row in series], term, max_points, method)
+        plt.title(f'Search Results Count per {BUCKET_NAMES[granularity]}')
+        plt.ylabel('Number of Results')
+        plt.grid(axis='y', linestyle='--', alpha=0.3)
+        plt.legend()
+        plt.xticks(rotation=45, ha='right')
+        plt.tight_layout()
+        save_figure(os.path.join(output_dir, f'search_counts_{granularity}.png'), pdf)
 
 def main():
     parser = argparse.ArgumentParser(description='Generate charts from search results JSON files')
     parser.add_argument('--input-dir', default='output', help='Directory containing JSON files (default: output)')
     parser.add_argument('--output-dir', default='charts', help='Directory to save charts (default: charts)')
+    parser.add_argument('--history', help='Binary history directory to chart rankings over time')
+    parser.add_argument('--granularity', choices=['run', 'daily', 'weekly'], default='run',
+                        help='Chart each run from the raw files, or daily/weekly rollups (default: run)')
+    parser.add_argument('--rollup-dir', default='rollups',
+                        help='Directory of materialized rollups (default: rollups)')
+    parser.add_argument('--format', choices=['png', 'pdf', 'html'], default='png',
+                        help='PNG files, a single multi-page charts.pdf with ranking grids, '
+                             'or a single HTML dashboard with sharded data (default: png)')
+    parser.add_argument('--layout', choices=['single', 'grid'], default='single',
+                        help='One ranking chart per term, or pages of ranking panels (default: single)')
+    parser.add_argument('--per-page', type=int, default=12,
+                        help='Ranking panels per grid page (default: 12)')
+    parser.add_argument('--downsample', choices=METHODS, default='minmax',
+                        help='How time-series lines are thinned: keep each bucket\'s lowest and highest point '
+                             '(minmax), Largest-Triangle-Three-Buckets (lttb) or every point (none) '
+                             '(default: minmax)')
+    parser.add_argument('--max-points', type=int, default=DEFAULT_MAX_POINTS,
+                        help=f'Most points drawn per line (default: {DEFAULT_MAX_POINTS}, '
+                             'one per pixel of a 12-inch chart)')
     args = parser.parse_args()
+    if args.per_page < 1:
+        parser.error('--per-page must be at least 1')
+    if args.max_points < 3:
+        parser.error('--max-points must be at least 3')
     
     # Create output directory if it doesn't exist
     os.makedirs(args.output_dir, exist_ok=True)
     
-    # Load JSON data
-    data = load_json_files(args.input_dir)
+    if args.format == 'html':
+        # Only JSON is written here; the page draws each term's charts when it is opened
+        data = load_json_files(args.input_dir) if args.granularity == 'run' else None
+        if data:
+            # Each variant becomes its own "term [variant]" row
+            data = {name: flatten_variants(results) if isinstance(results, dict) else results
+                    for name, results in data.items()}
+        with span('render_chart', kind='dashboard'):
+            written = generate_dashboard(args.output_dir, data, RollupStore(args.rollup_dir), args.granularity)
+        print(f"Dashboard for {written['terms']} terms ({written['shards']} data shards) written to "
+              f"'{os.path.join(args.output_dir, 'index.html')}'.")
+        return
     
-    # Generate charts
-    generate_search_count_chart(data, args.output_dir)
-    generate_ranking_charts(data, args.output_dir)
+    # A PDF holds every chart as a page, with rankings always packed into grids
+    pdf = PdfPages(os.path.join(args.output_dir, 'charts.pdf')) if args.format == 'pdf' else None
+    try:
+        if args.granularity != 'run':
+            # Rollups already hold the aggregates, so the raw files are not read at all
+            with span('render_chart', kind=args.granularity):
+                generate_rollup_charts(RollupStore(args.rollup_dir), args.granularity, args.output_dir, pdf,
+                                       args.max_points, args.downsample)
+        else:
+            # Load JSON data
+            data = load_json_files(args.input_dir)
+            
+            # Generate charts; variant-matrix files get one set of charts per variant plus comparisons
+            with span('render_chart', kind='variants'):
+                generate_variant_charts(data, args.output_dir, pdf)
+            data = facet_variants(data)
+            with span('render_chart', kind='search_counts'):
+                generate_search_count_chart(data, args.output_dir, pdf)
+            with span('render_chart', kind='rankings'):
+                if pdf is not None or args.layout == 'grid':
+                    generate_ranking_grid(data, args.output_dir, args.per_page, pdf)
+                else:
+                    generate_ranking_charts(data, args.output_dir)
+            if args.history:
+                with span('load_results', file=args.history):
+                    store = HistoryStore(args.history)
+                with span('render_chart', kind='history'):
+                    generate_history_charts(store, args.output_dir, pdf, args.max_points, args.downsample)
+    finally:
+        if pdf is not None:
+            pages = pdf.get_pagecount()
+            pdf.close()
     
-    print(f"Charts have been generated in the '{args.output_dir}' directory.")
+    if pdf is not None:
+        print(f"{pages} chart pages have been written to '{os.path.join(args.output_dir, 'charts.pdf')}'.")
+    else:
+        print(f"Charts have been generated in the '{args.output_dir}' directory.")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,212 @@
+import hashlib
+import os
+import queue
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from awareness.core.matcher import ProjectMatcher, normalize_url
+
+# Code hosts where the owner/repo path, not the host, identifies a project
+REPO_HOSTS = ('github.com', 'gitlab.com', 'bitbucket.org', 'codeberg.org')
+
+
+def item_key(link: str) -> Optional[str]:
+    """Normalized domain (or host/owner/repo on code hosts) for a result link"""
+    if not link:
+        return None
+    host, segments = normalize_url(link)
+    if not host:
+        return None
+    if host in REPO_HOSTS:
+        # Profile, topic and search pages on a code host aren't a project
+        return f"{host}/{segments[0]}/{segments[1]}" if len(segments) >= 2 else None
+    return host
+
+
+def position_weight(rank: int) -> float:
+    """Reciprocal rank: the top result weighs as much as ten results at rank 10"""
+    return 1.0 / rank
+
+
+class CountMinSketch:
+    """Fixed-size table of ``depth`` hashed counter rows.
+
+    Estimates never undercount; with the default 4 x 4096 table they
+    overcount by at most ~0.07% of the total weight with 98% probability.
+    Keys are hashed with BLAKE2b, so sketches saved by different runs can be
+    merged.
+    """
+
+    def __init__(self, width: int = 4096, depth: int = 4):
+        if not 1 <= depth <= 8:
+            raise ValueError("Sketch depth must be between 1 and 8")
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.float64)
+        self._rows = np.arange(depth)
+
+    def _columns(self, key: str) -> np.ndarray:
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=4 * self.depth).digest()
+        return np.frombuffer(digest, dtype='<u4') % self.width
+
+    def add(self, key: str, weight: float = 1.0) -> float:
+        """Add weight to a key and return its new estimate"""
+        columns = self._columns(key)
+        self.table[self._rows, columns] += weight
+        return float(self.table[self._rows, columns].min())
+
+    def estimate(self, key: str) -> float:
+        return float(self.table[self._rows, self._columns(key)].min())
+
+    def merge(self, other: 'CountMinSketch'):
+        if other.table.shape != self.table.shape:
+            raise ValueError("Only sketches of the same width and depth can be merged")
+        self.table += other.table
+
+
+class HeavyHitters:
+    """Approximate top-k keys by weight in bounded memory.
+
+    A Count-Min sketch holds the weights of every key seen; a candidate table
+    of at most ``k`` keys keeps the current leaders, evicting the lowest
+    estimate when a new key overtakes it.
+    """
+
+    def __init__(self, k: int = 100, width: int = 4096, depth: int = 4):
+        self.k = k
+        self.sketch = CountMinSketch(width, depth)
+        self.candidates: Dict[str, float] = {}
+        self.best_rank: Dict[str, int] = {}
+        self.total = 0.0
+
+    def add(self, key: str, weight: float = 1.0, rank: Optional[int] = None):
+        self.total += weight
+        estimate = self.sketch.add(key, weight)
+        if key not in self.candidates and len(self.candidates) >= self.k:
+            weakest = min(self.candidates, key=self.candidates.get)
+            if estimate <= self.candidates[weakest]:
+                return
+            del self.candidates[weakest]
+            self.best_rank.pop(weakest, None)
+        self.candidates[key] = estimate
+        if rank is not None:
+            self.best_rank[key] = min(rank, self.best_rank.get(key, rank))
+
+    def top(self, n: int = 20) -> List[Dict]:
+        """Leading keys with their weighted score and share of all weight seen"""
+        leaders = sorted(self.candidates.items(), key=lambda kv: (-kv[1], kv[0]))[:n]
+        return [{'key': key, 'kind': 'repo' if key.split('/', 1)[0] in REPO_HOSTS else 'domain',
+                 'score': round(score, 3), 'share': round(score / self.total, 4) if self.total else 0.0,
+                 'best_rank': self.best_rank.get(key)}
+                for key, score in leaders]
+
+    def merge(self, other: 'HeavyHitters'):
+        """Fold another run's sketch in; candidates are re-estimated from the merged sketch"""
+        self.sketch.merge(other.sketch)
+        self.total += other.total
+        ranks = dict(other.best_rank)
+        for key, rank in self.best_rank.items():
+            ranks[key] = min(rank, ranks.get(key, rank))
+        keys = set(self.candidates) | set(other.candidates)
+        estimates = {key: self.sketch.estimate(key) for key in keys}
+        leaders = sorted(estimates, key=lambda key: (-estimates[key], key))[:self.k]
+        self.candidates = {key: estimates[key] for key in leaders}
+        self.best_rank = {key: ranks[key] for key in leaders if key in ranks}
+
+    def save(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        keys = list(self.candidates)
+        tmp_path = path + '.tmp.npz'
+        np.savez_compressed(tmp_path, table=self.sketch.table, total=np.array(self.total), k=np.array(self.k),
+                            keys=np.array(keys, dtype=str),
+                            estimates=np.array([self.candidates[key] for key in keys], dtype=np.float64),
+                            best_rank=np.array([self.best_rank.get(key, 0) for key in keys], dtype=np.int64))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'HeavyHitters':
+        with np.load(path) as data:
+            depth, width = data['table'].shape
+            hitters = cls(int(data['k']), width, depth)
+            hitters.sketch.table = data['table'].copy()
+            hitters.total = float(data['total'])
+            for key, estimate, rank in zip(data['keys'].tolist(), data['estimates'].tolist(),
+                                           data['best_rank'].tolist()):
+                hitters.candidates[key] = estimate
+                if rank:
+                    hitters.best_rank[key] = rank
+        return hitters
+
+
+class CompetitorDiscovery:
+    """Streams fetched result pages into a heavy-hitters sketch of unknown domains and repos.
+
+    ``feed`` only enqueues the page, so the fetch loop never waits on
+    hashing; a background thread normalizes links, skips anything owned by
+    a tracked project and adds each remaining key weighted by its rank.
+    """
+
+    def __init__(self, matcher: Optional[ProjectMatcher] = None, k: int = 100,
+                 width: int = 4096, depth: int = 4):
+        self.matcher = matcher
+        self.hitters = HeavyHitters(k, width, depth)
+        self.items_seen = 0
+        self._known: Dict[str, bool] = {}
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def is_known(self, key: str) -> bool:
+        """Whether a key belongs to a tracked project (owned domain, repo or name in the host)"""
+        if key not in self._known:
+            self._known[key] = bool(self.matcher and self.matcher.match_item({'link': 'https://' + key}))
+        return self._known[key]
+
+    def observe(self, items: Iterable, start_rank: int = 1):
+        """Add one page of items, ranked from ``start_rank``"""
+        for rank, item in enumerate(items, start_rank):
+            self.items_seen += 1
+            key = item_key(item.get('link', ''))
+            if key is None or self.is_known(key):
+                continue
+            self.hitters.add(key, position_weight(rank), rank)
+
+    def feed(self, items: List, start_rank: int = 1):
+        """Queue a page for the background thread"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='discovery', daemon=True)
+                self._thread.start()
+        self._queue.put((items, start_rank))
+
+    def _run(self):
+        while True:
+            page = self._queue.get()
+            if page is None:
+                return
+            self.observe(*page)
+
+    def close(self):
+        """Wait until every queued page has been counted"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def report(self, top: int = 20, history: Optional[HeavyHitters] = None) -> Dict:
+        """Top unknown domains and repos for this run, and across history if given"""
+        self.close()
+        report = {
+            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'items_seen': self.items_seen,
+            'run': self.hitters.top(top),
+        }
+        if history is not None:
+            report['history'] = history.top(top)
+        return report
@@ -0,0 +1,54 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, Iterable, Optional
+
+
+def result_fingerprint(items: Iterable, project_rankings: Dict) -> str:
+    """Short hash of a term's ordered result links and project ranks.
+
+    Result counts are left out on purpose: the API's estimate changes on
+    almost every request even when the page itself does not.
+    """
+    digest = hashlib.blake2b(digest_size=8)
+    for item in items:
+        digest.update(item.get('link', '').encode('utf-8'))
+        digest.update(b'\n')
+    digest.update(json.dumps(project_rankings, sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class FingerprintStore:
+    """Last fingerprint per term, and the run that first produced it.
+
+    Kept as a small JSON file keyed by namespace (the provider, and the
+    group in group mode) so consecutive runs can tell which terms changed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.data: Dict[str, Dict[str, list]] = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.data = json.load(f)
+        self._lock = threading.Lock()
+
+    def check(self, namespace: str, term: str, fingerprint: str, timestamp: str) -> Optional[str]:
+        """Timestamp of the run the result is unchanged since, or None (and remember it) if it changed"""
+        with self._lock:
+            terms = self.data.setdefault(namespace, {})
+            previous = terms.get(term)
+            if previous is not None and previous[0] == fingerprint:
+                return previous[1]
+            terms[term] = [fingerprint, timestamp]
+            return None
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with self._lock, open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
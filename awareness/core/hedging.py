@@ -0,0 +1,128 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Optional
+
+
+class HedgePolicy:
+    """Duplicate a slow request once, taking whichever copy answers first.
+
+    The hedge delay is the ``percentile`` of recent request latencies, so it
+    adapts to the API's current speed; nothing is hedged until
+    ``min_samples`` latencies have been seen. At most ``max_extra``
+    duplicates are issued per run, which bounds the added cost. The losing
+    copy's response is closed when it arrives; ``close()`` releases the
+    worker threads at the end of a run.
+    """
+
+    def __init__(self, percentile: float = 0.95, max_extra: int = 10, min_samples: int = 10,
+                 window: int = 200, min_delay: float = 0.05):
+        if not 0 < percentile < 1:
+            raise ValueError("The hedging percentile must be between 0 and 1")
+        self.percentile = percentile
+        self.max_extra = max_extra
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.latencies: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self.reset()
+
+    def reset(self):
+        """Start a new run: the cap and counters apply per run, the latency window carries over"""
+        with self._lock:
+            self.hedged = 0
+            self.won = 0
+            self.wasted = 0
+            self.last_delay = None
+
+    def observe(self, latency: float):
+        with self._lock:
+            self.latencies.append(latency)
+
+    def delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None while there is too little history"""
+        with self._lock:
+            if len(self.latencies) < self.min_samples:
+                return None
+            ordered = sorted(self.latencies)
+        return max(self.min_delay, ordered[int(self.percentile * (len(ordered) - 1))])
+
+    def _take(self) -> bool:
+        with self._lock:
+            if self.hedged >= self.max_extra:
+                return False
+            self.hedged += 1
+            return True
+
+    def close(self):
+        """Stop accepting work without waiting for a stalled loser to finish"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+    def run(self, send: Callable, on_hedge: Optional[Callable[[], None]] = None,
+            on_outcome: Optional[Callable[[str], None]] = None):
+        """Call ``send`` and, if it outlasts the hedge delay, race one duplicate against it.
+
+        ``on_hedge`` runs before the duplicate is sent (to pace and bill it),
+        and ``on_outcome`` receives 'won' or 'wasted' once the race is decided.
+        """
+        delay = self.delay()
+        if delay is None or self.hedged >= self.max_extra:
+            started = time.monotonic()
+            response = send()
+            self.observe(time.monotonic() - started)
+            return response
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix='hedge')
+        started = time.monotonic()
+        primary = self._pool.submit(send)
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._take():
+            response = primary.result()
+            self.observe(time.monotonic() - started)
+            return response
+
+        self.last_delay = delay
+        if on_hedge is not None:
+            on_hedge()
+        backup = self._pool.submit(send)
+        done, _ = wait([primary, backup], return_when=FIRST_COMPLETED)
+        # Prefer a copy that succeeded; fall back to waiting for the other one
+        first = primary if primary in done and primary.exception() is None else \
+            backup if backup in done and backup.exception() is None else None
+        if first is None:
+            other = backup if primary in done else primary
+            first = other if other.exception() is None else primary
+        # A hedged request's own latency is censored at the winner's; record what we saw
+        self.observe(time.monotonic() - started)
+        outcome = 'won' if first is backup else 'wasted'
+        with self._lock:
+            if first is backup:
+                self.won += 1
+            else:
+                self.wasted += 1
+        if on_outcome is not None:
+            on_outcome(outcome)
+        (primary if first is backup else backup).add_done_callback(_close_result)
+        return first.result()
+
+    def summary(self) -> Dict:
+        return {'hedged': self.hedged, 'won': self.won, 'wasted': self.wasted, 'cap': self.max_extra,
+                'delay': round(self.last_delay, 3) if self.last_delay is not None else None}
+
+    def describe(self) -> str:
+        if not self.hedged:
+            return f"Hedging: no requests hedged (cap {self.max_extra})"
+        return (f"Hedging: {self.hedged} slow requests duplicated after "
+                f"p{self.percentile * 100:g} = {self.last_delay:.2f}s; {self.won} answered first by the "
+                f"duplicate, {self.wasted} duplicates wasted ({self.hedged} extra queries, cap {self.max_extra})")
+
+
+def _close_result(future):
+    """Release the connection held by a losing copy's response"""
+    if not future.cancelled() and future.exception() is None and hasattr(future.result(), 'close'):
+        future.result().close()
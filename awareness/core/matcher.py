@@ -0,0 +1,183 @@
+import json
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import yaml
+
+TOKEN_PATTERN = re.compile(r'[\w][\w.+#-]*')
+LINK_TOKEN_PATTERN = re.compile(r'[\w+#]+')
+OWNED = 'owned'
+MENTIONED = 'mentioned'
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens; keeps names like node.js, c++ and my_project intact"""
+    return [token.rstrip('.-') for token in TOKEN_PATTERN.findall(text.lower())]
+
+
+def normalize_url(url: str) -> Tuple[str, Tuple[str, ...]]:
+    """Split a URL (or bare host/path) into a normalized host and path segments"""
+    if '//' not in url:
+        url = '//' + url
+    parts = urlsplit(url.strip().lower())
+    host = (parts.hostname or '').rstrip('.')
+    if host.startswith('www.'):
+        host = host[4:]
+    segments = tuple(segment for segment in parts.path.split('/') if segment)
+    return host, segments
+
+
+class ProjectRule:
+    """How to recognise one project in a search result.
+
+    ``domains`` are owned hosts, optionally with a path prefix
+    (``huggingface.co/docs``); subdomains match too. ``repos`` are GitHub
+    ``org`` or ``org/repo`` paths. ``tokens`` are words or phrases that count
+    as a mention when they appear as whole tokens in the title or snippet.
+    """
+
+    def __init__(self, name: str, domains: Iterable[str] = (), repos: Iterable[str] = (),
+                 tokens: Iterable[str] = (), match_links: bool = False):
+        self.name = name
+        self.domains = list(domains)
+        self.repos = list(repos)
+        self.tokens = list(tokens)
+        # Plain project names also look for their tokens in the result link
+        self.match_links = match_links
+
+    @classmethod
+    def from_spec(cls, spec: Union[str, Dict]) -> 'ProjectRule':
+        if isinstance(spec, str):
+            return cls(spec, tokens=[spec], match_links=True)
+        if not isinstance(spec, dict) or not spec.get('name'):
+            raise ValueError("Project rules need a 'name'")
+        rule = cls(str(spec['name']), spec.get('domains') or [], spec.get('repos') or [],
+                   spec.get('tokens') or [])
+        if not (rule.domains or rule.repos or rule.tokens):
+            rule.tokens = [rule.name]
+        return rule
+
+
+class ProjectMatcher:
+    """Resolves search result items to projects with hash lookups.
+
+    Rules are compiled once into a dict keyed by ``(host, path prefix)`` for
+    owned URLs and a dict keyed by first token for mentions, so matching an
+    item costs a few lookups per host label, path segment and token regardless
+    of how many projects are tracked.
+    """
+
+    def __init__(self, rules: Iterable[ProjectRule]):
+        self.rules = list(rules)
+        self.projects = [rule.name for rule in self.rules]
+        self._owned: Dict[Tuple[str, Tuple[str, ...]], List[str]] = {}
+        self._phrases: Dict[str, List[Tuple[Tuple[str, ...], str, bool]]] = {}
+        self._max_depth = 0
+        for rule in self.rules:
+            prefixes = [normalize_url(domain) for domain in rule.domains]
+            prefixes += [('github.com', normalize_url('github.com/' + repo.strip('/'))[1])
+                         for repo in rule.repos]
+            for host, segments in prefixes:
+                self._owned.setdefault((host, segments), []).append(rule.name)
+                self._max_depth = max(self._max_depth, len(segments))
+            for phrase in rule.tokens:
+                tokens = tuple(tokenize(phrase))
+                if tokens:
+                    self._phrases.setdefault(tokens[0], []).append((tokens, rule.name, rule.match_links))
+
+    @classmethod
+    def from_projects(cls, projects: Iterable[Union[str, Dict, ProjectRule]]) -> 'ProjectMatcher':
+        return cls(p if isinstance(p, ProjectRule) else ProjectRule.from_spec(p) for p in projects)
+
+    def _owned_matches(self, link: str) -> Iterator[str]:
+        host, segments = normalize_url(link)
+        labels = host.split('.')
+        for i in range(len(labels) - 1):
+            suffix = '.'.join(labels[i:])
+            for depth in range(min(self._max_depth, len(segments)) + 1):
+                yield from self._owned.get((suffix, segments[:depth]), ())
+
+    def _phrase_matches(self, tokens: List[str], in_link: bool) -> Iterator[str]:
+        for i, token in enumerate(tokens):
+            for phrase, project, match_links in self._phrases.get(token, ()):
+                if in_link and not match_links:
+                    continue
+                if len(phrase) == 1 or tuple(tokens[i:i + len(phrase)]) == phrase:
+                    yield project
+
+    def match_item(self, item: Dict) -> Dict[str, str]:
+        """Projects present in one result item, mapped to 'owned' or 'mentioned'"""
+        matches: Dict[str, str] = {}
+        link = item.get('link', '')
+        if link and self._owned:
+            for project in self._owned_matches(link):
+                matches[project] = OWNED
+        if self._phrases:
+            text = item.get('title', '') + ' ' + item.get('snippet', '')
+            for project in self._phrase_matches(tokenize(text), in_link=False):
+                matches.setdefault(project, MENTIONED)
+            if link:
+                link_tokens = LINK_TOKEN_PATTERN.findall(link.split('//', 1)[-1].lower())
+                for project in self._phrase_matches(link_tokens, in_link=True):
+                    matches.setdefault(project, MENTIONED)
+        return matches
+
+    def scan(self, items: Iterable[Dict], start_rank: int = 1) -> Iterator[Tuple[int, str, str]]:
+        """Stream (rank, project, kind) for every match in an item sequence"""
+        for rank, item in enumerate(items, start_rank):
+            for project, kind in self.match_item(item).items():
+                yield rank, project, kind
+
+    def find_matches(self, items: Iterable[Dict]) -> Dict[str, List[Dict]]:
+        """Every position at which each project appears"""
+        matches: Dict[str, List[Dict]] = {project: [] for project in self.projects}
+        for rank, project, kind in self.scan(items):
+            matches[project].append({'rank': rank, 'match': kind})
+        return matches
+
+    def find_ranks(self, items: Iterable[Dict]) -> Dict[str, Optional[int]]:
+        """First position of each project, or None"""
+        ranks: Dict[str, Optional[int]] = {project: None for project in self.projects}
+        for rank, project, _ in self.scan(items):
+            if ranks[project] is None:
+                ranks[project] = rank
+        return ranks
+
+
+def load_project_rules(file_path: str) -> List[Union[str, Dict]]:
+    """Load project rules from a YAML or JSON file.
+
+    The file holds a list (or an object with a 'projects' list) whose entries
+    are plain project names or objects with name/domains/repos/tokens.
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        data = json.load(f) if file_path.lower().endswith('.json') else yaml.safe_load(f)
+    if isinstance(data, dict):
+        data = data.get('projects')
+    if not isinstance(data, list) or not data:
+        raise ValueError("Project rules file must contain a non-empty list of projects")
+    for spec in data:
+        ProjectRule.from_spec(spec)
+    return data
+
+
+def load_project_groups(file_path: str) -> Dict[str, Union[List, Dict]]:
+    """Load named project groups from a YAML or JSON file.
+
+    The file maps group names (optionally under a 'groups' key) to a list of
+    projects or to an object with 'projects' and an optional 'num_results'.
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        data = json.load(f) if file_path.lower().endswith('.json') else yaml.safe_load(f)
+    if isinstance(data, dict) and isinstance(data.get('groups'), dict):
+        data = data['groups']
+    if not isinstance(data, dict) or not data:
+        raise ValueError("Project groups file must map group names to projects")
+    for name, spec in data.items():
+        projects = spec.get('projects') if isinstance(spec, dict) else spec
+        if not isinstance(projects, list) or not projects:
+            raise ValueError(f"Group '{name}' must list at least one project")
+        for project in projects:
+            ProjectRule.from_spec(project)
+    return data
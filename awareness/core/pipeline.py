@@ -0,0 +1,149 @@
+import json
+import os
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from awareness.core.records import result_default
+
+# Marks the end of the stream on a stage's inbox
+_DONE = object()
+
+
+class Stage:
+    """One pipeline step: a handler, its bounded inbox and timing totals"""
+
+    def __init__(self, name: str, handle: Optional[Callable] = None, depth: int = 0):
+        self.name = name
+        self.handle = handle
+        self.inbox: queue.Queue = queue.Queue(depth)
+        self.items = 0
+        self.busy = 0.0
+        # Time spent waiting for room in the next stage's inbox
+        self.blocked = 0.0
+
+    def summary(self) -> Dict:
+        return {'stage': self.name, 'items': self.items, 'busy': round(self.busy, 3),
+                'blocked': round(self.blocked, 3)}
+
+
+class Pipeline:
+    """Items from a source flow through stages, each on its own thread.
+
+    Stages are connected by queues of at most ``depth`` items. A full queue
+    blocks whoever feeds it, so a slow stage throttles the source instead of
+    letting items pile up in memory, and the run takes about as long as its
+    slowest stage. Each stage has a single worker, so items keep their order.
+    A handler returns the item to pass on, or None to drop it; an exception
+    drops the item and is reported to ``on_error(stage, item, error)``.
+    """
+
+    def __init__(self, depth: int = 16, on_error: Optional[Callable] = None):
+        if depth < 1:
+            raise ValueError("Pipeline depth must be at least 1")
+        self.depth = depth
+        self.on_error = on_error
+        self.stages: List[Stage] = []
+        self.source = Stage('fetch')
+        self.wall = 0.0
+
+    def add(self, name: str, handle: Callable) -> 'Pipeline':
+        self.stages.append(Stage(name, handle, self.depth))
+        return self
+
+    def _put(self, sender: Stage, index: int, item):
+        if index < len(self.stages):
+            started = time.perf_counter()
+            self.stages[index].inbox.put(item)
+            sender.blocked += time.perf_counter() - started
+
+    def _work(self, index: int):
+        stage = self.stages[index]
+        while True:
+            item = stage.inbox.get()
+            if item is _DONE:
+                self._put(stage, index + 1, _DONE)
+                return
+            started = time.perf_counter()
+            try:
+                item = stage.handle(item)
+            except Exception as e:
+                self._report(stage, item, e)
+                item = None
+            stage.busy += time.perf_counter() - started
+            stage.items += 1
+            if item is not None:
+                self._put(stage, index + 1, item)
+
+    def _report(self, stage: Stage, item, error: Exception):
+        # A failing error handler must not kill the worker, or the stages upstream block forever
+        if self.on_error is not None:
+            try:
+                self.on_error(stage.name, item, error)
+            except Exception:
+                pass
+
+    def run(self, source: Iterable):
+        """Drain ``source`` on the calling thread through every stage; returns once all are done"""
+        started = time.perf_counter()
+        workers = [threading.Thread(target=self._work, args=(index,), name=f'pipeline-{stage.name}', daemon=True)
+                   for index, stage in enumerate(self.stages)]
+        for worker in workers:
+            worker.start()
+        items = iter(source)
+        try:
+            while True:
+                produced = time.perf_counter()
+                try:
+                    item = next(items)
+                except StopIteration:
+                    break
+                finally:
+                    self.source.busy += time.perf_counter() - produced
+                self.source.items += 1
+                self._put(self.source, 0, item)
+        finally:
+            # Let the stages finish what they already have, even if the source failed
+            self._put(self.source, 0, _DONE)
+            for worker in workers:
+                worker.join()
+            self.wall = time.perf_counter() - started
+
+    def summary(self) -> Dict:
+        return {'wall': round(self.wall, 3), 'depth': self.depth,
+                'stages': [stage.summary() for stage in [self.source] + self.stages]}
+
+    def describe(self) -> str:
+        stages = ', '.join(f"{stage.name} {stage.busy:.1f}s" +
+                           (f" (+{stage.blocked:.1f}s backpressure)" if stage.blocked >= 0.05 else '')
+                           for stage in [self.source] + self.stages)
+        return f"Pipeline: {self.wall:.1f}s wall; busy {stages}"
+
+
+class PartialOutput:
+    """Appends each finished term to a JSON-lines file as soon as it is ranked.
+
+    Lines are ``{"term": ..., "variant": ..., "result": {...}}`` and are
+    flushed one by one, so a long run can be followed (or salvaged) before
+    the final output is written.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, 'w', encoding='utf-8')
+        self.written = 0
+
+    def write(self, term: str, variant: Optional[Dict], record):
+        line = {'term': term, 'variant': variant['name'] if variant else None, 'result': record}
+        self._file.write(json.dumps(line, default=result_default) + '\n')
+        self._file.flush()
+        self.written += 1
+
+    def close(self, remove: bool = False):
+        self._file.close()
+        if remove:
+            os.remove(self.path)
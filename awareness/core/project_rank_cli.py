@@ -1,7 +1,8 @@
 import argparse
-import json
 from project_rank_tracker import ProjectRankTracker
 from search_terms import SearchTermsLoader
+from awareness.core.records import result_default
+from awareness.utils.serialization import dump
 
 def main():
     parser = argparse.ArgumentParser(description='Google Search Project Ranking Tracker')
@@ -52,8 +53,7 @@ def main():
     
     # Save results if output file specified
     if results and args.output:
-        with open(args.output, 'w') as f:
-            json.dump(results, f, indent=4)
+        dump(results, args.output, default=result_default)
         print(f"\nResults saved to {args.output}")
 
 if __name__ == "__main__":
@@ -1,92 +1,143 @@
 # project_rank_tracker.py
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional, Tuple, Union
 from datetime import datetime, date
 import requests
 import json
 import time
+import os
 from awareness.core.search_tracker import GoogleSearchTracker
+from awareness.core.providers import SearchProvider
+from awareness.core.matcher import ProjectMatcher
+from awareness.core.records import (
+    SearchItem, ProjectMatch, RankResult, UnchangedResult, is_unchanged, plain_results
+)
+from awareness.core.fingerprints import result_fingerprint
+from awareness.core.variants import expand, fetch_key, put_result
+from awareness.utils.profiling import span
+
+PAGE_BUCKETS = tuple(range(1, 11))
+MATCHER_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1)
 
 class ProjectRankTracker(GoogleSearchTracker):
-    def __init__(self, api_key: str, search_engine_id: str, projects: List[str]):
-        super().__init__(api_key, search_engine_id)
-        self.projects = projects
+    metrics_label = 'rank'
+
+    def __init__(self, api_key: str, search_engine_id: str, projects: List[Union[str, Dict]],
+                 provider: Optional[SearchProvider] = None):
+        super().__init__(api_key, search_engine_id, provider)
+        # Projects are plain names or rule dicts (see awareness.core.matcher)
+        self.matcher = ProjectMatcher.from_projects(projects)
+        self.projects = self.matcher.projects
+        # Optional awareness.utils.text_index.TextIndex fed with every fetched item
+        self.text_index = None
+        # Optional awareness.core.discovery.CompetitorDiscovery fed with every fetched page
+        self.discovery = None
+        # Optional awareness.core.fingerprints.FingerprintStore for change detection
+        self.fingerprints = None
 
     def _get_search_results(self, term: str, num_results: int = 100) -> Dict:
         """Get detailed search results for a term with pagination"""
-        url = "https://www.googleapis.com/customsearch/v1"
+        found = set()
+
+        def all_found(page_items: List[Dict], start_rank: int) -> bool:
+            found.update(project for _, project, _ in self._match_items(page_items, start_rank))
+            return len(found) == len(self.projects)
+
+        return self._fetch_pages(term, num_results, all_found)
+
+    def _fetch_pages(self, term: str, num_results: int, page_done: Callable[[List[Dict], int], bool]) -> Dict:
+        """Fetch result pages until ``num_results`` items are collected or ``page_done`` returns True.
+
+        ``page_done`` receives each new page of items and the rank of its first
+        item, so callers only match the new page rather than rescanning.
+        """
         all_items = []
         total_results = 0
         
-        pages_needed = (num_results + 9) // 10
-        pages_needed = min(pages_needed, 10)
+        pages = self.provider.pages(num_results)
+        pages_needed = len(pages)
         
-        for page in range(pages_needed):
-            start_index = (page * 10) + 1
-            
-            # Calculate remaining items needed
-            remaining = num_results - len(all_items)
-            params = {
-                'key': self.api_key,
-                'cx': self.search_engine_id,
-                'q': term,
-                'num': min(10, remaining),  # Request only what we need
-                'start': start_index
-            }
+        pages_fetched = 0
+        for page, (start_index, page_size) in enumerate(pages):
+            # Request only what we need
+            params = self.provider.page_params(term, start_index, page_size)
             
-            response = requests.get(url, params=params)
+            response = self._api_get(self.provider.url, params)
+            pages_fetched += 1
             if response.status_code != 200:
                 break
                 
-            data = response.json()
-            if 'items' in data:
-                all_items.extend(data['items'])
-                if total_results == 0 and 'searchInformation' in data:
-                    total_results = int(data['searchInformation']['totalResults'])
+            data = self._parse(response)
+            # Keep only the fields used for matching; pagemap, metatags etc. are dropped here
+            page_items = [SearchItem.from_api(item) for item in self.provider.items(data)]
+            if not page_items:
+                # Past the last page of results
+                break
+            all_items.extend(page_items)
+            if not total_results:
+                total_results = self.provider.total_results(data)
+            if self.discovery is not None:
+                self.discovery.feed(page_items, len(all_items) - len(page_items) + 1)
             
             # Check if we found all projects or reached the requested number
-            temp_data = {'items': all_items}
-            project_ranks = self._find_project_ranks(temp_data)
-            if all(rank is not None for rank in project_ranks.values()) or len(all_items) >= num_results:
+            with span('match', page=page):
+                done = page_done(page_items, len(all_items) - len(page_items) + 1)
+            if done:
+                self.metrics.counter('awareness_early_exit_pages_saved_total',
+                                     'Pages skipped because every project was found').inc(pages_needed - pages_fetched)
                 break
-                
-            time.sleep(1)
+            if len(all_items) >= num_results:
+                break
+
+        self.metrics.histogram('awareness_pages_per_term', 'API pages fetched per term',
+                               buckets=PAGE_BUCKETS).observe(pages_fetched)
         
         # Create a new dictionary with limited results
         return {
             'items': all_items[:num_results],  # Slice before returning
             'searchInformation': {
-                'totalResults': str(total_results)
+                'totalResults': str(total_results) if total_results is not None else None
             }
         }
 
+    def _index_items(self, term: str, search_data: Dict, timestamp: str, source: Optional[str] = None):
+        """Add a term's fetched titles, snippets and links to the full-text index, if one is set"""
+        if self.text_index is not None and search_data.get('items'):
+            with span('index', term=term):
+                self.text_index.add(term, timestamp, search_data['items'], source or self._source())
+
+    def _match_items(self, items: List[Dict], start_rank: int = 1,
+                     matcher: Optional[ProjectMatcher] = None) -> List[Tuple[int, str, str]]:
+        """Match result items against the project rules, recording matcher metrics"""
+        started = time.perf_counter()
+        matches = list((matcher or self.matcher).scan(items, start_rank))
+        self.metrics.counter('awareness_items_scanned_total',
+                             'Search result items scanned by the project matcher').inc(len(items))
+        self.metrics.histogram('awareness_matcher_seconds', 'Time spent matching projects in results',
+                               buckets=MATCHER_BUCKETS).observe(time.perf_counter() - started)
+        return matches
+
+    def _find_project_matches(self, search_data: Dict,
+                              matcher: Optional[ProjectMatcher] = None) -> Dict[str, List[Dict]]:
+        """Find every position of each project, marked as owned or mentioned"""
+        matcher = matcher or self.matcher
+        project_matches = {project: [] for project in matcher.projects}
+        for rank, project, kind in self._match_items(search_data.get('items', []), matcher=matcher):
+            project_matches[project].append(ProjectMatch(rank, kind))
+        return project_matches
+
     def _find_project_ranks(self, search_data: Dict) -> Dict[str, Optional[int]]:
         """Find the ranking position of each project in search results"""
         project_ranks = {project: None for project in self.projects}
-        
-        if 'items' not in search_data:
-            return project_ranks
-
-        for idx, item in enumerate(search_data['items']):
-            content = (
-                item.get('title', '') + ' ' + 
-                item.get('snippet', '') + ' ' +
-                item.get('link', '')
-            ).lower()
-            
-            for project in self.projects:
-                if project.lower() in content and project_ranks[project] is None:
-                    # Calculate actual rank based on item's position
-                    actual_rank = idx + 1
-                    project_ranks[project] = actual_rank
-                    
+        for rank, project, _ in self._match_items(search_data.get('items', [])):
+            if project_ranks[project] is None:
+                project_ranks[project] = rank
         return project_ranks
 
-    def search_project_ranks(self, terms: List[str], num_results: int = 100, show_progress: bool = True) -> Dict:
-        """Search for terms and track project rankings"""
-        results = {}
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-        total_queries = len(terms) * 10  # Maximum possible API calls
+    def _confirm_cost(self, terms: List[str], show_progress: bool, variants: int = 1) -> bool:
+        """Warn when a run may exceed the free tier; False if the user declines"""
+        if not self.provider.billed:
+            return True
+        total_queries = len(terms) * variants * 10  # Maximum possible API calls
         remaining_free = max(0, 100 - self.daily_usage['count'])
         
         if total_queries > remaining_free:
@@ -95,34 +146,291 @@ class ProjectRankTracker(GoogleSearchTracker):
             print(f"Free queries remaining today: {remaining_free}")
             print(f"Maximum potential cost: ${paid_queries * 0.005:.2f}")
             # Skip confirmation in test mode
-            if show_progress and input("Continue? (y/n): ").lower() != 'y':
-                return None
+            if show_progress and self.interactive and input("Continue? (y/n): ").lower() != 'y':
+                return False
+        return True
+
+    def _rank_record(self, search_data: Dict, timestamp: str,
+                     matcher: Optional[ProjectMatcher] = None) -> Dict:
+        """Build the output record for one term"""
+        with span('match'):
+            project_matches = self._find_project_matches(search_data, matcher)
+        project_ranks = {project: matches[0].rank if matches else None
+                         for project, matches in project_matches.items()}
+        total_results = search_data['searchInformation']['totalResults']
+        return RankResult(int(total_results) if total_results is not None else None,
+                          project_ranks, project_matches, timestamp)
+
+    def _check_unchanged(self, term: str, search_data: Dict, record: Dict, namespace: Optional[str] = None):
+        """Replace the record with an UnchangedResult if its links and ranks match the previous run"""
+        if self.fingerprints is None:
+            return record
+        fingerprint = result_fingerprint(search_data.get('items', []), record['project_rankings'])
+        since = self.fingerprints.check(namespace or self._source(), term, fingerprint, record['timestamp'])
+        if since is None:
+            return record
+        self.metrics.counter('awareness_unchanged_terms_total',
+                             'Terms whose results matched the previous run').inc()
+        return UnchangedResult(since, fingerprint, record['timestamp'])
+
+    def _print_record(self, term: str, record: Dict, heading: Optional[str] = None):
+        if is_unchanged(record):
+            self.console.event('term_unchanged', f"\n{heading or term}: unchanged since {record['unchanged_since']}",
+                               term=term, unchanged_since=record['unchanged_since'])
+            return
+        total = f"{record['total_results']:,}" if record['total_results'] is not None else "not reported"
+        lines = [f"\n{heading or term}", f"Total results: {total}"]
+        for project, rank in record['project_rankings'].items():
+            rank_str = f"Rank #{rank}" if rank else "Not found in first 100 results"
+            lines.append(f"{project}: {rank_str}")
+        lines.append("-" * 40)
+        self.console.event('term_result', '\n'.join(lines), term=term,
+                           total_results=record['total_results'],
+                           project_rankings=record['project_rankings'])
+
+    def search_project_ranks(self, terms: List[str], num_results: int = 100, show_progress: bool = True,
+                             variants: Optional[List[Dict]] = None) -> Dict:
+        """Search for terms and track project rankings.
+
+        With ``variants`` every term is ranked once per locale variant and
+        results are keyed by term, then variant name.
+        """
+        results = {}
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+        if not self._confirm_cost(terms, show_progress, len(variants or [None])):
+            return None
+        self._begin_run()
+
+        # Variants that send identical requests (e.g. ones a provider ignores) share one fetch
+        shared, current = {}, None
+        for term, variant in expand(terms, variants):
+            if term != current:
+                shared, current = {}, term
+            self.variant = variant
+            label = self._label(term)
+            key = fetch_key(self.provider, term, variant)
+            if key in shared:
+                put_result(results, term, variant, shared[key])
+                continue
+            try:
+                with span('term', category='term', term=label):
+                    search_data = self._get_search_results(term, num_results)
+                    self._index_items(term, search_data, timestamp)
+                    shared[key] = self._check_unchanged(term, search_data, self._rank_record(search_data, timestamp))
+                    put_result(results, term, variant, shared[key])
+
+                    pages_fetched = (len(search_data['items']) + 9) // 10
+                    self._record_usage(pages_fetched)
+
+                    if show_progress:
+                        self._print_record(term, shared[key], heading=label)
+
+            except Exception as e:
+                self.console.event('term_error', f"Error processing '{label}': {str(e)}",
+                                   level='error', term=term, error=str(e))
+        self.variant = None
+
+        self._end_run(show_progress)
+        self.console.flush()
+        return plain_results(results)
+
+    def _fetch_terms(self, terms: List[str], num_results: int, variants: Optional[List[Dict]]):
+        """Yield (term, variant, key, label, source, search_data) per term and variant, fetching as it goes.
+
+        Variants that share an earlier fetch of the same term yield None as
+        search_data. Fetching and usage accounting stay on the calling thread.
+        """
+        fetched, current = set(), None
+        for term, variant in expand(terms, variants):
+            if term != current:
+                fetched, current = set(), term
+            self.variant = variant
+            label, source = self._label(term), self._source()
+            key = fetch_key(self.provider, term, variant)
+            if key in fetched:
+                yield term, variant, key, label, source, None
+                continue
+            try:
+                with span('fetch_term', category='term', term=label):
+                    search_data = self._get_search_results(term, num_results)
+                self._record_usage((len(search_data['items']) + 9) // 10)
+            except Exception as e:
+                self.console.event('term_error', f"Error processing '{label}': {str(e)}",
+                                   level='error', term=term, error=str(e))
+                continue
+            fetched.add(key)
+            yield term, variant, key, label, source, search_data
+        self.variant = None
+
+    def pipeline_project_ranks(self, terms: List[str], num_results: int = 100, show_progress: bool = True,
+                               variants: Optional[List[Dict]] = None, persist: Optional[Callable] = None,
+                               render: Optional[Callable] = None, depth: int = 16) -> Dict:
+        """Like search_project_ranks, but fetch, match, persist and render overlap.
+
+        Fetching runs on the calling thread; matching, persistence (the text
+        index and ``persist(term, variant, record)``) and the optional
+        ``render(term, variant, record)`` each run on their own thread behind
+        a queue of at most ``depth`` terms.
+        """
+        from awareness.core.pipeline import Pipeline
+        results = {}
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+        if not self._confirm_cost(terms, show_progress, len(variants or [None])):
+            return None
+        self._begin_run()
+        shared = {}
+
+        def match(item):
+            term, variant, key, label, source, search_data = item
+            if search_data is None:
+                record = shared[key]
+            else:
+                with span('term', category='term', term=label):
+                    record = self._check_unchanged(term, search_data, self._rank_record(search_data, timestamp),
+                                                   namespace=source)
+                shared[key] = record
+            put_result(results, term, variant, record)
+            if show_progress:
+                self._print_record(term, record, heading=label)
+            return term, variant, label, source, search_data, record
+
+        def store(item):
+            term, variant, _, source, search_data, record = item
+            if search_data is not None:
+                self._index_items(term, search_data, timestamp, source)
+            if persist is not None:
+                with span('write_partial', term=term):
+                    persist(term, variant, record)
+            # Rendering only needs the record, not the fetched items
+            return term, variant, record
+
+        def draw(item):
+            with span('render_chart', term=item[0]):
+                render(*item)
+
+        def failed(stage, item, error):
+            # Every stage's item starts with the term
+            self.console.event('term_error', f"Error processing '{item[0]}' ({stage}): {str(error)}",
+                               level='error', term=item[0], stage=stage, error=str(error))
+
+        pipeline = Pipeline(depth, on_error=failed).add('match', match).add('persist', store)
+        if render is not None:
+            pipeline.add('render', draw)
+        pipeline.run(self._fetch_terms(terms, num_results, variants))
+
+        self._end_run(show_progress)
+        if show_progress:
+            self.console.event('pipeline', pipeline.describe(), **pipeline.summary())
+        self.console.flush()
+        return plain_results(results)
+
+
+class ProjectGroup:
+    """A named set of projects evaluated against shared search results"""
+
+    def __init__(self, name: str, projects: List[Union[str, Dict]], num_results: Optional[int] = None):
+        self.name = name
+        self.matcher = ProjectMatcher.from_projects(projects)
+        self.num_results = num_results
+
+
+class GroupRankTracker(ProjectRankTracker):
+    """Ranks several project groups while fetching each term only once.
+
+    Each term is fetched as deep as the deepest group that still has unfound
+    projects, and every group is evaluated against the same items.
+    """
+
+    def __init__(self, api_key: str, search_engine_id: str, groups: Dict[str, Union[List, Dict]],
+                 provider: Optional[SearchProvider] = None):
+        self.groups = []
+        for name, spec in groups.items():
+            if isinstance(spec, dict):
+                self.groups.append(ProjectGroup(name, spec.get('projects') or [], spec.get('num_results')))
+            else:
+                self.groups.append(ProjectGroup(name, spec))
+        all_projects = []
+        for group in self.groups:
+            all_projects.extend(group.matcher.rules)
+        super().__init__(api_key, search_engine_id, all_projects, provider)
+
+    def search_group_ranks(self, terms: List[str], num_results: int = 100,
+                           show_progress: bool = True) -> Optional[Dict[str, Dict]]:
+        """Search for terms once and return rankings keyed by group, then term"""
+        results = {group.name: {} for group in self.groups}
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+        if not self._confirm_cost(terms, show_progress):
+            return None
+        self._begin_run()
+
+        depths = {group.name: min(group.num_results or num_results, 100) for group in self.groups}
+        deepest = max(depths.values(), default=0)
 
         for term in terms:
             try:
-                search_data = self._get_search_results(term, num_results)
-                project_ranks = self._find_project_ranks(search_data)
-                total_results = int(search_data['searchInformation']['totalResults'])
-
-                results[term] = {
-                    'total_results': total_results,
-                    'project_rankings': project_ranks,
-                    'timestamp': timestamp
-                }
-
-                pages_fetched = (len(search_data['items']) + 9) // 10
-                self.daily_usage['count'] += pages_fetched
-                self._save_daily_usage()
-
-                if show_progress:
-                    print(f"\n{term}")
-                    print(f"Total results: {total_results:,}")
-                    for project, rank in project_ranks.items():
-                        rank_str = f"Rank #{rank}" if rank else "Not found in first 100 results"
-                        print(f"{project}: {rank_str}")
-                    print("-" * 40)
+                with span('term', category='term', term=term):
+                    unresolved = {group.name: set(group.matcher.projects) for group in self.groups}
+
+                    def groups_resolved(page_items: List[Dict], start_rank: int) -> bool:
+                        for group in self.groups:
+                            missing = unresolved[group.name]
+                            if not missing or start_rank > depths[group.name]:
+                                continue
+                            visible = page_items[:depths[group.name] - start_rank + 1]
+                            for _, project, _ in self._match_items(visible, start_rank, group.matcher):
+                                missing.discard(project)
+                        fetched = start_rank + len(page_items) - 1
+                        return all(not unresolved[name] or fetched >= depths[name] for name in unresolved)
+
+                    search_data = self._fetch_pages(term, deepest, groups_resolved)
+                    self._index_items(term, search_data, timestamp)
+                    pages_fetched = (len(search_data['items']) + 9) // 10
+                    self._record_usage(pages_fetched)
+
+                    for group in self.groups:
+                        group_data = dict(search_data, items=search_data['items'][:depths[group.name]])
+                        record = self._check_unchanged(term, group_data,
+                                                       self._rank_record(group_data, timestamp, group.matcher),
+                                                       f"{self.provider.name}:{group.name}")
+                        results[group.name][term] = record
+                        if show_progress:
+                            self._print_record(term, record, heading=f"[{group.name}] {term}")
 
             except Exception as e:
-                print(f"Error processing '{term}': {str(e)}")
+                self.console.event('term_error', f"Error processing '{term}': {str(e)}",
+                                   level='error', term=term, error=str(e))
+
+        self._end_run(show_progress)
+        self.console.flush()
+        return plain_results(results)
+
+
+def group_output_path(output: str, group: str, placeholder: str = 'group') -> str:
+    """Output file for one group (or provider): fills a {group} placeholder or suffixes the file name"""
+    if '{' + placeholder + '}' in output:
+        return output.format(**{placeholder: group})
+    root, ext = os.path.splitext(output)
+    return f"{root}_{group}{ext or '.json'}"
+
+
+def merge_group_results(results: Dict[str, Dict]) -> Dict[str, Dict]:
+    """One record per term with every group's project ranks, for history and rollups.
 
-        return results
\ No newline at end of file
+    Groups share each term's fetch, so their totals and timestamps agree.
+    Unchanged records add nothing; a project in several groups keeps the
+    first rank found.
+    """
+    merged: Dict[str, Dict] = {}
+    for group_results in results.values():
+        for term, record in group_results.items():
+            if 'project_rankings' not in record:
+                continue
+            entry = merged.setdefault(term, {'total_results': record['total_results'], 'project_rankings': {},
+                                             'timestamp': record['timestamp']})
+            for project, rank in record['project_rankings'].items():
+                if entry['project_rankings'].get(project) is None:
+                    entry['project_rankings'][project] = rank
+    return merged
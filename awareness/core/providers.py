@@ -0,0 +1,151 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from awareness.core.transport import COUNT_FIELDS, RESULT_FIELDS
+
+PROVIDERS = ('google', 'searxng')
+
+
+class SearchProvider:
+    """How to query one search backend and read its responses.
+
+    Subclasses build request parameters, define pagination and normalize
+    items to the title/snippet/link fields the trackers match on. Each
+    provider gets its own rate controller, keyed by ``name``.
+    """
+    name = 'provider'
+    url = ''
+    page_size = 10
+    max_results = 100
+    # Billed providers count against the daily quota ledger and ask before paid runs
+    billed = False
+
+    def count_params(self, term: str) -> Dict:
+        """Parameters for a request that only needs the total result count"""
+        raise NotImplementedError
+
+    def page_params(self, term: str, start: int, num: int) -> Dict:
+        """Parameters for the page of ``num`` results beginning at rank ``start``"""
+        raise NotImplementedError
+
+    def pages(self, num_results: int) -> List[Tuple[int, int]]:
+        """(start rank, page size) of each page needed for ``num_results`` results"""
+        num_results = min(num_results, self.max_results)
+        return [(start, min(self.page_size, num_results - start + 1))
+                for start in range(1, num_results + 1, self.page_size)]
+
+    def total_results(self, data: Dict) -> Optional[int]:
+        """Estimated total result count, or None if the backend did not report one"""
+        raise NotImplementedError
+
+    def items(self, data: Dict) -> List[Dict]:
+        """Result items as dicts with title, snippet and link"""
+        raise NotImplementedError
+
+    def variant_params(self, variant: Dict) -> Dict:
+        """Request parameters for a locale variant (gl/hl/lr); parameters a backend lacks are dropped"""
+        return {}
+
+
+class GoogleProvider(SearchProvider):
+    """Google Custom Search JSON API (customsearch/v1)"""
+    name = 'google'
+    url = "https://www.googleapis.com/customsearch/v1"
+    billed = True
+
+    def __init__(self, api_key: str, search_engine_id: str):
+        self.api_key = api_key
+        self.search_engine_id = search_engine_id
+
+    def _params(self, term: str) -> Dict:
+        return {'key': self.api_key, 'cx': self.search_engine_id, 'q': term}
+
+    def count_params(self, term: str) -> Dict:
+        return dict(self._params(term), num=1, fields=COUNT_FIELDS)
+
+    def page_params(self, term: str, start: int, num: int) -> Dict:
+        return dict(self._params(term), num=num, start=start, fields=RESULT_FIELDS)
+
+    def total_results(self, data: Dict) -> int:
+        return int(data.get('searchInformation', {}).get('totalResults', 0))
+
+    def variant_params(self, variant: Dict) -> Dict:
+        return {key: variant[key] for key in ('gl', 'hl', 'lr') if variant.get(key)}
+
+    def items(self, data: Dict) -> List[Dict]:
+        return data.get('items', [])
+
+
+class SearxngProvider(SearchProvider):
+    """A self-hosted SearXNG metasearch instance with the JSON format enabled.
+
+    SearXNG has no page size parameter: a page holds whatever its engines
+    return. Pages are requested by number, and the trackers stop once they
+    have collected enough items or a page comes back empty.
+    """
+    name = 'searxng'
+
+    def __init__(self, url: str):
+        self.url = url.rstrip('/')
+        if not self.url.endswith('/search'):
+            self.url += '/search'
+
+    def count_params(self, term: str) -> Dict:
+        return {'q': term, 'format': 'json'}
+
+    def pages(self, num_results: int) -> List[Tuple[int, int]]:
+        # Page lengths are unknown up front, so plan every page up to max_results
+        return super().pages(self.max_results)
+
+    def page_params(self, term: str, start: int, num: int) -> Dict:
+        # ``start`` comes from pages(), so this is the page's position in the plan
+        return {'q': term, 'format': 'json', 'pageno': (start - 1) // self.page_size + 1}
+
+    def total_results(self, data: Dict) -> Optional[int]:
+        # Engines often don't report a total, and SearXNG then sends 0
+        return int(data['number_of_results']) if data.get('number_of_results') else None
+
+    def variant_params(self, variant: Dict) -> Dict:
+        # SearXNG has a single language setting, optionally with a region (en-US); lr has no equivalent
+        if not variant.get('hl'):
+            return {}
+        language = variant['hl']
+        if variant.get('gl'):
+            language += '-' + variant['gl'].upper()
+        return {'language': language}
+
+    def items(self, data: Dict) -> List[Dict]:
+        return [{'title': r.get('title', ''), 'snippet': r.get('content', ''), 'link': r.get('url', '')}
+                for r in data.get('results', [])]
+
+
+def build_providers(names: List[str], api_key: Optional[str] = None, search_engine_id: Optional[str] = None,
+                    searxng_url: Optional[str] = None) -> List[SearchProvider]:
+    """Instantiate providers by name, checking their required settings"""
+    providers = []
+    for name in dict.fromkeys(names):
+        if name == 'google':
+            if not (api_key and search_engine_id):
+                raise ValueError("The google provider requires --key and --cx")
+            providers.append(GoogleProvider(api_key, search_engine_id))
+        elif name == 'searxng':
+            if not searxng_url:
+                raise ValueError("The searxng provider requires --searxng-url")
+            providers.append(SearxngProvider(searxng_url))
+        else:
+            raise ValueError(f"Unknown provider: {name}")
+    return providers
+
+
+def fan_out(trackers: Dict[str, object], call: Callable[[object], Dict]) -> Dict[str, Dict]:
+    """Run ``call`` on each provider's tracker concurrently; returns results keyed by provider.
+
+    Each tracker paces itself with its own rate controller, so providers do
+    not wait on each other's limits.
+    """
+    if len(trackers) == 1:
+        name, tracker = next(iter(trackers.items()))
+        return {name: call(tracker)}
+    with ThreadPoolExecutor(max_workers=len(trackers), thread_name_prefix='provider') as pool:
+        futures = {name: pool.submit(call, tracker) for name, tracker in trackers.items()}
+        return {name: future.result() for name, future in futures.items()}
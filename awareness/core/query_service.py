@@ -0,0 +1,267 @@
+import glob
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from awareness.core.records import result_default
+from awareness.core.variants import flatten_variants
+from awareness.utils.cache import LRUCache, SingleFlight
+from awareness.utils.metrics import get_registry
+from awareness.utils.serialization import RESULT_PATTERNS, load
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class QueryError(ValueError):
+    """Raised for invalid queries; carries the HTTP status to return"""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+class ResultStore:
+    """Read-only index over the JSON outputs of past search/rank runs.
+
+    Files are re-parsed only when their modification time changes, and the
+    directory is rescanned at most every ``scan_interval`` seconds. Variant
+    matrix results are indexed per pair as ``term [variant]``, and an
+    unchanged record counts as a new observation of its ``since`` ranking.
+    """
+
+    def __init__(self, directory: str, scan_interval: float = 2.0):
+        self.directory = directory
+        self.scan_interval = scan_interval
+        self.generation = 0
+        self._files: Dict[str, tuple] = {}
+        self._rankings: Dict[str, List[Dict]] = {}
+        self._counts: Dict[str, List[Dict]] = {}
+        self._live: Dict[str, Dict] = {}
+        self._last_scan = None
+        self._lock = threading.Lock()
+
+    def refresh(self, force: bool = False):
+        """Pick up new or changed result files"""
+        with self._lock:
+            now = time.monotonic()
+            if not force and self._last_scan is not None and now - self._last_scan < self.scan_interval:
+                return
+            self._last_scan = now
+            paths = [p for pattern in RESULT_PATTERNS for p in glob.glob(os.path.join(self.directory, pattern))
+                     if not p.endswith('api_usage.json')]
+            changed = set(self._files) - set(paths)
+            for path in changed:
+                del self._files[path]
+            for path in paths:
+                try:
+                    mtime = os.stat(path).st_mtime
+                    if path in self._files and self._files[path][0] == mtime:
+                        continue
+                    self._files[path] = (mtime, load(path))
+                    changed.add(path)
+                except (OSError, ValueError):
+                    continue
+            if changed:
+                self._rebuild()
+
+    def _rebuild(self):
+        rankings: Dict[str, List[Dict]] = {}
+        counts: Dict[str, List[Dict]] = {}
+        unchanged: Dict[tuple, Dict] = {}
+        for path, (_, data) in self._files.items():
+            if not isinstance(data, dict):
+                continue
+            for term, info in flatten_variants(data).items():
+                # Carried-forward records are copies of an earlier observation
+                if not isinstance(info, dict) or 'timestamp' not in info or info.get('carried_forward'):
+                    continue
+                record = dict(info, source=os.path.basename(path))
+                if 'project_rankings' in info:
+                    rankings.setdefault(term, []).append(record)
+                elif 'count' in info:
+                    counts.setdefault(term, []).append(record)
+                elif 'unchanged_since' in info:
+                    unchanged[(term, info['timestamp'])] = record
+        # An unchanged term was re-queried and ranked exactly as in its 'since' run
+        for (term, timestamp), record in unchanged.items():
+            since = [r for r in rankings.get(term, []) if r['timestamp'] == record['unchanged_since']]
+            if since:
+                rankings[term].append(dict(since[0], timestamp=timestamp, source=record['source'],
+                                           unchanged_since=record['unchanged_since']))
+        for term, record in self._live.items():
+            rankings.setdefault(term, []).append(record)
+        for series in list(rankings.values()) + list(counts.values()):
+            series.sort(key=lambda r: r['timestamp'])
+        self._rankings, self._counts = rankings, counts
+        self.generation += 1
+
+    def add_live(self, term: str, record: Dict):
+        """Add a freshly fetched ranking that is not (yet) in any file"""
+        with self._lock:
+            self._live[term] = dict(record, source='live')
+            self._rebuild()
+
+    def terms(self) -> Dict[str, List[str]]:
+        self.refresh()
+        return {'rankings': sorted(self._rankings), 'counts': sorted(self._counts)}
+
+    def ranking_history(self, term: str) -> List[Dict]:
+        self.refresh()
+        return self._rankings.get(term, [])
+
+    def count_history(self, term: str) -> List[Dict]:
+        self.refresh()
+        return self._counts.get(term, [])
+
+
+class QueryService:
+    """Rank/count lookups over stored results with an LRU and coalesced refreshes"""
+
+    def __init__(self, store: ResultStore, tracker=None, cache_size: int = 1024,
+                 max_age: float = 3600.0, num_results: int = 100):
+        self.store = store
+        self.tracker = tracker
+        self.cache = LRUCache(cache_size, name='query')
+        self.max_age = max_age
+        self.num_results = num_results
+        self.flights = SingleFlight()
+        self.upstream_fetches = 0
+        self._fetch_lock = threading.Lock()
+
+    def _cached(self, key, compute):
+        # The store generation is part of the key so new result files invalidate old answers
+        self.store.refresh()
+        key = (self.store.generation,) + key
+        value = self.cache.get(key)
+        if value is None:
+            value = compute()
+            self.cache.put(key, value)
+        return value
+
+    def rank(self, term: str, project: str, refresh: bool = False) -> Dict:
+        """Latest known rank of a project for a term"""
+        if refresh:
+            self.refresh_term(term)
+
+        def compute():
+            history = self.store.ranking_history(term)
+            if not history:
+                raise QueryError(f"No rankings stored for term '{term}'", status=404)
+            latest = history[-1]
+            if project not in latest['project_rankings']:
+                raise QueryError(f"Project '{project}' is not tracked for term '{term}'", status=404)
+            return {
+                'term': term,
+                'project': project,
+                'rank': latest['project_rankings'][project],
+                'total_results': latest.get('total_results'),
+                'timestamp': latest['timestamp'],
+                'source': latest['source']
+            }
+        return self._cached(('rank', term, project), compute)
+
+    def history(self, term: str, project: Optional[str] = None) -> List[Dict]:
+        """All stored rankings for a term, optionally narrowed to one project"""
+        def compute():
+            history = self.store.ranking_history(term)
+            if project is None:
+                return history
+            return [{'timestamp': r['timestamp'], 'rank': r['project_rankings'].get(project),
+                     'total_results': r.get('total_results')}
+                    for r in history if project in r['project_rankings']]
+        return self._cached(('history', term, project), compute)
+
+    def count(self, term: str) -> Dict:
+        """Latest stored result count for a term"""
+        def compute():
+            history = self.store.count_history(term)
+            if not history:
+                raise QueryError(f"No result counts stored for term '{term}'", status=404)
+            return {'term': term, 'count': history[-1]['count'], 'timestamp': history[-1]['timestamp']}
+        return self._cached(('count', term), compute)
+
+    def _is_fresh(self, term: str) -> bool:
+        history = self.store.ranking_history(term)
+        if not history:
+            return False
+        latest = datetime.strptime(history[-1]['timestamp'], TIMESTAMP_FORMAT)
+        return (datetime.now() - latest).total_seconds() < self.max_age
+
+    def refresh_term(self, term: str) -> bool:
+        """Fetch a term upstream unless stored data is fresh or a fetch is already running.
+
+        Returns True if this call or a concurrent one fetched from the API.
+        """
+        if self.tracker is None:
+            raise QueryError("Refresh requires --key, --cx and --projects", status=400)
+        if self._is_fresh(term):
+            return False
+
+        def fetch():
+            # A request that was queued behind the previous flight may find fresh data now
+            if self._is_fresh(term):
+                return False
+            with self._fetch_lock:
+                results = self.tracker.search_project_ranks([term], self.num_results, show_progress=False)
+            self.upstream_fetches += 1
+            if results and term in results:
+                self.store.add_live(term, results[term])
+            return True
+
+        fetched, shared = self.flights.do(('rank', term), fetch)
+        if shared:
+            get_registry().counter('awareness_coalesced_requests_total',
+                                   'Refresh requests served by an in-flight fetch').inc()
+        return fetched
+
+
+def make_server(service: QueryService, port: int, host: str = '') -> ThreadingHTTPServer:
+    """Build the HTTP server for the query API"""
+
+    class QueryHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {k: v[0] for k, v in parse_qs(url.query).items()}
+            try:
+                if url.path == '/health':
+                    body = {'status': 'ok'}
+                elif url.path == '/terms':
+                    body = service.store.terms()
+                elif url.path == '/rank':
+                    body = service.rank(self._require(params, 'term'), self._require(params, 'project'),
+                                        refresh=params.get('refresh') in ('1', 'true'))
+                elif url.path == '/history':
+                    body = service.history(self._require(params, 'term'), params.get('project'))
+                elif url.path == '/count':
+                    body = service.count(self._require(params, 'term'))
+                else:
+                    raise QueryError(f"Unknown endpoint: {url.path}", status=404)
+                self._send(200, body)
+            except QueryError as e:
+                self._send(e.status, {'error': str(e)})
+            except Exception as e:
+                self._send(500, {'error': str(e)})
+
+        @staticmethod
+        def _require(params, name):
+            if not params.get(name):
+                raise QueryError(f"Missing '{name}' parameter")
+            return params[name]
+
+        def _send(self, status, body):
+            payload = json.dumps(body, default=result_default).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ThreadingHTTPServer((host, port), QueryHandler)
@@ -0,0 +1,151 @@
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+
+class RateController:
+    """Token bucket whose refill rate follows an AIMD policy.
+
+    Fast successful responses raise the rate additively, while throttling
+    (HTTP 429/5xx) and slow responses cut it multiplicatively. The rate always
+    stays between ``min_rate`` and ``max_rate`` requests per second.
+    """
+
+    def __init__(self, initial_rate: float = 1.0, min_rate: float = 0.1, max_rate: float = 1.5,
+                 increase: float = 0.1, decrease: float = 0.5, latency_target: float = 2.0,
+                 burst: float = 1.0):
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[Dict], None]] = []
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_target = latency_target
+        self.burst = burst
+        self.rate = self._clamp(initial_rate)
+        self._tokens = burst
+        self._last_refill = time.monotonic()
+        self.increases = 0
+        self.decreases = 0
+        self.throttled = 0
+        self.waited = 0.0
+
+    def _clamp(self, rate: float) -> float:
+        return max(self.min_rate, min(self.max_rate, rate))
+
+    def _refill(self, now: float):
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+
+    def configure(self, min_rate: Optional[float] = None, max_rate: Optional[float] = None,
+                  initial_rate: Optional[float] = None):
+        """Update the floor, ceiling or current rate; nothing changes if the bounds are invalid"""
+        with self._lock:
+            min_rate = self.min_rate if min_rate is None else min_rate
+            max_rate = self.max_rate if max_rate is None else max_rate
+            if min_rate <= 0:
+                raise ValueError("min_rate must be positive")
+            if min_rate > max_rate:
+                raise ValueError("min_rate must not exceed max_rate")
+            self.min_rate = min_rate
+            self.max_rate = max_rate
+            self.rate = self._clamp(initial_rate if initial_rate is not None else self.rate)
+
+    def add_listener(self, listener: Callable[[Dict], None]):
+        """Register a callback invoked with every rate adjustment"""
+        self._listeners.append(listener)
+
+    def acquire(self) -> float:
+        """Block until the bucket allows another request; returns the time waited"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            self.waited += wait
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def record(self, latency: float, status_code: int):
+        """Feed back the outcome of a request and adjust the rate"""
+        with self._lock:
+            previous = self.rate
+            if status_code == 429 or status_code >= 500:
+                self.throttled += 1
+                reason = 'throttled'
+                self.rate = self._clamp(self.rate * self.decrease)
+                # Drain the bucket so the next request waits a full interval
+                self._tokens = min(self._tokens, 0.0)
+            elif latency > self.latency_target:
+                reason = 'slow'
+                self.rate = self._clamp(self.rate * self.decrease)
+            elif status_code == 200:
+                reason = 'healthy'
+                self.rate = self._clamp(self.rate + self.increase)
+            else:
+                return
+            if self.rate > previous:
+                self.increases += 1
+            elif self.rate < previous:
+                self.decreases += 1
+            else:
+                return
+            event = {'rate': self.rate, 'previous_rate': previous, 'reason': reason}
+        for listener in list(self._listeners):
+            listener(event)
+
+    def stats(self) -> Dict:
+        """Snapshot of the controller state for instrumentation"""
+        with self._lock:
+            return {
+                'rate': self.rate,
+                'min_rate': self.min_rate,
+                'max_rate': self.max_rate,
+                'increases': self.increases,
+                'decreases': self.decreases,
+                'throttled': self.throttled,
+                'waited_seconds': self.waited
+            }
+
+
+_controllers: Dict[str, RateController] = {}
+_controllers_lock = threading.Lock()
+
+
+def get_rate_controller(name: str = 'google') -> RateController:
+    """Return the process-wide controller for an API, creating it on first use"""
+    with _controllers_lock:
+        controller = _controllers.get(name)
+        if controller is None:
+            controller = _controllers[name] = RateController()
+        return controller
+
+
+def _collect(read: Callable[[RateController], float]) -> Callable[[], Dict]:
+    def samples():
+        with _controllers_lock:
+            controllers = list(_controllers.items())
+        return {(name,): read(controller) for name, controller in controllers}
+    return samples
+
+
+def export_rate_metrics(registry):
+    """Publish the rate and adjustment counts of every controller, labelled by provider"""
+    registry.gauge('awareness_rate_limit_qps', 'Current adaptive request rate',
+                   ('provider',)).set_function(_collect(lambda c: c.rate))
+
+    def adjustments():
+        with _controllers_lock:
+            controllers = list(_controllers.items())
+        samples = {}
+        for name, controller in controllers:
+            samples[(name, 'increase')] = controller.increases
+            samples[(name, 'decrease')] = controller.decreases
+        return samples
+    registry.counter('awareness_rate_adjustments_total', 'Adaptive rate adjustments',
+                     ('provider', 'direction')).set_function(adjustments)
+    registry.counter('awareness_throttled_responses_total', 'Responses that signalled throttling',
+                     ('provider',)).set_function(_collect(lambda c: c.throttled))
+    registry.counter('awareness_rate_wait_seconds_total', 'Time spent waiting for the rate limiter',
+                     ('provider',)).set_function(_collect(lambda c: c.waited))
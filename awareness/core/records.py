@@ -0,0 +1,145 @@
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator
+
+ITEM_FIELDS = ('title', 'snippet', 'link')
+
+
+class SearchItem:
+    """A search result reduced to the fields used for matching.
+
+    Supports ``item.get(field, default)`` so code written for raw API item
+    dicts works unchanged.
+    """
+    __slots__ = ITEM_FIELDS
+
+    def __init__(self, title: str = '', snippet: str = '', link: str = ''):
+        self.title = title
+        self.snippet = snippet
+        self.link = link
+
+    @classmethod
+    def from_api(cls, item: Dict) -> 'SearchItem':
+        return cls(item.get('title', ''), item.get('snippet', ''), item.get('link', ''))
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default) if key in ITEM_FIELDS else default
+
+    def to_dict(self) -> Dict[str, str]:
+        return {'title': self.title, 'snippet': self.snippet, 'link': self.link}
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, SearchItem):
+            return self.to_dict() == other.to_dict()
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"SearchItem({self.title!r}, {self.snippet!r}, {self.link!r})"
+
+
+class _Record(Mapping):
+    """Read-only mapping over ``__slots__`` fields.
+
+    Records index like the dicts they replace and serialize to the same JSON
+    through ``result_default``. They stay inside a run: the trackers' public
+    methods return plain dicts (see ``plain_results``).
+    """
+    __slots__ = ()
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self.__slots__:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.__slots__)
+
+    def __len__(self) -> int:
+        return len(self.__slots__)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class CountResult(_Record):
+    """Result count for one term from ``search``"""
+    __slots__ = ('count', 'timestamp')
+
+    def __init__(self, count: int, timestamp: str):
+        self.count = count
+        self.timestamp = timestamp
+
+
+class ProjectMatch(_Record):
+    """One position at which a project appeared"""
+    __slots__ = ('rank', 'match')
+
+    def __init__(self, rank: int, match: str):
+        self.rank = rank
+        self.match = match
+
+
+class RankResult(_Record):
+    """Project rankings for one term from ``rank``"""
+    __slots__ = ('total_results', 'project_rankings', 'project_matches', 'timestamp')
+
+    def __init__(self, total_results: int, project_rankings: Dict, project_matches: Dict, timestamp: str):
+        self.total_results = total_results
+        self.project_rankings = project_rankings
+        self.project_matches = project_matches
+        self.timestamp = timestamp
+
+
+class UnchangedResult(_Record):
+    """Stand-in for a term whose links and ranks match the previous run.
+
+    Carries no rankings, so history, rollups and charts skip it; the query
+    service treats it as a repeat of the ``unchanged_since`` run's ranking.
+    """
+    __slots__ = ('unchanged_since', 'fingerprint', 'timestamp')
+
+    def __init__(self, unchanged_since: str, fingerprint: str, timestamp: str):
+        self.unchanged_since = unchanged_since
+        self.fingerprint = fingerprint
+        self.timestamp = timestamp
+
+
+def is_unchanged(record: Mapping) -> bool:
+    """Whether a record is an UnchangedResult marker rather than a ranking or count that mentions one"""
+    return 'unchanged_since' in record and 'project_rankings' not in record and 'count' not in record
+
+
+def counts_from_rankings(results: Dict[str, Any]) -> Dict[str, CountResult]:
+    """Search-compatible count records from rank results, which already carry totalResults"""
+    counts: Dict[str, Any] = {}
+    for term, record in results.items():
+        if is_unchanged(record):
+            counts[term] = record
+            continue
+        if record['total_results'] is None:
+            # The provider reported no estimate, so there is no count to write
+            continue
+        counts[term] = CountResult(record['total_results'], record['timestamp'])
+        if record.get('carried_forward'):
+            counts[term] = dict(counts[term], carried_forward=True, age_hours=record.get('age_hours'))
+    return counts
+
+
+def plain_results(results: Any) -> Any:
+    """Copy of tracker results with every record turned into a plain, mutable dict"""
+    if isinstance(results, (_Record, SearchItem)):
+        results = results.to_dict()
+    if isinstance(results, dict):
+        return {key: plain_results(value) for key, value in results.items()}
+    if isinstance(results, list):
+        return [plain_results(value) for value in results]
+    return results
+
+
+def result_default(obj: Any) -> Any:
+    """``default`` hook for json.dump that serializes records like plain dicts"""
+    if isinstance(obj, (_Record, SearchItem)):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
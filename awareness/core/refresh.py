@@ -0,0 +1,113 @@
+import math
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from awareness.core.query_service import ResultStore
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+# A 10% swing in total results weighs about as much as one rank position
+COUNT_WEIGHT = 10.0
+# Baseline drift per day, so even perfectly stable terms come due eventually
+BASE_RATE = 0.1
+# Assumed drift per day for terms seen only once
+UNKNOWN_RATE = 5.0
+
+
+def _parse(timestamp: str) -> datetime:
+    return datetime.strptime(timestamp, TIMESTAMP_FORMAT)
+
+
+def volatility(history: List[Dict], depth: int = 100) -> Dict[str, float]:
+    """Average per-day movement of a term's rankings and result count.
+
+    Rank changes are averaged over projects, with "not found" counted as
+    ``depth + 1``; count changes use the absolute log ratio.
+    """
+    rank_rates, count_rates = [], []
+    for previous, current in zip(history, history[1:]):
+        days = max((_parse(current['timestamp']) - _parse(previous['timestamp'])).total_seconds() / 86400, 1 / 24)
+        projects = set(previous['project_rankings']) & set(current['project_rankings'])
+        if projects:
+            moves = [abs((current['project_rankings'][p] or depth + 1) - (previous['project_rankings'][p] or depth + 1))
+                     for p in projects]
+            rank_rates.append(sum(moves) / len(moves) / days)
+        before, after = previous.get('total_results') or 0, current.get('total_results') or 0
+        if before > 0 and after > 0:
+            count_rates.append(abs(math.log(after / before)) / days)
+    return {
+        'rank': sum(rank_rates) / len(rank_rates) if rank_rates else 0.0,
+        'count': sum(count_rates) / len(count_rates) if count_rates else 0.0,
+    }
+
+
+class RefreshPlan:
+    """Terms to query this run and the records carried forward for the rest"""
+
+    def __init__(self, refresh: List[str], carried: Dict[str, Dict], scores: Dict[str, float]):
+        self.refresh = refresh
+        self.carried = carried
+        self.scores = scores
+
+    def merge(self, terms: List[str], results: Optional[Dict]) -> Dict:
+        """Fresh and carried-forward records in the original term order"""
+        results = results or {}
+        return {term: results[term] if term in results else self.carried[term]
+                for term in terms if term in results or term in self.carried}
+
+
+class RefreshScheduler:
+    """Chooses which terms to re-rank under a query budget.
+
+    Each term's priority is its expected movement since the last refresh:
+    historical volatility (rank and result count, per day) times the age of
+    its latest fresh record. Terms without history, or older than
+    ``max_age_hours``, are always refreshed first.
+    """
+
+    def __init__(self, store: ResultStore, num_results: int = 100, max_age_hours: Optional[float] = None):
+        self.store = store
+        self.num_results = num_results
+        self.max_age_hours = max_age_hours
+
+    def term_cost(self) -> int:
+        """Worst-case queries to rank one term"""
+        return min((self.num_results + 9) // 10, 10)
+
+    def score(self, history: List[Dict], now: datetime) -> float:
+        age_days = (now - _parse(history[-1]['timestamp'])).total_seconds() / 86400
+        if len(history) < 2:
+            # One observation says nothing about volatility: assume it is volatile
+            return UNKNOWN_RATE * age_days
+        moves = volatility(history, self.num_results)
+        return (BASE_RATE + moves['rank'] + COUNT_WEIGHT * moves['count']) * age_days
+
+    def plan(self, terms: List[str], budget: int, now: Optional[datetime] = None) -> RefreshPlan:
+        now = now or datetime.now()
+        self.store.refresh(force=True)
+        scores, forced, histories = {}, set(), {}
+        for term in terms:
+            # The same run can appear in several files; keep one record per timestamp
+            history = list({r['timestamp']: r for r in self.store.ranking_history(term)}.values())
+            histories[term] = history
+            if not history:
+                forced.add(term)
+                scores[term] = math.inf
+                continue
+            age_hours = (now - _parse(history[-1]['timestamp'])).total_seconds() / 3600
+            if self.max_age_hours is not None and age_hours >= self.max_age_hours:
+                forced.add(term)
+            scores[term] = self.score(history, now)
+
+        ranked = sorted(terms, key=lambda t: (t in forced, scores[t]), reverse=True)
+        cost = self.term_cost()
+        refresh = ranked[:max(budget, 0) // cost]
+        chosen = set(refresh)
+        carried = {}
+        for term in terms:
+            if term in chosen or not histories[term]:
+                continue
+            # A repeat of an unchanged run is carried as the plain ranking it repeats
+            latest = {k: v for k, v in histories[term][-1].items() if k not in ('source', 'unchanged_since')}
+            age_hours = (now - _parse(latest['timestamp'])).total_seconds() / 3600
+            carried[term] = dict(latest, carried_forward=True, age_hours=round(age_hours, 1))
+        return RefreshPlan([t for t in terms if t in chosen], carried, scores)
@@ -0,0 +1,172 @@
+import json
+import math
+import os
+import random
+from datetime import datetime
+from statistics import NormalDist
+from typing import Dict, List, Optional
+
+
+class SamplingError(ValueError):
+    """Raised when a sample cannot be drawn with the given groups and budget"""
+
+
+def allocate(sizes: Dict[str, int], budget: int) -> Dict[str, int]:
+    """Split a query budget across strata in proportion to their size.
+
+    Every non-empty group gets at least two terms (one if it only has one) so
+    its variance can be estimated; the remainder is handed out by largest
+    fractional share. No group is allocated more terms than it has.
+    """
+    groups = [g for g, size in sizes.items() if size > 0]
+    floors = {g: min(2, sizes[g]) for g in groups}
+    if sum(floors.values()) > budget:
+        raise SamplingError(f"A budget of {budget} cannot cover {len(groups)} term groups "
+                            f"(at least {sum(floors.values())} queries are needed)")
+    allocation = dict(floors)
+    remaining = budget - sum(floors.values())
+    while remaining > 0:
+        room = {g: sizes[g] - allocation[g] for g in groups if sizes[g] > allocation[g]}
+        if not room:
+            break
+        total = sum(sizes[g] for g in room)
+        shares = {g: remaining * sizes[g] / total for g in room}
+        granted = 0
+        for g in room:
+            extra = min(int(shares[g]), room[g])
+            allocation[g] += extra
+            granted += extra
+        if granted == 0:
+            # Hand out the last few queries by largest fractional share
+            for g in sorted(room, key=lambda g: shares[g] - int(shares[g]), reverse=True)[:remaining]:
+                allocation[g] += 1
+                granted += 1
+        remaining -= granted
+    return allocation
+
+
+class SamplePlan:
+    """Stratified, rotating sample of terms for one run.
+
+    Each group keeps a shuffled order of its terms and a cursor. A run takes
+    the next ``n`` terms from every group's order, so each run is a simple
+    random sample within the group and every term is queried once per cycle
+    of ``ceil(size / n)`` runs. The order and cursors persist in a state file.
+    """
+
+    def __init__(self, groups: Dict[str, List[str]], budget: int, state_path: str,
+                 seed: Optional[int] = None):
+        if budget <= 0:
+            raise SamplingError("The sample budget must be positive")
+        self.groups = {name: list(dict.fromkeys(terms)) for name, terms in groups.items() if terms}
+        self.budget = budget
+        self.state_path = state_path
+        self.random = random.Random(seed)
+        self.state = self._load_state()
+        self.allocation = allocate({g: len(t) for g, t in self.groups.items()}, budget)
+        self.samples: Dict[str, List[str]] = {}
+
+    def _load_state(self) -> Dict:
+        if os.path.exists(self.state_path):
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {'run': 0, 'groups': {}}
+
+    def _order(self, group: str) -> Dict:
+        """The group's rotation order, reconciled with its current terms"""
+        current = set(self.groups[group])
+        entry = self.state['groups'].get(group) or {'order': [], 'cursor': 0}
+        cursor = sum(1 for term in entry['order'][:entry['cursor']] if term in current)
+        order = [term for term in entry['order'] if term in current]
+        known = set(order)
+        added = [term for term in self.groups[group] if term not in known]
+        self.random.shuffle(added)
+        # New terms go right after the cursor so the next runs pick them up
+        entry = {'order': order[:cursor] + added + order[cursor:], 'cursor': cursor}
+        self.state['groups'][group] = entry
+        return entry
+
+    def select(self) -> List[str]:
+        """Draw this run's sample and return the terms to query"""
+        selected = []
+        for group, n in self.allocation.items():
+            entry = self._order(group)
+            order, cursor = entry['order'], entry['cursor']
+            sample = order[cursor:cursor + n]
+            if len(sample) < n:
+                # Cycle complete: top up from a fresh shuffle that starts the next cycle
+                tail = set(sample)
+                rest = [term for term in order if term not in tail]
+                self.random.shuffle(rest)
+                need = n - len(sample)
+                upcoming = rest[need:] + sample
+                self.random.shuffle(upcoming)
+                sample = sample + rest[:need]
+                entry['order'] = rest[:need] + upcoming
+                entry['cursor'] = need
+            else:
+                entry['cursor'] = cursor + n
+            self.samples[group] = sample
+            selected.extend(sample)
+        self.state['run'] += 1
+        return selected
+
+    def cycle_runs(self, group: str) -> int:
+        """Runs needed to query every term in a group once"""
+        return math.ceil(len(self.groups[group]) / self.allocation[group])
+
+    def save(self):
+        """Persist the rotation so the next run continues where this one stopped"""
+        directory = os.path.dirname(self.state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.state_path)
+
+
+def _estimate(values: List[float], size: int, z: float) -> Dict:
+    """Mean and total with a normal-approximation interval for one stratum"""
+    n = len(values)
+    mean = sum(values) / n
+    variance = sum((v - mean) ** 2 for v in values) / (n - 1) if n > 1 else 0.0
+    # Finite population correction: a fully sampled group has no sampling error
+    total_variance = size ** 2 * (1 - n / size) * variance / n
+    total = size * mean
+    error = math.sqrt(total_variance)
+    return {'terms': size, 'sampled': n, 'mean_count': round(mean, 2), 'total_count': round(total),
+            'standard_error': round(error, 2), 'ci_low': round(max(0.0, total - z * error)),
+            'ci_high': round(total + z * error), '_variance': total_variance}
+
+
+def estimate_groups(plan: SamplePlan, results: Dict, confidence: float = 0.95) -> Dict:
+    """Group-level count estimates with confidence intervals from a sampled run"""
+    if not 0 < confidence < 1:
+        raise SamplingError("confidence must be between 0 and 1")
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    estimates = {}
+    for group, sample in plan.samples.items():
+        values = [results[term]['count'] for term in sample if term in results]
+        if not values:
+            continue
+        estimate = _estimate(values, len(plan.groups[group]), z)
+        estimate['cycle_runs'] = plan.cycle_runs(group)
+        estimates[group] = estimate
+    overall_total = sum(e['total_count'] for e in estimates.values())
+    overall_error = math.sqrt(sum(e.pop('_variance') for e in estimates.values()))
+    return {
+        'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'run': plan.state['run'],
+        'budget': plan.budget,
+        'confidence': confidence,
+        'groups': estimates,
+        'overall': {
+            'terms': sum(e['terms'] for e in estimates.values()),
+            'sampled': sum(e['sampled'] for e in estimates.values()),
+            'total_count': overall_total,
+            'standard_error': round(overall_error, 2),
+            'ci_low': round(max(0.0, overall_total - z * overall_error)),
+            'ci_high': round(overall_total + z * overall_error)
+        }
+    }
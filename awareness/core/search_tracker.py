@@ -3,14 +3,44 @@ import json
 import argparse
 from datetime import datetime, date
 import time
-from typing import Dict
+from typing import Dict, Optional
+from awareness.core.providers import GoogleProvider, SearchProvider
+from awareness.core.rate_controller import get_rate_controller, export_rate_metrics
+from awareness.core.records import CountResult, plain_results, result_default
+from awareness.core.transport import REQUEST_HEADERS, REQUEST_TIMEOUT, TransportStats, parse_response
+from awareness.core.variants import expand, fetch_key, put_result
+from awareness.utils.metrics import get_registry
+from awareness.utils.profiling import span
+from awareness.utils.console import get_console
+from awareness.utils.serialization import dump
+
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0)
 
 class GoogleSearchTracker:
-    def __init__(self, api_key, search_engine_id):
+    metrics_label = 'search'
+
+    def __init__(self, api_key, search_engine_id, provider: Optional[SearchProvider] = None):
         self.api_key = api_key
         self.search_engine_id = search_engine_id
+        # Backend queried for results; Google Custom Search unless another is given
+        self.provider = provider or GoogleProvider(api_key, search_engine_id)
         self.usage_file = 'api_usage.json'
         self.daily_usage = self._load_daily_usage()
+        # Each provider is paced by its own controller
+        self.rate_controller = get_rate_controller(self.provider.name)
+        self.metrics = get_registry()
+        export_rate_metrics(self.metrics)
+        self.console = get_console()
+        # Optional requests.Session for connection pooling in long-running processes
+        self.session = None
+        # Non-interactive callers (e.g. the watch daemon) skip the cost confirmation prompt
+        self.interactive = True
+        # Bytes and parse time of the current run's responses
+        self.transport = TransportStats()
+        # Locale variant (gl/hl/lr) applied to every request of the current term
+        self.variant = None
+        # Optional awareness.core.hedging.HedgePolicy for slow requests
+        self.hedging = None
     
     def _load_daily_usage(self):
         try:
@@ -24,9 +54,93 @@ class GoogleSearchTracker:
             return {'date': date.today().isoformat(), 'count': 0}
     
     def _save_daily_usage(self):
-        with open(self.usage_file, 'w') as f:
+        with span('persist_usage'), open(self.usage_file, 'w') as f:
             json.dump(self.daily_usage, f)
     
+    def _record_usage(self, queries):
+        """Add billed queries to the daily usage ledger"""
+        if not self.provider.billed:
+            return
+        self.daily_usage['count'] += queries
+        self._save_daily_usage()
+        self.metrics.counter('awareness_quota_used_total', 'API queries billed against the daily quota',
+                             ('tracker',)).inc(queries, tracker=self.metrics_label)
+        self.metrics.gauge('awareness_quota_used_today', 'API queries used today').set(self.daily_usage['count'])
+
+    def _record_hedge(self):
+        """Pace and bill a duplicate request issued by the hedging policy"""
+        with span('rate_wait', hedge=True):
+            self.rate_controller.acquire()
+        if self.provider.billed:
+            self.daily_usage['hedged'] = self.daily_usage.get('hedged', 0) + 1
+            self._record_usage(1)
+        self.metrics.counter('awareness_hedged_requests_total', 'Duplicate requests issued for slow responses',
+                             ('tracker',)).inc(tracker=self.metrics_label)
+
+    def _record_hedge_outcome(self, outcome: str):
+        """Keep 'won' and 'wasted' duplicates in the usage ledger next to 'hedged'"""
+        if self.provider.billed:
+            key = f'hedged_{outcome}'
+            self.daily_usage[key] = self.daily_usage.get(key, 0) + 1
+            self._save_daily_usage()
+
+    def _api_get(self, url, params):
+        """Issue a paced API request and record its outcome"""
+        if self.variant:
+            params = dict(params, **self.provider.variant_params(self.variant))
+        with span('rate_wait'):
+            self.rate_controller.acquire()
+        started = time.monotonic()
+        with span('fetch_page', start=params.get('start', 1)):
+            def send():
+                return (self.session or requests).get(url, params=params, headers=REQUEST_HEADERS,
+                                                      timeout=REQUEST_TIMEOUT)
+            response = send() if self.hedging is None else \
+                self.hedging.run(send, self._record_hedge, self._record_hedge_outcome)
+        latency = time.monotonic() - started
+        self.rate_controller.record(latency, response.status_code)
+        self.metrics.counter('awareness_requests_total', 'API requests by response status',
+                             ('tracker', 'status')).inc(tracker=self.metrics_label, status=response.status_code)
+        self.metrics.histogram('awareness_request_latency_seconds', 'API request latency',
+                               ('tracker',), LATENCY_BUCKETS).observe(latency, tracker=self.metrics_label)
+        return response
+
+    def _parse(self, response) -> Dict:
+        """Decode a response body, accounting its size and parse time"""
+        with span('parse'):
+            data, wire_bytes, body_bytes, parse_seconds = parse_response(response)
+        self.transport.record(wire_bytes, body_bytes, parse_seconds)
+        self.metrics.counter('awareness_response_bytes_total', 'Response bytes received and decoded',
+                             ('tracker', 'stage')).inc(wire_bytes, tracker=self.metrics_label, stage='wire')
+        self.metrics.counter('awareness_response_bytes_total', 'Response bytes received and decoded',
+                             ('tracker', 'stage')).inc(body_bytes, tracker=self.metrics_label, stage='decoded')
+        self.metrics.counter('awareness_parse_seconds_total', 'Time spent decoding API responses',
+                             ('tracker',)).inc(parse_seconds, tracker=self.metrics_label)
+        return data
+
+    def _source(self) -> str:
+        """Provider name, qualified by the current variant (google@us-en)"""
+        return f"{self.provider.name}@{self.variant['name']}" if self.variant else self.provider.name
+
+    def _label(self, term: str) -> str:
+        """Term as shown in progress output, with the current variant"""
+        return f"{term} [{self.variant['name']}]" if self.variant else term
+
+    def _begin_run(self):
+        """Reset the per-run transport totals and hedging budget"""
+        self.transport = TransportStats()
+        if self.hedging is not None:
+            self.hedging.reset()
+
+    def _end_run(self, show_progress: bool):
+        """Print the run's byte and parse-time totals and hedging outcomes; release hedging workers"""
+        if show_progress and self.transport.responses:
+            self.console.event('transport', self.transport.describe(), **self.transport.summary())
+        if self.hedging is not None:
+            if show_progress:
+                self.console.event('hedging', self.hedging.describe(), **self.hedging.summary())
+            self.hedging.close()
+
     def get_remaining_calls(self):
         """Get remaining free API calls for today"""
         used = self.daily_usage['count']
@@ -37,65 +151,82 @@ class GoogleSearchTracker:
             'date': self.daily_usage['date']
         }
     
-    def search(self, terms, show_progress=True):
-        """Search for terms and return their result counts"""
-        url = "https://www.googleapis.com/customsearch/v1"
+    def search(self, terms, show_progress=True, variants=None):
+        """Search for terms and return their result counts.
+
+        With ``variants`` every term is queried once per locale variant and
+        results are keyed by term, then variant name.
+        """
         results = {}
+        queries = len(terms) * len(variants or [None])
         
         # Check if we'll exceed daily limit
-        if self.daily_usage['count'] + len(terms) > 10000:
+        if self.provider.billed and self.daily_usage['count'] + queries > 10000:
             raise Exception("Error: Would exceed daily limit of 10,000 queries")
         
         # Check free tier and warn about costs
         remaining_free = max(0, 100 - self.daily_usage['count'])
-        if len(terms) > remaining_free:
-            paid_queries = len(terms) - remaining_free
-            print(f"Warning: {len(terms)} queries will exceed free tier (100 queries per day)")
+        if self.provider.billed and queries > remaining_free:
+            paid_queries = queries - remaining_free
+            print(f"Warning: {queries} queries will exceed free tier (100 queries per day)")
             print(f"You have {remaining_free} free queries remaining today")
             print(f"Estimated cost: ${paid_queries * 0.005:.2f}")
-            if input("Continue? (y/n): ").lower() != 'y':
+            if self.interactive and input("Continue? (y/n): ").lower() != 'y':
                 return None
         
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self._begin_run()
         
-        for term in terms:
+        # Variants that send identical requests (e.g. ones a provider ignores) share one fetch
+        shared, current = {}, None
+        for term, variant in expand(terms, variants):
+            if term != current:
+                shared, current = {}, term
+            self.variant = variant
+            label = self._label(term)
+            key = fetch_key(self.provider, term, variant)
+            if key in shared:
+                put_result(results, term, variant, shared[key])
+                continue
             try:
-                params = {
-                    'key': self.api_key,
-                    'cx': self.search_engine_id,
-                    'q': term,
-                    'num': 1
-                }
-                
-                response = requests.get(url, params=params)
-                
-                if response.status_code != 200:
-                    print(f"Error searching for '{term}': {response.text}")
-                    continue
-                
-                data = response.json()
-                count = int(data['searchInformation']['totalResults'])
-                
-                results[term] = {
-                    'count': count,
-                    'timestamp': timestamp
-                }
-                
-                # Update usage count
-                self.daily_usage['count'] += 1
-                self._save_daily_usage()
-                
-                if show_progress:
-                    print(f"Term: {term}")
-                    print(f"Results: {count:,}")
-                    print("-" * 40)
-                
-                time.sleep(1)  # Be nice to the API
+                with span('term', category='term', term=label):
+                    params = self.provider.count_params(term)
+                    
+                    response = self._api_get(self.provider.url, params)
+                    
+                    if response.status_code != 200:
+                        self.console.event('search_error', f"Error searching for '{label}': {response.text}",
+                                           level='error', term=term, status=response.status_code)
+                        continue
+                    
+                    data = self._parse(response)
+                    count = self.provider.total_results(data)
+                    
+                    # Update usage count
+                    self._record_usage(1)
+                    
+                    if count is None:
+                        # No estimate is better than a made-up one; the term is left out of the results
+                        self.console.event('count_missing', f"No result count reported for '{label}'",
+                                           level='warning', term=term)
+                        continue
+                    
+                    shared[key] = CountResult(count, timestamp)
+                    put_result(results, term, variant, shared[key])
+                    
+                    if show_progress:
+                        self.console.event('term_result',
+                                           f"Term: {label}\nResults: {count:,}\n" + "-" * 40,
+                                           term=term, count=count)
                 
             except Exception as e:
-                print(f"Error processing term '{term}': {str(e)}")
+                self.console.event('term_error', f"Error processing term '{label}': {str(e)}",
+                                   level='error', term=term, error=str(e))
+        self.variant = None
         
-        return results
+        self._end_run(show_progress)
+        self.console.flush()
+        return plain_results(results)
 
 def main():
     parser = argparse.ArgumentParser(description='Google Custom Search API Results Tracker')
@@ -145,8 +276,7 @@ def main():
     
     # Save results if output file specified
     if results and args.output:
-        with open(args.output, 'w') as f:
-            json.dump(results, f, indent=4)
+        dump(results, args.output, default=result_default)
         print(f"\nResults saved to {args.output}")
 
 if __name__ == "__main__":
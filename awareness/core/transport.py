@@ -0,0 +1,71 @@
+import time
+from typing import Any, Dict, Tuple
+
+from awareness.utils.serialization import loads
+
+# Partial-response field masks: ask the API only for what the trackers read
+COUNT_FIELDS = 'searchInformation/totalResults'
+RESULT_FIELDS = 'searchInformation/totalResults,items(title,snippet,link)'
+
+# Seconds to wait for a response; a stalled request must not hold a worker forever
+REQUEST_TIMEOUT = 30
+
+# Google APIs only gzip responses for clients that say so in the User-Agent too
+REQUEST_HEADERS = {
+    'Accept-Encoding': 'gzip',
+    'User-Agent': 'project-awareness (gzip)',
+}
+
+
+class TransportStats:
+    """Bytes and JSON parse time for the responses of one run"""
+
+    def __init__(self):
+        self.responses = 0
+        self.wire_bytes = 0
+        self.body_bytes = 0
+        self.parse_seconds = 0.0
+
+    def record(self, wire_bytes: int, body_bytes: int, parse_seconds: float):
+        self.responses += 1
+        self.wire_bytes += wire_bytes
+        self.body_bytes += body_bytes
+        self.parse_seconds += parse_seconds
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'responses': self.responses,
+            'wire_bytes': self.wire_bytes,
+            'body_bytes': self.body_bytes,
+            'parse_seconds': round(self.parse_seconds, 6),
+        }
+
+    def describe(self) -> str:
+        ratio = f" ({self.body_bytes / self.wire_bytes:.1f}x compression)" if self.wire_bytes else ''
+        return (f"Transport: {self.responses} responses, {self.wire_bytes:,} bytes received, "
+                f"{self.body_bytes:,} bytes decoded{ratio}, {self.parse_seconds * 1000:.1f} ms parsing")
+
+
+def parse_response(response) -> Tuple[Dict, int, int, float]:
+    """Decode a JSON response; returns (data, wire bytes, decoded bytes, parse seconds).
+
+    The body is parsed straight from bytes (with orjson when installed), which
+    skips the charset detection ``response.json()`` runs when the server omits
+    one. Wire bytes come from
+    the underlying urllib3 response, so they reflect gzip when it was used.
+    """
+    body = getattr(response, 'content', None)
+    started = time.perf_counter()
+    if isinstance(body, bytes):
+        data = loads(body)
+        body_bytes = len(body)
+    else:
+        # Responses without a raw body (e.g. test doubles) fall back to .json()
+        data = response.json()
+        body_bytes = 0
+    parse_seconds = time.perf_counter() - started
+    tell = getattr(getattr(response, 'raw', None), 'tell', None)
+    wire_bytes = tell() if callable(tell) else None
+    if not isinstance(wire_bytes, int):
+        wire_bytes = body_bytes
+    return data, wire_bytes, body_bytes, parse_seconds
@@ -0,0 +1,101 @@
+import json
+import os
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import yaml
+
+# Locale parameters of the Custom Search API: country boost, interface language, result language
+VARIANT_PARAMS = ('gl', 'hl', 'lr')
+
+
+def parse_variant(spec: str) -> Dict[str, str]:
+    """Parse ``[name:]gl=us,hl=en,lr=lang_en`` into a variant dict"""
+    name, _, body = spec.partition(':') if ':' in spec.split('=', 1)[0] else ('', '', spec)
+    variant = {}
+    for pair in body.split(','):
+        key, sep, value = pair.partition('=')
+        key = key.strip()
+        if not sep or key not in VARIANT_PARAMS or not value.strip():
+            raise ValueError(f"Invalid variant '{spec}': expected [name:]gl=..,hl=..,lr=..")
+        variant[key] = value.strip()
+    return _named(variant, name.strip())
+
+
+def _named(variant: Dict, name: str = '') -> Dict[str, str]:
+    params = {key: str(variant[key]) for key in VARIANT_PARAMS if variant.get(key)}
+    if not params:
+        raise ValueError("A variant needs at least one of gl, hl or lr")
+    return dict(params, name=name or '-'.join(params[key] for key in VARIANT_PARAMS if key in params))
+
+
+def load_variants(specs: Iterable[str]) -> List[Dict[str, str]]:
+    """Variants from inline specs and/or YAML/JSON files.
+
+    A file holds a list of objects with gl/hl/lr and an optional name, or a
+    mapping of names to such objects (optionally under a 'variants' key).
+    """
+    variants = []
+    for spec in specs:
+        if os.path.isfile(spec):
+            with open(spec, 'r', encoding='utf-8') as f:
+                data = json.load(f) if spec.lower().endswith('.json') else yaml.safe_load(f)
+            if isinstance(data, dict):
+                data = data.get('variants', data)
+            if isinstance(data, dict):
+                data = [dict(params, name=name) for name, params in data.items()]
+            if not isinstance(data, list) or not data:
+                raise ValueError(f"Variants file {spec} must list at least one variant")
+            variants.extend(_named(entry, str(entry.get('name') or '')) for entry in data)
+        else:
+            variants.append(parse_variant(spec))
+    names = [variant['name'] for variant in variants]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate variant names: {', '.join(duplicates)}")
+    return variants
+
+
+def expand(terms: Iterable[str], variants: Optional[List[Dict]] = None) -> Iterator[Tuple[str, Optional[Dict]]]:
+    """Lazily yield (term, variant) pairs, every variant of a term in a row"""
+    for term in terms:
+        for variant in variants or [None]:
+            yield term, variant
+
+
+def fetch_key(provider, term: str, variant: Optional[Dict]) -> Tuple:
+    """Identity of the request a variant produces; variants with equal keys share one fetch"""
+    params = provider.variant_params(variant) if variant else {}
+    return term, tuple(sorted(params.items()))
+
+
+def put_result(results: Dict, term: str, variant: Optional[Dict], record):
+    """Store a record under the term, or under term and variant name in a matrix run"""
+    if variant is None:
+        results[term] = record
+    else:
+        results.setdefault(term, {})[variant['name']] = record
+
+
+def is_matrix(results: Dict) -> bool:
+    """Whether results are keyed by term and then variant"""
+    for value in results.values():
+        if hasattr(value, 'get') and 'timestamp' not in value:
+            return all(hasattr(record, 'get') and 'timestamp' in record for record in value.values())
+        return False
+    return False
+
+
+def split_variants(results: Dict) -> Dict[str, Dict]:
+    """Per-variant result dicts from a matrix run: {variant: {term: record}}"""
+    facets: Dict[str, Dict] = {}
+    for term, by_variant in results.items():
+        for name, record in by_variant.items():
+            facets.setdefault(name, {})[term] = record
+    return facets
+
+
+def flatten_variants(results: Dict) -> Dict:
+    """Matrix results as plain per-term results keyed ``term [variant]``; other results unchanged"""
+    if not results or not is_matrix(results):
+        return results
+    return {f"{term} [{name}]": record for term, by_variant in results.items() for name, record in by_variant.items()}
@@ -0,0 +1,331 @@
+import glob
+import heapq
+import itertools
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+import requests
+import yaml
+
+from awareness.core.search_tracker import GoogleSearchTracker
+from awareness.core.project_rank_tracker import ProjectRankTracker
+from awareness.core.records import result_default
+from awareness.utils.search_terms import SearchTermsLoader
+from awareness.utils.console import get_console
+from awareness.utils.serialization import dump
+
+INTERVAL_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+class ScheduleError(ValueError):
+    """Raised when a schedule or job definition is invalid"""
+    pass
+
+
+def parse_interval(value) -> float:
+    """Parse an interval such as 90, "15m", "6h" or "1d" into seconds"""
+    if isinstance(value, (int, float)):
+        seconds = float(value)
+    else:
+        match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([smhd]?)\s*', str(value))
+        if not match:
+            raise ScheduleError(f"Invalid interval: {value}")
+        seconds = float(match.group(1)) * INTERVAL_UNITS[match.group(2) or 's']
+    if seconds <= 0:
+        raise ScheduleError(f"Interval must be positive: {value}")
+    return seconds
+
+
+def _int_field(data: Dict, key: str, default: int) -> int:
+    """An integer job field, with a ScheduleError naming the job and field if it isn't one"""
+    value = data.get(key, default)
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ScheduleError(f"Job '{data['name']}': {key} must be an integer, not {value!r}")
+
+
+@dataclass
+class WatchJob:
+    """A recurring search or rank job from the schedule"""
+    name: str
+    kind: str
+    interval: Optional[float] = None
+    terms: List[str] = field(default_factory=list)
+    terms_file: Optional[str] = None
+    projects: List = field(default_factory=list)
+    num_results: int = 100
+    output: Optional[str] = None
+    priority: int = 10
+    chunk_size: int = 10
+
+    @classmethod
+    def from_dict(cls, data: Dict, default_priority: int = 10) -> 'WatchJob':
+        if not isinstance(data, dict) or 'name' not in data:
+            raise ScheduleError("Each job needs a 'name'")
+        kind = data.get('type', 'search')
+        if kind not in ('search', 'rank'):
+            raise ScheduleError(f"Job '{data['name']}': type must be 'search' or 'rank'")
+        if not data.get('terms') and not data.get('terms_file'):
+            raise ScheduleError(f"Job '{data['name']}': 'terms' or 'terms_file' is required")
+        if kind == 'rank' and not data.get('projects'):
+            raise ScheduleError(f"Job '{data['name']}': rank jobs need 'projects'")
+        return cls(
+            name=str(data['name']),
+            kind=kind,
+            interval=parse_interval(data['interval']) if data.get('interval') is not None else None,
+            terms=[str(term) for term in data.get('terms') or []],
+            terms_file=data.get('terms_file'),
+            projects=[p if isinstance(p, dict) else str(p) for p in data.get('projects') or []],
+            num_results=_int_field(data, 'num_results', 100),
+            output=data.get('output'),
+            priority=_int_field(data, 'priority', default_priority),
+            chunk_size=max(1, _int_field(data, 'chunk_size', 10))
+        )
+
+
+def load_schedule(path: str) -> Dict[str, WatchJob]:
+    """Load recurring jobs from a YAML or JSON schedule file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        try:
+            data = yaml.safe_load(f)
+        except yaml.YAMLError as e:
+            raise ScheduleError(f"Invalid schedule file: {str(e)}")
+    if not isinstance(data, dict) or not isinstance(data.get('jobs'), list):
+        raise ScheduleError("Schedule must be an object with a 'jobs' list")
+    jobs = {}
+    for entry in data['jobs']:
+        job = WatchJob.from_dict(entry)
+        if job.interval is None:
+            raise ScheduleError(f"Job '{job.name}': 'interval' is required")
+        if job.name in jobs:
+            raise ScheduleError(f"Duplicate job name: {job.name}")
+        jobs[job.name] = job
+    return jobs
+
+
+class TermCache:
+    """Parsed term files, re-read only when the file changes on disk"""
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[float, List[str]]] = {}
+
+    def load(self, path: str) -> List[str]:
+        mtime = os.stat(path).st_mtime
+        cached = self._entries.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        terms = SearchTermsLoader.load_terms(path)
+        self._entries[path] = (mtime, terms)
+        return terms
+
+
+class _JobRun:
+    """One execution of a job, processed in chunks of terms"""
+
+    def __init__(self, job: WatchJob, terms: List[str], recurring: bool = True):
+        self.job = job
+        self.recurring = recurring
+        self.pending = list(terms)
+        self.results: Dict = {}
+        self.started = datetime.now()
+
+
+class WatchDaemon:
+    """Runs scheduled jobs in a warm process.
+
+    Trackers, the HTTP session, parsed term files and the usage ledger are kept
+    between runs. Work is queued by priority (lower runs first) in chunks of
+    terms, so a small high-priority job submitted through the inbox runs ahead
+    of the rest of a large background batch. The schedule file is reloaded
+    whenever it changes.
+    """
+
+    def __init__(self, api_key: str, search_engine_id: str, schedule_path: str,
+                 inbox_dir: Optional[str] = None, session: Optional[requests.Session] = None):
+        self.api_key = api_key
+        self.search_engine_id = search_engine_id
+        self.schedule_path = schedule_path
+        self.inbox_dir = inbox_dir
+        self.session = session or requests.Session()
+        self.console = get_console()
+        self.term_cache = TermCache()
+        self.jobs: Dict[str, WatchJob] = {}
+        self._schedule_mtime = None
+        self._next_due: Dict[str, float] = {}
+        self._queue: List = []
+        self._counter = itertools.count()
+        self._trackers: Dict[Tuple[str, str], GoogleSearchTracker] = {}
+        self._daily_usage = None
+        self._stop = threading.Event()
+        self.reload_if_changed()
+
+    def reload_if_changed(self) -> bool:
+        """Reload the schedule if its file changed; keeps the old jobs on error"""
+        try:
+            mtime = os.stat(self.schedule_path).st_mtime
+            if mtime == self._schedule_mtime:
+                return False
+            jobs = load_schedule(self.schedule_path)
+        except (OSError, ScheduleError) as e:
+            if self._schedule_mtime is None:
+                raise
+            self.console.event('schedule_error', f"Keeping previous schedule: {str(e)}",
+                               level='error', error=str(e))
+            return False
+        self._schedule_mtime = mtime
+        now = time.monotonic()
+        for name, job in jobs.items():
+            previous = self.jobs.get(name)
+            if previous is None:
+                self._next_due[name] = now
+            elif previous.interval != job.interval and self._next_due[name] != float('inf'):
+                self._next_due[name] = min(self._next_due[name], now + job.interval)
+        for name in set(self.jobs) - set(jobs):
+            self._next_due.pop(name, None)
+        self.jobs = jobs
+        self.console.event('schedule_loaded', f"Loaded {len(jobs)} job(s) from {self.schedule_path}",
+                           jobs=sorted(jobs))
+        return True
+
+    def submit(self, job: WatchJob):
+        """Queue a one-off job run"""
+        terms = self._job_terms(job)
+        heapq.heappush(self._queue, (job.priority, next(self._counter), _JobRun(job, terms, recurring=False)))
+
+    def _job_terms(self, job: WatchJob) -> List[str]:
+        if job.terms_file:
+            return self.term_cache.load(job.terms_file)
+        return job.terms
+
+    def _collect_inbox(self):
+        """Queue one-off jobs dropped into the inbox directory (priority 0 by default).
+
+        Accepted files are removed; rejected ones are renamed to ``*.rejected``
+        so they are kept for inspection but never picked up again.
+        """
+        if not self.inbox_dir:
+            return
+        for path in sorted(glob.glob(os.path.join(self.inbox_dir, '*.json')) +
+                           glob.glob(os.path.join(self.inbox_dir, '*.y*ml'))):
+            accepted = False
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    job = WatchJob.from_dict(yaml.safe_load(f), default_priority=0)
+                self.submit(job)
+                accepted = True
+                self.console.event('job_submitted', f"Queued one-off job '{job.name}'", job=job.name)
+            except Exception as e:
+                self.console.event('inbox_error', f"Rejected {path}: {str(e)}", level='error',
+                                   path=path, error=str(e))
+            finally:
+                try:
+                    if accepted:
+                        os.remove(path)
+                    else:
+                        os.replace(path, path + '.rejected')
+                except OSError:
+                    pass
+
+    def _enqueue_due(self):
+        now = time.monotonic()
+        for name, due in list(self._next_due.items()):
+            if due <= now:
+                job = self.jobs[name]
+                # Not due again until this run has finished
+                self._next_due[name] = float('inf')
+                try:
+                    heapq.heappush(self._queue, (job.priority, next(self._counter),
+                                                 _JobRun(job, self._job_terms(job))))
+                except Exception as e:
+                    self._next_due[name] = now + job.interval
+                    self.console.event('job_error', f"Job '{name}' failed to start: {str(e)}",
+                                       level='error', job=name, error=str(e))
+
+    def _tracker(self, job: WatchJob) -> GoogleSearchTracker:
+        key = (job.kind, json.dumps(job.projects, sort_keys=True))
+        tracker = self._trackers.get(key)
+        if tracker is None:
+            if job.kind == 'rank':
+                tracker = ProjectRankTracker(self.api_key, self.search_engine_id, job.projects)
+            else:
+                tracker = GoogleSearchTracker(self.api_key, self.search_engine_id)
+            if self._daily_usage is None:
+                self._daily_usage = tracker.daily_usage
+            # All trackers update the same ledger so their counts don't overwrite each other
+            tracker.daily_usage = self._daily_usage
+            tracker.session = self.session
+            tracker.interactive = False
+            self._trackers[key] = tracker
+        today = date.today().isoformat()
+        if self._daily_usage['date'] != today:
+            self._daily_usage.update({'date': today, 'count': 0})
+        return tracker
+
+    def run_next(self) -> bool:
+        """Process the next chunk of the highest-priority run; False if idle"""
+        if not self._queue:
+            return False
+        priority, _, run = heapq.heappop(self._queue)
+        job = run.job
+        chunk, run.pending = run.pending[:job.chunk_size], run.pending[job.chunk_size:]
+        try:
+            tracker = self._tracker(job)
+            if job.kind == 'rank':
+                results = tracker.search_project_ranks(chunk, job.num_results, show_progress=False)
+            else:
+                results = tracker.search(chunk, show_progress=False)
+            run.results.update(results or {})
+        except Exception as e:
+            self.console.event('job_error', f"Job '{job.name}' failed: {str(e)}", level='error',
+                               job=job.name, error=str(e))
+        if run.pending:
+            heapq.heappush(self._queue, (priority, next(self._counter), run))
+        else:
+            self._finish(run)
+        return True
+
+    def _finish(self, run: _JobRun):
+        job = run.job
+        if job.output and run.results:
+            path = job.output.format(name=job.name, timestamp=run.started.strftime('%Y%m%d-%H%M%S'))
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            dump(run.results, path, default=result_default)
+        self.console.event('job_finished', f"Job '{job.name}' finished: {len(run.results)} term(s)",
+                           job=job.name, terms=len(run.results))
+        if run.recurring and job.name in self.jobs:
+            # Use the current definition in case the schedule was reloaded mid-run
+            self._next_due[job.name] = time.monotonic() + self.jobs[job.name].interval
+
+    def run_pending(self) -> bool:
+        """One scheduling pass: reload, collect submissions and run one chunk"""
+        self.reload_if_changed()
+        self._collect_inbox()
+        self._enqueue_due()
+        return self.run_next()
+
+    def run_once(self):
+        """Run every scheduled job once and return when the queue is empty"""
+        for name in self.jobs:
+            self._next_due[name] = 0
+        self._collect_inbox()
+        self._enqueue_due()
+        while self.run_next():
+            pass
+        self.console.flush()
+
+    def run_forever(self, poll_interval: float = 1.0):
+        while not self._stop.is_set():
+            if not self.run_pending():
+                self.console.flush()
+                next_due = min(self._next_due.values(), default=float('inf'))
+                self._stop.wait(max(0.0, min(poll_interval, next_due - time.monotonic())))
+
+    def stop(self):
+        self._stop.set()
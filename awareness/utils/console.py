@@ -0,0 +1,68 @@
+import json
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional, TextIO
+
+
+class ConsoleLog:
+    """Buffered structured logger for progress output in the request loops.
+
+    Each record carries an event name and fields. In ``text`` mode the human
+    readable message is written; in ``json`` mode one JSON object per line.
+    Output is flushed when the buffer fills, after ``flush_interval`` seconds,
+    on errors, or explicitly.
+    """
+
+    def __init__(self, fmt: str = 'text', buffer_size: int = 64, flush_interval: float = 1.0,
+                 stream: Optional[TextIO] = None):
+        self.fmt = fmt
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.stream = stream
+        self._buffer: List[str] = []
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def configure(self, fmt: Optional[str] = None, stream: Optional[TextIO] = None):
+        self.flush()
+        if fmt is not None:
+            if fmt not in ('text', 'json'):
+                raise ValueError(f"Unsupported log format: {fmt}")
+            self.fmt = fmt
+        if stream is not None:
+            self.stream = stream
+
+    def event(self, name: str, message: str, level: str = 'info', **fields):
+        """Buffer one record; errors are written immediately"""
+        if self.fmt == 'json':
+            record = {'ts': datetime.now().isoformat(timespec='milliseconds'),
+                      'level': level, 'event': name}
+            record.update(fields)
+            line = json.dumps(record, default=str)
+        else:
+            line = message
+        with self._lock:
+            self._buffer.append(line)
+            due = (level == 'error' or len(self._buffer) >= self.buffer_size
+                   or time.monotonic() - self._last_flush >= self.flush_interval)
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            lines, self._buffer = self._buffer, []
+            self._last_flush = time.monotonic()
+        if lines:
+            stream = self.stream or sys.stdout
+            stream.write('\n'.join(lines) + '\n')
+            stream.flush()
+
+
+_console = ConsoleLog()
+
+
+def get_console() -> ConsoleLog:
+    """Return the process-wide console log"""
+    return _console
@@ -0,0 +1,173 @@
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from awareness.core.variants import flatten_variants
+from awareness.utils.serialization import load
+
+MAGIC = b'AWHIST01'
+HEADER_SIZE = 16
+RECORDS_FILE = 'records.bin'
+STRINGS_FILE = 'strings.json'
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+EPOCH = datetime(1970, 1, 1)
+
+# Fixed-width little-endian record; search counts use NO_PROJECT and rank NOT_FOUND
+RECORD_DTYPE = np.dtype([
+    ('run_time', '<i8'),
+    ('term_id', '<u4'),
+    ('project_id', '<u4'),
+    ('rank', '<i2'),
+    ('total_results', '<i8'),
+])
+NO_PROJECT = 0xFFFFFFFF
+NOT_FOUND = -1
+
+
+def to_epoch(timestamp: str) -> int:
+    """Seconds since 1970 for a result timestamp (kept as naive local time)"""
+    return int((datetime.strptime(timestamp, TIMESTAMP_FORMAT) - EPOCH).total_seconds())
+
+
+def from_epoch(seconds: int) -> datetime:
+    return EPOCH + timedelta(seconds=int(seconds))
+
+
+class HistoryStore:
+    """Append-only binary history of rankings and result counts.
+
+    ``records.bin`` holds a 16 byte header followed by fixed-width
+    ``RECORD_DTYPE`` rows, so it can be opened with ``numpy.memmap`` and
+    sliced without parsing. Term and project names live in ``strings.json``
+    and records refer to them by index.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.records_path = os.path.join(directory, RECORDS_FILE)
+        self.strings_path = os.path.join(directory, STRINGS_FILE)
+        self.terms: List[str] = []
+        self.projects: List[str] = []
+        self.sources: List[str] = []
+        if os.path.exists(self.strings_path):
+            with open(self.strings_path, 'r', encoding='utf-8') as f:
+                strings = json.load(f)
+            self.terms = strings.get('terms', [])
+            self.projects = strings.get('projects', [])
+            self.sources = strings.get('sources', [])
+        self._term_ids = {term: i for i, term in enumerate(self.terms)}
+        self._project_ids = {project: i for i, project in enumerate(self.projects)}
+
+    def _intern(self, table: List[str], ids: Dict[str, int], name: str) -> int:
+        if name not in ids:
+            ids[name] = len(table)
+            table.append(name)
+        return ids[name]
+
+    def _save_strings(self):
+        tmp_path = self.strings_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'terms': self.terms, 'projects': self.projects, 'sources': self.sources}, f)
+        os.replace(tmp_path, self.strings_path)
+
+    def append(self, rows: Iterable[Tuple[int, str, Optional[str], Optional[int], int]]) -> int:
+        """Append (run_time, term, project, rank, total_results) rows; returns the count written.
+
+        ``project`` is None for search counts and ``rank`` None when not found.
+        """
+        packed = [
+            (run_time,
+             self._intern(self.terms, self._term_ids, term),
+             NO_PROJECT if project is None else self._intern(self.projects, self._project_ids, project),
+             NOT_FOUND if rank is None else rank,
+             total_results or 0)
+            for run_time, term, project, rank, total_results in rows
+        ]
+        if not packed:
+            return 0
+        os.makedirs(self.directory, exist_ok=True)
+        # Strings first, so every id in records.bin always resolves
+        self._save_strings()
+        new_file = not os.path.exists(self.records_path)
+        with open(self.records_path, 'ab') as f:
+            if new_file:
+                f.write(MAGIC + RECORD_DTYPE.itemsize.to_bytes(8, 'little'))
+            f.write(np.array(packed, dtype=RECORD_DTYPE).tobytes())
+        return len(packed)
+
+    def append_results(self, results: Dict, source: Optional[str] = None) -> int:
+        """Append a search or rank output dict; a named source is only imported once.
+
+        Variant matrix results are stored per pair as ``term [variant]``. A
+        source that contributes no records is not remembered, so it can be
+        imported again later.
+        """
+        if source is not None and source in self.sources:
+            return 0
+        rows = []
+        for term, info in flatten_variants(results).items():
+            if not hasattr(info, 'get') or 'timestamp' not in info or info.get('carried_forward'):
+                continue
+            run_time = to_epoch(info['timestamp'])
+            if 'project_rankings' in info:
+                for project, rank in info['project_rankings'].items():
+                    rows.append((run_time, term, project, rank, info.get('total_results')))
+            elif 'count' in info:
+                rows.append((run_time, term, None, None, info['count']))
+        written = self.append(rows)
+        if source is not None and written:
+            self.sources.append(source)
+            if os.path.isdir(self.directory):
+                self._save_strings()
+        return written
+
+    def records(self) -> np.ndarray:
+        """All records as a read-only memory map (an empty array if there are none)"""
+        if not os.path.exists(self.records_path):
+            return np.empty(0, dtype=RECORD_DTYPE)
+        with open(self.records_path, 'rb') as f:
+            header = f.read(HEADER_SIZE)
+        if header[:8] != MAGIC or int.from_bytes(header[8:], 'little') != RECORD_DTYPE.itemsize:
+            raise ValueError(f"{self.records_path} is not an awareness history file")
+        count = (os.path.getsize(self.records_path) - HEADER_SIZE) // RECORD_DTYPE.itemsize
+        if count == 0:
+            return np.empty(0, dtype=RECORD_DTYPE)
+        return np.memmap(self.records_path, dtype=RECORD_DTYPE, mode='r', offset=HEADER_SIZE, shape=(count,))
+
+    def rankings(self, term: str, project: str) -> np.ndarray:
+        """Records for one term/project pair, in append order"""
+        if term not in self._term_ids or project not in self._project_ids:
+            return np.empty(0, dtype=RECORD_DTYPE)
+        records = self.records()
+        return records[(records['term_id'] == self._term_ids[term]) &
+                       (records['project_id'] == self._project_ids[project])]
+
+    def counts(self, term: str) -> np.ndarray:
+        """Search count records for one term"""
+        if term not in self._term_ids:
+            return np.empty(0, dtype=RECORD_DTYPE)
+        records = self.records()
+        return records[(records['term_id'] == self._term_ids[term]) & (records['project_id'] == NO_PROJECT)]
+
+
+def convert_json_files(paths: Iterable[str], directory: str) -> Tuple[int, int]:
+    """Import search/rank JSON (or msgpack) outputs into a history store; returns (files, records) imported"""
+    store = HistoryStore(directory)
+    files = records = 0
+    for path in sorted(paths):
+        if path.endswith('api_usage.json'):
+            continue
+        data = load(path)
+        if not isinstance(data, dict):
+            continue
+        source = os.path.abspath(path)
+        if source in store.sources:
+            continue
+        written = store.append_results(data, source=source)
+        if written:
+            records += written
+            files += 1
+    return files, records
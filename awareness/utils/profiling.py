@@ -0,0 +1,111 @@
+import cProfile
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Optional
+
+
+class Profiler:
+    """Records wall-clock spans and writes them as a timeline.
+
+    Spans are stored as Chrome trace "complete" events, so the output can be
+    opened in chrome://tracing or Perfetto, or read line by line as JSON.
+    """
+
+    def __init__(self):
+        self.events: List[Dict] = []
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+
+    @contextmanager
+    def span(self, name: str, category: str = 'stage', **args):
+        """Time the enclosed block as one span"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            finished = time.perf_counter()
+            event = {
+                'name': name,
+                'cat': category,
+                'ph': 'X',
+                'ts': round((started - self._origin) * 1e6, 1),
+                'dur': round((finished - started) * 1e6, 1),
+                'pid': self._pid,
+                'tid': threading.get_ident()
+            }
+            if args:
+                event['args'] = args
+            with self._lock:
+                self.events.append(event)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Total time and call count per span name"""
+        totals: Dict[str, Dict[str, float]] = {}
+        with self._lock:
+            events = list(self.events)
+        for event in events:
+            entry = totals.setdefault(event['name'], {'count': 0, 'seconds': 0.0})
+            entry['count'] += 1
+            entry['seconds'] += event['dur'] / 1e6
+        return totals
+
+    def write(self, path: str):
+        """Write a Chrome trace, or JSON lines when the path ends in .jsonl"""
+        with self._lock:
+            events = sorted(self.events, key=lambda e: e['ts'])
+        with open(path, 'w') as f:
+            if path.endswith('.jsonl'):
+                for event in events:
+                    f.write(json.dumps(event) + '\n')
+            else:
+                json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+
+_profiler: Optional[Profiler] = None
+
+
+def get_profiler() -> Optional[Profiler]:
+    """Return the active profiler, if profiling is enabled"""
+    return _profiler
+
+
+def set_profiler(profiler: Optional[Profiler]):
+    """Enable profiling with the given profiler, or disable it with None"""
+    global _profiler
+    _profiler = profiler
+
+
+def span(name: str, category: str = 'stage', **args):
+    """Time a block with the active profiler; a no-op when profiling is off"""
+    if _profiler is None:
+        return nullcontext()
+    return _profiler.span(name, category, **args)
+
+
+@contextmanager
+def profile_session(trace_path: Optional[str] = None, cprofile_path: Optional[str] = None):
+    """Enable span recording and/or cProfile for the enclosed block and write the results"""
+    profiler = Profiler() if trace_path else None
+    previous = get_profiler()
+    if profiler:
+        set_profiler(profiler)
+    cprofiler = cProfile.Profile() if cprofile_path else None
+    if cprofiler:
+        cprofiler.enable()
+    try:
+        yield profiler
+    finally:
+        if cprofiler:
+            cprofiler.disable()
+            cprofiler.dump_stats(cprofile_path)
+            print(f"cProfile stats written to {cprofile_path}")
+        if profiler:
+            set_profiler(previous)
+            profiler.write(trace_path)
+            print(f"\nProfile written to {trace_path}")
+            for name, entry in sorted(profiler.summary().items(), key=lambda kv: -kv[1]['seconds']):
+                print(f"  {name}: {entry['seconds']:.3f}s over {int(entry['count'])} spans")
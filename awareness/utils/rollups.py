@@ -0,0 +1,191 @@
+import glob
+import os
+import shutil
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from awareness.core.variants import flatten_variants
+from awareness.utils.serialization import RESULT_PATTERNS, dump, load
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+GRANULARITIES = ('daily', 'weekly')
+
+
+def bucket_key(timestamp: str, granularity: str) -> str:
+    """Bucket name for a result timestamp: 2024-02-26 (daily) or 2024-W09 (weekly)"""
+    moment = datetime.strptime(timestamp, TIMESTAMP_FORMAT)
+    if granularity == 'daily':
+        return moment.strftime('%Y-%m-%d')
+    if granularity == 'weekly':
+        year, week, _ = moment.isocalendar()
+        return f"{year}-W{week:02d}"
+    raise ValueError(f"Unknown granularity: {granularity}")
+
+
+def bucket_start(bucket: str, granularity: str) -> datetime:
+    """First day of a bucket named by bucket_key"""
+    if granularity == 'daily':
+        return datetime.strptime(bucket, '%Y-%m-%d')
+    if granularity == 'weekly':
+        return datetime.strptime(bucket + '-1', '%G-W%V-%u')
+    raise ValueError(f"Unknown granularity: {granularity}")
+
+
+def _first_application(entry: Dict, timestamp: str) -> bool:
+    """Remember a run's timestamp on an entry; False if that run was already folded in"""
+    applied = entry.setdefault('timestamps', [])
+    if timestamp in applied:
+        return False
+    applied.append(timestamp)
+    return True
+
+
+def _merge_rank(entry: Dict, rank: Optional[int], timestamp: str):
+    if not _first_application(entry, timestamp):
+        return
+    entry['runs'] += 1
+    if rank is not None:
+        entry['found'] += 1
+        entry['rank_sum'] += rank
+        entry['best_rank'] = rank if entry['best_rank'] is None else min(entry['best_rank'], rank)
+        entry['worst_rank'] = rank if entry['worst_rank'] is None else max(entry['worst_rank'], rank)
+    if entry['last_timestamp'] is None or timestamp >= entry['last_timestamp']:
+        entry['last_rank'] = rank
+        entry['last_timestamp'] = timestamp
+
+
+def _merge_count(entry: Dict, count: int, timestamp: str):
+    if not _first_application(entry, timestamp):
+        return
+    entry['runs'] += 1
+    entry['min_count'] = count if entry['min_count'] is None else min(entry['min_count'], count)
+    entry['max_count'] = count if entry['max_count'] is None else max(entry['max_count'], count)
+    if entry['first_timestamp'] is None or timestamp < entry['first_timestamp']:
+        entry['first_count'] = count
+        entry['first_timestamp'] = timestamp
+    if entry['last_timestamp'] is None or timestamp >= entry['last_timestamp']:
+        entry['last_count'] = count
+        entry['last_timestamp'] = timestamp
+
+
+def new_rank_entry() -> Dict:
+    return {'runs': 0, 'found': 0, 'rank_sum': 0, 'best_rank': None, 'worst_rank': None,
+            'last_rank': None, 'last_timestamp': None, 'timestamps': []}
+
+
+def new_count_entry() -> Dict:
+    return {'runs': 0, 'first_count': None, 'first_timestamp': None, 'last_count': None,
+            'last_timestamp': None, 'min_count': None, 'max_count': None, 'timestamps': []}
+
+
+def average_rank(entry: Dict) -> Optional[float]:
+    """Mean rank over the runs in which the project was found"""
+    return round(entry['rank_sum'] / entry['found'], 2) if entry['found'] else None
+
+
+def count_growth(entry: Dict) -> int:
+    """Change in result count from the first to the last run in the bucket"""
+    return entry['last_count'] - entry['first_count']
+
+
+class RollupStore:
+    """Materialized per-day and per-week aggregates of search and rank runs.
+
+    Each bucket is one JSON file (``daily/2024-02-26.json``,
+    ``weekly/2024-W09.json``) holding running sums per term and project, so a
+    new run only rewrites the buckets its timestamps fall into. Each entry
+    lists the run timestamps it has absorbed, so applying the same results
+    twice does not count them twice.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _path(self, granularity: str, bucket: str) -> str:
+        return os.path.join(self.directory, granularity, f"{bucket}.json")
+
+    def _load_bucket(self, granularity: str, bucket: str) -> Dict:
+        path = self._path(granularity, bucket)
+        if os.path.exists(path):
+            return load(path)
+        return {'granularity': granularity, 'bucket': bucket, 'rankings': {}, 'counts': {}}
+
+    def _save_bucket(self, granularity: str, data: Dict):
+        path = self._path(granularity, data['bucket'])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp'
+        dump(data, tmp_path)
+        os.replace(tmp_path, path)
+
+    def update(self, results: Dict) -> Dict[str, int]:
+        """Fold one run's results into the affected buckets; returns buckets written per granularity"""
+        written = {}
+        for granularity in GRANULARITIES:
+            buckets: Dict[str, Dict] = {}
+            for term, info in flatten_variants(results).items():
+                if not hasattr(info, 'get') or 'timestamp' not in info or info.get('carried_forward') \
+                        or 'unchanged_since' in info:
+                    continue
+                timestamp = info['timestamp']
+                key = bucket_key(timestamp, granularity)
+                if key not in buckets:
+                    buckets[key] = self._load_bucket(granularity, key)
+                data = buckets[key]
+                if 'project_rankings' in info:
+                    projects = data['rankings'].setdefault(term, {})
+                    for project, rank in info['project_rankings'].items():
+                        _merge_rank(projects.setdefault(project, new_rank_entry()), rank, timestamp)
+                elif 'count' in info:
+                    _merge_count(data['counts'].setdefault(term, new_count_entry()), info['count'], timestamp)
+            for data in buckets.values():
+                self._save_bucket(granularity, data)
+            written[granularity] = len(buckets)
+        return written
+
+    def rebuild(self, input_dir: str) -> int:
+        """Recompute every bucket from the result files in a directory; returns files read"""
+        for granularity in GRANULARITIES:
+            shutil.rmtree(os.path.join(self.directory, granularity), ignore_errors=True)
+        paths = sorted(path for pattern in RESULT_PATTERNS for path in glob.glob(os.path.join(input_dir, pattern))
+                       if not path.endswith('api_usage.json'))
+        files = 0
+        for path in paths:
+            data = load(path)
+            if isinstance(data, dict):
+                self.update(data)
+                files += 1
+        return files
+
+    def buckets(self, granularity: str) -> List[Tuple[str, Dict]]:
+        """All (bucket, data) pairs for a granularity in time order"""
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity: {granularity}")
+        paths = sorted(glob.glob(os.path.join(self.directory, granularity, '*.json')))
+        return [(os.path.splitext(os.path.basename(path))[0], load(path)) for path in paths]
+
+    def ranking_report(self, granularity: str, terms: Optional[Iterable[str]] = None) -> List[Dict]:
+        """Average, best and latest rank per bucket, term and project"""
+        wanted = set(terms) if terms is not None else None
+        rows = []
+        for bucket, data in self.buckets(granularity):
+            for term, projects in data['rankings'].items():
+                if wanted is not None and term not in wanted:
+                    continue
+                for project, entry in projects.items():
+                    rows.append({'bucket': bucket, 'term': term, 'project': project,
+                                 'runs': entry['runs'], 'found': entry['found'],
+                                 'average_rank': average_rank(entry), 'best_rank': entry['best_rank'],
+                                 'last_rank': entry['last_rank']})
+        return rows
+
+    def count_report(self, granularity: str, terms: Optional[Iterable[str]] = None) -> List[Dict]:
+        """Latest count and growth per bucket and term"""
+        wanted = set(terms) if terms is not None else None
+        rows = []
+        for bucket, data in self.buckets(granularity):
+            for term, entry in data['counts'].items():
+                if wanted is not None and term not in wanted:
+                    continue
+                rows.append({'bucket': bucket, 'term': term, 'runs': entry['runs'],
+                             'last_count': entry['last_count'], 'growth': count_growth(entry)})
+        return rows
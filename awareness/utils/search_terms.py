@@ -1,4 +1,4 @@
-from typing import List
+from typing import Dict, List
 import csv
 import json
 import yaml
@@ -75,4 +75,34 @@ class SearchTermsLoader:
                 return [str(term).strip() for term in data if str(term).strip()]
             elif isinstance(data, dict) and 'terms' in data:
                 return [str(term).strip() for term in data['terms'] if str(term).strip()]
-            raise ValueError("YAML file must contain an array or object with 'terms' key")
\ No newline at end of file
+            raise ValueError("YAML file must contain an array or object with 'terms' key")
+
+    @staticmethod
+    def load_term_groups(file_path: str) -> Dict[str, List[str]]:
+        """Load terms grouped into strata.
+
+        YAML/JSON files map group names (optionally under a 'groups' key) to
+        term lists; CSV files use the second column as the group. Ungrouped
+        terms fall into the 'all' group.
+        """
+        ext = file_path.lower().split('.')[-1]
+        if ext == 'csv':
+            groups: Dict[str, List[str]] = {}
+            with open(file_path, 'r', encoding='utf-8') as f:
+                for row in csv.reader(f):
+                    if row and row[0].strip():
+                        group = row[1].strip() if len(row) > 1 and row[1].strip() else 'all'
+                        groups.setdefault(group, []).append(row[0].strip())
+            return groups
+        if ext in ('json', 'yml', 'yaml'):
+            with open(file_path, 'r', encoding='utf-8') as f:
+                try:
+                    data = json.load(f) if ext == 'json' else yaml.safe_load(f)
+                except (json.JSONDecodeError, yaml.YAMLError) as e:
+                    raise SearchTermsLoader.InvalidFormatError(f"Invalid file format: {str(e)}")
+            if isinstance(data, dict) and isinstance(data.get('groups'), dict):
+                data = data['groups']
+            if isinstance(data, dict) and all(isinstance(terms, list) for terms in data.values()):
+                return {str(group): [str(t).strip() for t in terms if str(t).strip()]
+                        for group, terms in data.items()}
+        return {'all': SearchTermsLoader.load_terms(file_path)}
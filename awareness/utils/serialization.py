@@ -0,0 +1,66 @@
+import json
+from typing import Any, Callable, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - depends on the environment
+    msgpack = None
+
+FORMATS = ('json', 'msgpack')
+RESULT_PATTERNS = ('*.json', '*.msgpack')
+_JSON_START = tuple(b'{[ \t\r\n')
+
+
+def backend() -> str:
+    """Name of the JSON library used for decoding"""
+    return 'orjson' if orjson is not None else 'json'
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Decode JSON with orjson when installed, otherwise the standard library"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any, fmt: str = 'json', default: Optional[Callable] = None) -> bytes:
+    """Encode results for writing to disk.
+
+    JSON output always goes through the standard library with ``indent=4`` so
+    files are byte-identical whichever decoder is installed; orjson cannot
+    reproduce that layout.
+    """
+    if fmt == 'json':
+        return json.dumps(obj, indent=4, default=default).encode('utf-8')
+    if fmt == 'msgpack':
+        if msgpack is None:
+            raise ValueError("msgpack output requires the msgpack package (pip install msgpack)")
+        return msgpack.packb(obj, default=default, use_bin_type=True)
+    raise ValueError(f"Unknown output format: {fmt}")
+
+
+def dump(obj: Any, path: str, fmt: str = 'json', default: Optional[Callable] = None):
+    """Write results to a file in one write"""
+    data = dumps(obj, fmt, default)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def decode(data: bytes) -> Any:
+    """Decode a results file body, detecting JSON or msgpack from its first byte"""
+    if not data or data[0] in _JSON_START:
+        return loads(data)
+    if msgpack is None:
+        raise ValueError("File is not JSON and msgpack is not installed")
+    return msgpack.unpackb(data, raw=False)
+
+
+def load(path: str) -> Any:
+    """Read a JSON or msgpack results file"""
+    with open(path, 'rb') as f:
+        return decode(f.read())
@@ -0,0 +1,102 @@
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    term TEXT NOT NULL,
+    run_time TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    provider TEXT NOT NULL,
+    link TEXT,
+    title TEXT,
+    snippet TEXT,
+    UNIQUE (term, run_time, position, provider)
+);
+CREATE INDEX IF NOT EXISTS items_run_time ON items (run_time);
+CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+    title, snippet, link, content='items', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS items_ai AFTER INSERT ON items BEGIN
+    INSERT INTO items_fts (rowid, title, snippet, link) VALUES (new.id, new.title, new.snippet, new.link);
+END;
+"""
+
+
+def phrase_query(text: str, prefix: bool = False) -> str:
+    """An FTS5 query matching ``text`` as an exact phrase (optionally as a prefix of longer words)"""
+    quoted = '"' + text.replace('"', '""') + '"'
+    return quoted + ' *' if prefix else quoted
+
+
+class TextIndex:
+    """SQLite FTS5 index of the titles, snippets and links seen in rank runs.
+
+    Each row is keyed by term, run timestamp, position and provider, so
+    indexing the same run twice is a no-op, and phrase queries are answered
+    over the whole history without reading any result files.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Provider trackers index from their own threads; one connection behind a lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.executescript(SCHEMA)
+
+    def add(self, term: str, timestamp: str, items: Iterable, provider: str = 'google',
+            start_rank: int = 1) -> int:
+        """Index one term's result items, ranked from ``start_rank``; returns rows added"""
+        rows = [(term, timestamp, start_rank + offset, provider,
+                 item.get('link', ''), item.get('title', ''), item.get('snippet', ''))
+                for offset, item in enumerate(items)]
+        with self._lock, self._conn:
+            cursor = self._conn.executemany(
+                "INSERT OR IGNORE INTO items (term, run_time, position, provider, link, title, snippet) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            return cursor.rowcount
+
+    def search(self, query: str, term: Optional[str] = None, limit: Optional[int] = 20,
+               latest_first: bool = False) -> List[Dict]:
+        """Items matching an FTS5 query, oldest first, optionally limited to one search term"""
+        sql = ("SELECT items.term, items.run_time, items.position, items.provider, items.link, "
+               "items.title, items.snippet FROM items_fts JOIN items ON items.id = items_fts.rowid "
+               "WHERE items_fts MATCH ?")
+        params: list = [query]
+        if term is not None:
+            sql += " AND items.term = ?"
+            params.append(term)
+        sql += " ORDER BY items.run_time {0}, items.term, items.position".format('DESC' if latest_first else 'ASC')
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params)]
+
+    def first_seen(self, query: str) -> List[Dict]:
+        """Earliest match per search term, with how many runs matched since"""
+        sql = ("SELECT items.term, MIN(items.run_time) AS first_seen, MAX(items.run_time) AS last_seen, "
+               "COUNT(DISTINCT items.run_time) AS runs, MIN(items.position) AS best_position "
+               "FROM items_fts JOIN items ON items.id = items_fts.rowid "
+               "WHERE items_fts MATCH ? GROUP BY items.term ORDER BY first_seen, items.term")
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, [query])]
+
+    def stats(self) -> Dict:
+        """Item, term and run counts with the time span covered"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) AS items, COUNT(DISTINCT term) AS terms, COUNT(DISTINCT run_time) AS runs, "
+                "MIN(run_time) AS first_run, MAX(run_time) AS last_run FROM items").fetchone()
+        return dict(row)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
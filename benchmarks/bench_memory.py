@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Compare resident size of raw vs. compact rank results.
+
+Builds the data a large rank run would hold in memory -- full Custom Search
+items and nested result dicts -- and the compact equivalents (field-stripped
+SearchItem objects and __slots__ records), and reports tracemalloc totals.
+
+    python benchmarks/bench_memory.py --terms 2000
+"""
+import argparse
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from awareness.core.records import SearchItem, ProjectMatch, RankResult
+
+TIMESTAMP = '2024-11-26 10:30:45'
+
+
+def raw_item(i):
+    """An item shaped like a real customsearch/v1 response entry"""
+    return {
+        'kind': 'customsearch#result',
+        'title': f'Result {i} - Example Project Documentation',
+        'htmlTitle': f'Result {i} - Example <b>Project</b> Documentation',
+        'link': f'https://example{i}.com/docs/getting-started',
+        'displayLink': f'example{i}.com',
+        'snippet': f'Snippet {i}: learn how to install and configure the project in minutes.',
+        'htmlSnippet': f'Snippet {i}: learn how to <b>install</b> and configure the project in minutes.',
+        'formattedUrl': f'https://example{i}.com/docs/getting-started',
+        'htmlFormattedUrl': f'https://example{i}.com/<b>docs</b>/getting-started',
+        'pagemap': {
+            'cse_thumbnail': [{'src': f'https://encrypted-tbn0.gstatic.com/images?q={i}',
+                               'width': '225', 'height': '225'}],
+            'metatags': [{'og:title': f'Result {i}', 'og:description': 'A' * 120,
+                          'og:image': f'https://example{i}.com/og.png', 'viewport': 'width=device-width'}],
+            'cse_image': [{'src': f'https://example{i}.com/og.png'}]
+        }
+    }
+
+
+def build_raw(terms, projects):
+    items = {term: [raw_item(i) for i in range(100)] for term in range(terms)}
+    results = {
+        f'term {term}': {
+            'total_results': 1234567,
+            'project_rankings': {p: 15 for p in projects},
+            'project_matches': {p: [{'rank': 15, 'match': 'owned'}] for p in projects},
+            # One timestamp string per run, shared by every term as before
+            'timestamp': TIMESTAMP
+        } for term in range(terms)
+    }
+    return items, results
+
+
+def build_compact(terms, projects):
+    items = {term: [SearchItem.from_api(raw_item(i)) for i in range(100)] for term in range(terms)}
+    results = {
+        f'term {term}': RankResult(1234567, {p: 15 for p in projects},
+                                   {p: [ProjectMatch(15, 'owned')] for p in projects}, TIMESTAMP)
+        for term in range(terms)
+    }
+    return items, results
+
+
+def measure(builder, terms, projects):
+    tracemalloc.start()
+    data = builder(terms, projects)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del data
+    return current
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Memory benchmark for rank results')
+    parser.add_argument('--terms', type=int, default=500, help='Number of terms (default: 500)')
+    parser.add_argument('--projects', type=int, default=5, help='Projects per term (default: 5)')
+    args = parser.parse_args()
+    projects = [f'project{i}' for i in range(args.projects)]
+
+    raw = measure(build_raw, args.terms, projects)
+    compact = measure(build_compact, args.terms, projects)
+    print(f"Terms: {args.terms}, items per term: 100, projects: {args.projects}")
+    print(f"Raw items + dict results:        {raw / 1e6:8.1f} MB")
+    print(f"SearchItem + __slots__ records:  {compact / 1e6:8.1f} MB")
+    print(f"Saved: {(1 - compact / raw) * 100:.0f}%")
+
+
+if __name__ == '__main__':
+    main()
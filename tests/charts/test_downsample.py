@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from awareness.charts.downsample import downsample, lttb, minmax
+
+def test_short_series_are_untouched():
+    x, y = [1, 2, 3], [5, 1, 7]
+    assert downsample(x, y, max_points=10) == (x, y)
+    assert list(minmax(x, y, 10)) == [0, 1, 2]
+    assert list(lttb(x, y, 10)) == [0, 1, 2]
+
+def test_minmax_keeps_every_spike():
+    rng = np.random.default_rng(1)
+    ranks = rng.integers(1, 5, 100_000).astype(float)
+    spikes = [17, 50_001, 99_998]
+    ranks[spikes] = 100
+    keep = minmax(np.arange(len(ranks)), ranks, max_points=200)
+    assert len(keep) <= 202
+    assert np.all(np.diff(keep) > 0)
+    assert set(spikes) <= set(keep.tolist())
+    assert keep[0] == 0 and keep[-1] == len(ranks) - 1
+
+def test_lttb_keeps_endpoints_and_peak():
+    x = np.arange(10_000)
+    y = np.sin(x / 500.0)
+    y[4321] = 50
+    keep = lttb(x, y, max_points=300)
+    assert len(keep) == 300
+    assert keep[0] == 0 and keep[-1] == 9_999
+    assert np.all(np.diff(keep) > 0)
+    assert 4321 in keep
+
+def test_downsample_lists_and_arrays():
+    x = [f"day {i}" for i in range(5000)]
+    y = [i % 7 for i in range(5000)]
+    small_x, small_y = downsample(x, y, max_points=100)
+    assert len(small_x) == len(small_y) <= 102
+    assert all(y[x.index(label)] == value for label, value in zip(small_x, small_y))
+
+    arr_x, arr_y = downsample(np.arange(5000), np.arange(5000.0), max_points=50, method='lttb')
+    assert isinstance(arr_x, np.ndarray) and len(arr_y) == 50
+    assert downsample(x, y, max_points=100, method='none') == (x, y)
+    with pytest.raises(ValueError):
+        downsample(x, y, method='average')
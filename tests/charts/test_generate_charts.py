@@ -5,8 +5,12 @@ from awareness.charts.generate_charts import (
     load_json_files,
     generate_search_count_chart,
     generate_ranking_charts,
-    format_number
+    format_number,
+    generate_history_charts,
+    generate_rollup_charts
 )
+from awareness.utils.history_store import HistoryStore
+from awareness.utils.rollups import RollupStore
 
 @pytest.fixture
 def sample_data_dir(tmp_path):
@@ -77,6 +81,17 @@ def test_load_json_files(sample_data_dir):
     assert "python web framework" in ranking_data
     assert ranking_data["python web framework"]["project_rankings"]["Django"] == 1
 
+def test_load_json_files_skips_reports(sample_data_dir, output_dir):
+    estimates = {'timestamp': '2024-02-26 10:30:45', 'run': 3, 'budget': 2, 'confidence': 0.95,
+                 'groups': {'web': {'total_count': 1000, 'terms': 4}}, 'overall': {'total_count': 1000}}
+    discovery = {'timestamp': '2024-02-26 10:30:45', 'items_seen': 20, 'run': [{'key': 'example.com'}]}
+    (sample_data_dir / 'estimates.json').write_text(json.dumps(estimates))
+    (sample_data_dir / 'discovery.json').write_text(json.dumps(discovery))
+    data = load_json_files(str(sample_data_dir))
+    assert sorted(data) == ['project_rankings.json', 'search_results.json']
+    generate_search_count_chart(data, str(output_dir))
+    generate_ranking_charts(data, str(output_dir))
+
 def test_generate_search_count_chart(sample_data_dir, output_dir):
     data = load_json_files(str(sample_data_dir))
     generate_search_count_chart(data, str(output_dir))
@@ -150,4 +165,160 @@ def test_api_usage_json_ignored(sample_data_dir):
         json.dump(api_usage, f)
     
     data = load_json_files(str(sample_data_dir))
-    assert "api_usage.json" not in data
\ No newline at end of file
+    assert "api_usage.json" not in data
+
+def test_generate_history_charts(tmp_path, output_dir):
+    store = HistoryStore(str(tmp_path / "history"))
+    for timestamp, rank in [("2024-02-26 10:30:45", 4), ("2024-02-27 10:30:45", None)]:
+        store.append_results({
+            "python web framework": {
+                "total_results": 1234567,
+                "project_rankings": {"Django": rank, "Flask": 3},
+                "timestamp": timestamp
+            }
+        })
+    generate_history_charts(HistoryStore(str(tmp_path / "history")), str(output_dir))
+    assert (output_dir / "rankings_history_python web framework.png").exists()
+
+def test_load_msgpack_results(sample_data_dir):
+    msgpack = pytest.importorskip("msgpack")
+    with open(sample_data_dir / "rankings.msgpack", "wb") as f:
+        f.write(msgpack.packb({"term": {"total_results": 5, "project_rankings": {"A": 2},
+                                        "timestamp": "2024-02-26 10:30:45"}}))
+    data = load_json_files(str(sample_data_dir))
+    assert data["rankings.msgpack"]["term"]["project_rankings"] == {"A": 2}
+    assert "search_results.json" in data
+
+def test_generate_rollup_charts(tmp_path, output_dir):
+    store = RollupStore(str(tmp_path / "rollups"))
+    for timestamp, rank, count in [("2024-02-26 10:30:45", 4, 1000), ("2024-02-27 10:30:45", None, 1200)]:
+        store.update({"python web framework": {"total_results": 5, "project_rankings": {"Django": rank},
+                                               "timestamp": timestamp},
+                      "python tutorial": {"count": count, "timestamp": timestamp}})
+    generate_rollup_charts(store, "daily", str(output_dir))
+    assert (output_dir / "rankings_daily_python web framework.png").exists()
+    assert (output_dir / "search_counts_daily.png").exists()
+
+def test_generate_dashboard(sample_data_dir, tmp_path):
+    from awareness.charts.dashboard import generate_dashboard
+    with open(sample_data_dir / "project_rankings_day2.json", "w") as f:
+        json.dump({"python web framework": {"total_results": 1300000,
+                                            "project_rankings": {"Django": 2, "Flask": None, "FastAPI": 4},
+                                            "timestamp": "2024-02-27 10:30:45"}}, f)
+    out = tmp_path / "dashboard"
+    written = generate_dashboard(str(out), load_json_files(str(sample_data_dir)))
+
+    assert written == {'terms': 3, 'shards': 1}
+    assert (out / "index.html").exists()
+    assert not list(out.glob("*.png"))
+    with open(out / "data" / "index.json") as f:
+        index = json.load(f)
+    rows = {row['term']: row for row in index['terms']}
+    assert rows['python web framework']['latest'] == {'Django': 2, 'FastAPI': 4, 'Flask': None}
+    assert rows['python web framework']['runs'] == 2
+    assert rows['python tutorial']['count'] == 800000
+    with open(out / "data" / f"shard_{rows['python web framework']['shard']:03d}.json") as f:
+        shard = json.load(f)
+    assert shard['python web framework']['rankings']['Django'] == [
+        ["2024-02-26 10:30:45", 1], ["2024-02-27 10:30:45", 2]]
+
+def test_dashboard_shards_scale_with_terms(tmp_path):
+    from awareness.charts.dashboard import SHARD_TERMS, generate_dashboard
+    results = {f"term {i}": {"count": i, "timestamp": "2024-02-26 10:30:45"} for i in range(SHARD_TERMS * 4)}
+    out = tmp_path / "dashboard"
+    written = generate_dashboard(str(out), {"counts.json": results})
+    shard_files = list((out / "data").glob("shard_*.json"))
+    assert written['terms'] == SHARD_TERMS * 4
+    assert len(shard_files) == written['shards'] <= 4
+
+    # A smaller rebuild removes shards that are no longer referenced
+    generate_dashboard(str(out), {"counts.json": {"one": {"count": 1, "timestamp": "2024-02-26 10:30:45"}}})
+    assert len(list((out / "data").glob("shard_*.json"))) == 1
+
+def test_dashboard_from_rollups(tmp_path):
+    from awareness.charts.dashboard import generate_dashboard
+    store = RollupStore(str(tmp_path / "rollups"))
+    for timestamp, rank in [("2024-02-26 10:30:45", 4), ("2024-02-26 18:30:45", 2)]:
+        store.update({"python web framework": {"total_results": 5, "project_rankings": {"Django": rank},
+                                               "timestamp": timestamp}})
+    out = tmp_path / "dashboard"
+    generate_dashboard(str(out), store=store, granularity="daily")
+    with open(out / "data" / "shard_000.json") as f:
+        assert json.load(f)["python web framework"]["rankings"]["Django"] == [["2024-02-26", 3.0]]
+
+def test_variant_matrix_charts(tmp_path, output_dir):
+    from awareness.charts.generate_charts import facet_variants, generate_variant_charts
+    matrix = {"python web framework": {
+        "us": {"total_results": 10, "project_rankings": {"Django": 1, "Flask": 4}, "timestamp": "2024-02-26 10:30:45"},
+        "de": {"total_results": 8, "project_rankings": {"Django": 2, "Flask": None}, "timestamp": "2024-02-26 10:30:45"},
+    }}
+    counts = {"python": {"us": {"count": 10, "timestamp": "2024-02-26 10:30:45"},
+                         "de": {"count": 7, "timestamp": "2024-02-26 10:30:45"}}}
+    data = {"rankings.json": matrix, "counts.json": counts}
+
+    faceted = facet_variants(data)
+    assert set(faceted) == {"rankings_us.json", "rankings_de.json", "counts_us.json", "counts_de.json"}
+    assert faceted["rankings_de.json"]["python web framework"]["project_rankings"]["Django"] == 2
+
+    generate_variant_charts(data, str(output_dir))
+    assert (output_dir / "rankings_variants_python web framework_rankings.png").exists()
+    assert (output_dir / "search_counts_variants_counts.png").exists()
+
+def test_generate_ranking_grid(output_dir):
+    from awareness.charts.generate_charts import generate_ranking_grid, grid_shape
+    results = {f"term {i}": {"total_results": 1000 * i, "project_rankings": {"Django": i % 7 + 1, "Flask": None},
+                             "timestamp": "2024-02-26 10:30:45"} for i in range(7)}
+    results["term 3"]["carried_forward"] = True
+    results["python"] = {"count": 5, "timestamp": "2024-02-26 10:30:45"}
+
+    pages = generate_ranking_grid({"rankings.json": results}, str(output_dir), per_page=4)
+
+    assert grid_shape(4) == (4, 1)
+    assert grid_shape(12) == (4, 3)
+    assert pages == 2
+    assert sorted(p.name for p in output_dir.iterdir()) == [
+        "rankings_grid_rankings_001.png", "rankings_grid_rankings_002.png"]
+
+def test_pdf_format_writes_single_file(sample_data_dir, tmp_path, monkeypatch, capsys):
+    from awareness.charts.generate_charts import main
+    out = tmp_path / "pdf"
+    monkeypatch.setattr('sys.argv', ['generate_charts', '--input-dir', str(sample_data_dir),
+                                     '--output-dir', str(out), '--format', 'pdf'])
+    main()
+    assert [p.name for p in out.iterdir()] == ["charts.pdf"]
+    # One search count chart and one ranking grid page
+    assert "2 chart pages have been written" in capsys.readouterr().out
+
+def test_pdf_format_with_rollups(tmp_path, monkeypatch, capsys):
+    from awareness.charts.generate_charts import main
+    store = RollupStore(str(tmp_path / "rollups"))
+    store.update({"python web framework": {"total_results": 5, "project_rankings": {"Django": 4},
+                                           "timestamp": "2024-02-26 10:30:45"},
+                  "python tutorial": {"count": 1000, "timestamp": "2024-02-26 10:30:45"}})
+    out = tmp_path / "pdf"
+    monkeypatch.setattr('sys.argv', ['generate_charts', '--granularity', 'daily', '--rollup-dir', store.directory,
+                                     '--output-dir', str(out), '--format', 'pdf'])
+    main()
+    assert [p.name for p in out.iterdir()] == ["charts.pdf"]
+    assert "2 chart pages have been written" in capsys.readouterr().out
+
+def test_rollup_charts_downsample_long_series(tmp_path, output_dir, monkeypatch):
+    from datetime import date, timedelta
+    import awareness.charts.generate_charts as charts
+    store = RollupStore(str(tmp_path / "rollups"))
+    for day in range(120):
+        timestamp = f"{date(2024, 1, 1) + timedelta(days=day)} 10:30:45"
+        rank = 100 if day == 77 else 3
+        store.update({"python web framework": {"total_results": 5, "project_rankings": {"Django": rank},
+                                               "timestamp": timestamp}})
+    lines = []
+    real_plot = charts.plt.plot
+    monkeypatch.setattr(charts.plt, 'plot', lambda x, y, **kwargs: lines.append((x, y)) or real_plot(x, y, **kwargs))
+
+    generate_rollup_charts(store, "daily", str(output_dir), max_points=20)
+
+    x, y = lines[0]
+    assert len(y) <= 22
+    # The one bad day survives downsampling
+    assert 100 in y
+    assert x[0].year == 2024
@@ -0,0 +1,79 @@
+import random
+import pytest
+from awareness.core.discovery import (CompetitorDiscovery, CountMinSketch, HeavyHitters, item_key,
+                                      position_weight)
+from awareness.core.matcher import ProjectMatcher
+
+
+def page(*links):
+    return [{'title': '', 'snippet': '', 'link': link} for link in links]
+
+
+def test_item_key_normalizes_domains_and_repos():
+    assert item_key('https://www.Example.com/blog/post') == 'example.com'
+    assert item_key('https://github.com/Pallets/Flask/issues/1') == 'github.com/pallets/flask'
+    assert item_key('https://github.com/pallets') is None
+    assert item_key('') is None
+    assert position_weight(4) == 0.25
+
+
+def test_count_min_sketch_never_undercounts():
+    sketch = CountMinSketch(width=64, depth=4)
+    truth = {}
+    rng = random.Random(1)
+    for _ in range(2000):
+        key = f"site{rng.randint(0, 300)}.com"
+        truth[key] = truth.get(key, 0) + 1
+        sketch.add(key)
+    assert all(sketch.estimate(key) >= count for key, count in truth.items())
+
+
+def test_heavy_hitters_bounded_and_accurate():
+    hitters = HeavyHitters(k=5, width=1024, depth=4)
+    rng = random.Random(2)
+    stream = [f"heavy{i}.com" for i in range(3) for _ in range(200)]
+    stream += [f"tail{rng.randint(0, 5000)}.com" for _ in range(3000)]
+    rng.shuffle(stream)
+    for key in stream:
+        hitters.add(key)
+    assert len(hitters.candidates) <= 5
+    top = hitters.top(3)
+    assert sorted(row['key'] for row in top) == ['heavy0.com', 'heavy1.com', 'heavy2.com']
+    assert all(200 <= row['score'] < 220 for row in top)
+
+
+def test_heavy_hitters_merge_and_persist(tmp_path):
+    first, second = HeavyHitters(k=3), HeavyHitters(k=3)
+    first.add('a.com', 2.0, rank=3)
+    first.add('b.com', 1.0, rank=5)
+    second.add('b.com', 4.0, rank=1)
+    second.add('c.com', 0.5, rank=9)
+    first.merge(second)
+    assert [(row['key'], row['score'], row['best_rank']) for row in first.top()] == [
+        ('b.com', 5.0, 1), ('a.com', 2.0, 3), ('c.com', 0.5, 9)]
+
+    path = str(tmp_path / 'state' / 'discovery.npz')
+    first.save(path)
+    loaded = HeavyHitters.load(path)
+    assert loaded.top() == first.top()
+    assert loaded.total == 7.5
+    with pytest.raises(ValueError):
+        loaded.sketch.merge(CountMinSketch(width=16))
+
+
+def test_discovery_skips_tracked_projects():
+    matcher = ProjectMatcher.from_projects(['flask', {'name': 'Django', 'domains': ['djangoproject.com']}])
+    discovery = CompetitorDiscovery(matcher, k=10)
+    discovery.feed(page('https://docs.djangoproject.com/en/5.0/',
+                        'https://github.com/pallets/flask',
+                        'https://fastapi.tiangolo.com/',
+                        'https://github.com/encode/starlette'), 1)
+    discovery.feed(page('https://fastapi.tiangolo.com/tutorial/'), 11)
+    report = discovery.report(top=5)
+
+    assert report['items_seen'] == 5
+    rows = {row['key']: row for row in report['run']}
+    assert set(rows) == {'fastapi.tiangolo.com', 'github.com/encode/starlette'}
+    assert rows['fastapi.tiangolo.com']['score'] == round(1 / 3 + 1 / 11, 3)
+    assert rows['fastapi.tiangolo.com']['best_rank'] == 3
+    assert rows['github.com/encode/starlette']['kind'] == 'repo'
@@ -0,0 +1,39 @@
+import json
+from awareness.core.fingerprints import FingerprintStore, result_fingerprint
+from awareness.core.records import UnchangedResult, counts_from_rankings, result_default
+from awareness.utils.rollups import RollupStore
+
+ITEMS = [{'link': 'https://a.example'}, {'link': 'https://b.example'}]
+
+
+def test_fingerprint_depends_on_link_order_and_ranks():
+    base = result_fingerprint(ITEMS, {'Django': 1, 'Flask': None})
+    assert len(base) == 16
+    assert result_fingerprint(list(ITEMS), {'Flask': None, 'Django': 1}) == base
+    assert result_fingerprint(ITEMS[::-1], {'Django': 1, 'Flask': None}) != base
+    assert result_fingerprint(ITEMS, {'Django': 2, 'Flask': None}) != base
+
+
+def test_store_reports_first_run_of_unchanged_result(tmp_path):
+    path = str(tmp_path / 'state' / 'fingerprints.json')
+    store = FingerprintStore(path)
+    assert store.check('google', 'term', 'aaaa', '2024-02-25 10:00:00') is None
+    assert store.check('google', 'term', 'aaaa', '2024-02-26 10:00:00') == '2024-02-25 10:00:00'
+    # Namespaces (providers, groups) are tracked separately
+    assert store.check('searxng', 'term', 'aaaa', '2024-02-26 10:00:00') is None
+    store.save()
+
+    reloaded = FingerprintStore(path)
+    assert reloaded.check('google', 'term', 'aaaa', '2024-02-27 10:00:00') == '2024-02-25 10:00:00'
+    assert reloaded.check('google', 'term', 'bbbb', '2024-02-27 10:00:00') is None
+    assert reloaded.check('google', 'term', 'bbbb', '2024-02-28 10:00:00') == '2024-02-27 10:00:00'
+
+
+def test_unchanged_records_are_skipped_downstream(tmp_path):
+    record = UnchangedResult('2024-02-25 10:00:00', 'aaaa', '2024-02-26 10:00:00')
+    assert json.loads(json.dumps({'t': record}, default=result_default)) == {'t': {
+        'unchanged_since': '2024-02-25 10:00:00', 'fingerprint': 'aaaa', 'timestamp': '2024-02-26 10:00:00'}}
+    assert counts_from_rankings({'t': record})['t'] is record
+
+    store = RollupStore(str(tmp_path / 'rollups'))
+    assert store.update({'t': record}) == {'daily': 0, 'weekly': 0}
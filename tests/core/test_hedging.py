@@ -0,0 +1,125 @@
+import threading
+import time
+import pytest
+from awareness.core.hedging import HedgePolicy
+
+def warmed(latency=0.01, **kwargs):
+    policy = HedgePolicy(**kwargs)
+    for _ in range(policy.min_samples):
+        policy.observe(latency)
+    return policy
+
+def test_delay_needs_min_samples():
+    policy = HedgePolicy(min_samples=5, min_delay=0)
+    for latency in (0.1, 0.2, 0.3, 0.4):
+        policy.observe(latency)
+    assert policy.delay() is None
+    policy.observe(1.0)
+    assert policy.delay() == 0.4
+
+def test_delay_has_a_floor():
+    assert warmed(0.001, min_delay=0.05).delay() == 0.05
+
+def test_invalid_percentile():
+    with pytest.raises(ValueError):
+        HedgePolicy(percentile=95)
+
+def test_fast_request_is_not_hedged():
+    policy = warmed()
+    hedges = []
+    assert policy.run(lambda: 'ok', lambda: hedges.append(1)) == 'ok'
+    assert hedges == []
+    assert policy.hedged == 0
+
+def test_no_hedging_without_history():
+    policy = HedgePolicy(min_samples=3)
+    calls = []
+    def send():
+        calls.append(1)
+        time.sleep(0.02)
+        return 'ok'
+    assert policy.run(send) == 'ok'
+    assert len(calls) == 1
+    assert len(policy.latencies) == 1
+
+def test_slow_primary_loses_to_duplicate():
+    policy = warmed()
+    release = threading.Event()
+    calls = []
+    def send():
+        calls.append(1)
+        if len(calls) == 1:
+            release.wait(2)
+            return 'primary'
+        return 'backup'
+    hedges = []
+    assert policy.run(send, lambda: hedges.append(1)) == 'backup'
+    release.set()
+    assert (policy.hedged, policy.won, policy.wasted) == (1, 1, 0)
+    assert hedges == [1]
+    assert 'answered first by the duplicate' in policy.describe()
+
+def test_losing_response_is_closed_and_close_releases_workers():
+    policy = warmed()
+    release, closed = threading.Event(), threading.Event()
+
+    class Response:
+        def __init__(self, name):
+            self.name = name
+
+        def close(self):
+            closed.set()
+
+    calls = []
+    def send():
+        calls.append(1)
+        if len(calls) == 1:
+            release.wait(2)
+            return Response('primary')
+        return Response('backup')
+    outcomes = []
+    assert policy.run(send, on_outcome=outcomes.append).name == 'backup'
+    assert outcomes == ['won']
+    policy.close()
+    assert policy._pool is None
+    release.set()
+    assert closed.wait(2)
+
+def test_duplicate_is_wasted_when_primary_finishes_first():
+    policy = warmed(min_delay=0.02)
+    calls = []
+    def send():
+        calls.append(1)
+        if len(calls) == 1:
+            time.sleep(0.06)
+            return 'primary'
+        time.sleep(1)
+        return 'backup'
+    assert policy.run(send) == 'primary'
+    assert (policy.hedged, policy.won, policy.wasted) == (1, 0, 1)
+
+def test_failed_copy_falls_back_to_the_other():
+    policy = warmed()
+    calls = []
+    def send():
+        calls.append(1)
+        if len(calls) == 1:
+            time.sleep(0.1)
+            return 'primary'
+        raise ConnectionError('reset')
+    assert policy.run(send) == 'primary'
+
+def test_cap_limits_duplicates_per_run():
+    policy = warmed(max_extra=1)
+    def slow():
+        time.sleep(0.08)
+        return 'ok'
+    hedges = []
+    for _ in range(3):
+        assert policy.run(slow, lambda: hedges.append(1)) == 'ok'
+    assert hedges == [1]
+    assert policy.summary()['hedged'] == 1
+    policy.reset()
+    assert policy.summary() == {'hedged': 0, 'won': 0, 'wasted': 0, 'cap': 1, 'delay': None}
+    # The latency window survives a reset
+    assert len(policy.latencies) >= policy.min_samples
@@ -0,0 +1,95 @@
+import pytest
+from awareness.core.matcher import (
+    ProjectMatcher, ProjectRule, load_project_groups, load_project_rules, normalize_url, tokenize
+)
+from awareness.core.project_rank_tracker import ProjectRankTracker
+
+@pytest.fixture
+def matcher():
+    return ProjectMatcher.from_projects([
+        {'name': 'PyTorch', 'domains': ['pytorch.org'], 'repos': ['pytorch/pytorch'], 'tokens': ['pytorch']},
+        {'name': 'Transformers', 'domains': ['huggingface.co/docs/transformers'],
+         'repos': ['huggingface/transformers'], 'tokens': ['hugging face transformers']},
+        'torch'
+    ])
+
+def test_tokenize_keeps_project_names():
+    assert tokenize('Node.js, C++ and my_project.') == ['node.js', 'c++', 'and', 'my_project']
+
+def test_normalize_url():
+    assert normalize_url('https://WWW.PyTorch.org/docs/stable/') == ('pytorch.org', ('docs', 'stable'))
+    assert normalize_url('github.com/pytorch') == ('github.com', ('pytorch',))
+
+def test_plain_name_does_not_match_substring(matcher):
+    item = {'title': 'PyTorch tutorials', 'snippet': 'Learn pytorch', 'link': 'https://pytorch.org/tutorials'}
+    assert matcher.match_item(item) == {'PyTorch': 'owned'}
+
+def test_plain_name_matches_whole_token(matcher):
+    item = {'title': 'Why torch.compile is fast', 'snippet': '', 'link': 'https://blog.example.com/torch'}
+    assert matcher.match_item(item) == {'torch': 'mentioned'}
+
+def test_owned_subdomain_and_repo_paths(matcher):
+    assert matcher.match_item({'link': 'https://docs.pytorch.org/x'}) == {'PyTorch': 'owned'}
+    assert matcher.match_item({'link': 'https://github.com/pytorch/vision'}) == {}
+    assert matcher.match_item({'link': 'https://github.com/PyTorch/PyTorch/issues'}) == {'PyTorch': 'owned'}
+
+def test_domain_path_prefix(matcher):
+    assert matcher.match_item({'link': 'https://huggingface.co/docs/transformers/index'}) == {
+        'Transformers': 'owned'}
+    assert matcher.match_item({'link': 'https://huggingface.co/docs/diffusers'}) == {}
+
+def test_phrase_tokens(matcher):
+    item = {'title': 'Fine-tuning with Hugging Face Transformers', 'snippet': '', 'link': 'https://blog.dev/a'}
+    assert matcher.match_item(item) == {'Transformers': 'mentioned'}
+    item = {'title': 'Hugging Face datasets', 'snippet': '', 'link': 'https://blog.dev/b'}
+    assert matcher.match_item(item) == {}
+
+def test_find_matches_lists_every_position(matcher):
+    items = [
+        {'title': 'Install pytorch', 'snippet': '', 'link': 'https://blog.dev/install'},
+        {'title': 'Random', 'snippet': '', 'link': 'https://example.com'},
+        {'title': 'PyTorch', 'snippet': '', 'link': 'https://pytorch.org'}
+    ]
+    matches = matcher.find_matches(items)
+    assert matches['PyTorch'] == [{'rank': 1, 'match': 'mentioned'}, {'rank': 3, 'match': 'owned'}]
+    assert matches['torch'] == []
+    assert matcher.find_ranks(items) == {'PyTorch': 1, 'Transformers': None, 'torch': None}
+
+def test_rule_without_criteria_uses_name():
+    rule = ProjectRule.from_spec({'name': 'Flask'})
+    assert rule.tokens == ['Flask']
+    with pytest.raises(ValueError):
+        ProjectRule.from_spec({'domains': ['flask.dev']})
+
+def test_many_projects():
+    matcher = ProjectMatcher.from_projects(
+        [{'name': f'project{i}', 'domains': [f'project{i}.io']} for i in range(5000)])
+    assert matcher.match_item({'link': 'https://docs.project4321.io/start'}) == {'project4321': 'owned'}
+
+def test_load_project_rules(tmp_path):
+    rules_file = tmp_path / 'projects.yml'
+    rules_file.write_text("- name: Django\n  domains: [djangoproject.com]\n- Flask\n")
+    assert load_project_rules(str(rules_file)) == [{'name': 'Django', 'domains': ['djangoproject.com']}, 'Flask']
+    rules_file.write_text("projects: []\n")
+    with pytest.raises(ValueError):
+        load_project_rules(str(rules_file))
+
+def test_tracker_reports_all_matches():
+    tracker = ProjectRankTracker('test_key', 'test_cx', [
+        {'name': 'Django', 'domains': ['djangoproject.com'], 'tokens': ['django']}])
+    search_data = {'items': [
+        {'title': 'Django vs Flask', 'snippet': '', 'link': 'https://blog.dev/compare'},
+        {'title': 'Django', 'snippet': '', 'link': 'https://www.djangoproject.com/'}
+    ]}
+    assert tracker._find_project_ranks(search_data) == {'Django': 1}
+    assert tracker._find_project_matches(search_data)['Django'] == [
+        {'rank': 1, 'match': 'mentioned'}, {'rank': 2, 'match': 'owned'}]
+
+def test_load_project_groups(tmp_path):
+    groups_file = tmp_path / 'groups.yml'
+    groups_file.write_text("groups:\n  web: [django]\n  ml:\n    projects: [pytorch]\n    num_results: 30\n")
+    assert load_project_groups(str(groups_file)) == {
+        'web': ['django'], 'ml': {'projects': ['pytorch'], 'num_results': 30}}
+    groups_file.write_text("groups:\n  web: []\n")
+    with pytest.raises(ValueError):
+        load_project_groups(str(groups_file))
@@ -0,0 +1,117 @@
+import json
+import threading
+import time
+import pytest
+from awareness.core.pipeline import Pipeline, PartialOutput
+from awareness.core.records import RankResult
+
+def test_items_flow_through_stages_in_order():
+    seen = []
+    pipeline = Pipeline(depth=2).add('double', lambda x: x * 2).add('odd', lambda x: x if x % 4 else None)
+    pipeline.add('collect', seen.append)
+    pipeline.run(range(10))
+    assert seen == [2, 6, 10, 14, 18]
+    summary = pipeline.summary()
+    assert [(s['stage'], s['items']) for s in summary['stages']] == [
+        ('fetch', 10), ('double', 10), ('odd', 10), ('collect', 5)]
+
+def test_backpressure_bounds_items_in_flight():
+    depth = 2
+    produced, consumed = [], []
+    in_flight = []
+
+    def source():
+        for i in range(20):
+            produced.append(i)
+            in_flight.append(len(produced) - len(consumed))
+            yield i
+
+    def slow(item):
+        time.sleep(0.005)
+        consumed.append(item)
+
+    pipeline = Pipeline(depth=depth).add('slow', slow)
+    pipeline.run(source())
+    assert consumed == list(range(20))
+    # The queue, the item being handled and the one being produced
+    assert max(in_flight) <= depth + 2
+    assert pipeline.source.blocked > 0
+
+def test_stages_overlap():
+    def source():
+        for i in range(8):
+            time.sleep(0.02)
+            yield i
+
+    def stage(item):
+        time.sleep(0.02)
+        return item
+
+    pipeline = Pipeline().add('one', stage).add('two', stage)
+    pipeline.run(source())
+    # Sequentially this would take 3 x 8 x 20ms
+    assert pipeline.wall < 0.4
+    assert 'Pipeline:' in pipeline.describe()
+
+def test_stage_errors_drop_the_item():
+    errors, seen = [], []
+
+    def fragile(item):
+        if item == 2:
+            raise ValueError('bad item')
+        return item
+
+    pipeline = Pipeline(on_error=lambda stage, item, error: errors.append((stage, item, str(error))))
+    pipeline.add('fragile', fragile).add('collect', seen.append)
+    pipeline.run(range(4))
+    assert seen == [0, 1, 3]
+    assert errors == [('fragile', 2, 'bad item')]
+
+def test_failing_error_handler_does_not_deadlock():
+    seen = []
+
+    def broken_handler(stage, item, error):
+        raise RuntimeError('handler failed')
+
+    def fragile(item):
+        if item % 2:
+            raise ValueError('bad item')
+        return item
+
+    pipeline = Pipeline(depth=1, on_error=broken_handler).add('fragile', fragile).add('collect', seen.append)
+    runner = threading.Thread(target=pipeline.run, args=(range(20),), daemon=True)
+    runner.start()
+    runner.join(5)
+    assert not runner.is_alive()
+    assert seen == list(range(0, 20, 2))
+
+def test_source_error_still_drains_stages():
+    seen = []
+
+    def source():
+        yield 1
+        raise RuntimeError('fetch failed')
+
+    pipeline = Pipeline().add('collect', seen.append)
+    with pytest.raises(RuntimeError):
+        pipeline.run(source())
+    assert seen == [1]
+    assert not [t for t in threading.enumerate() if t.name.startswith('pipeline-')]
+
+def test_invalid_depth():
+    with pytest.raises(ValueError):
+        Pipeline(depth=0)
+
+def test_partial_output(tmp_path):
+    path = tmp_path / 'out' / 'rankings.json.partial.jsonl'
+    partial = PartialOutput(str(path))
+    partial.write('python', None, RankResult(10, {'Django': 1}, {'Django': []}, '2024-01-01 12:00:00'))
+    partial.write('python', {'name': 'de'}, {'unchanged_since': '2024-01-01 12:00:00'})
+    # Lines are readable before the run ends
+    with open(path) as f:
+        lines = [json.loads(line) for line in f]
+    assert lines[0]['term'] == 'python' and lines[0]['variant'] is None
+    assert lines[0]['result']['project_rankings'] == {'Django': 1}
+    assert lines[1]['variant'] == 'de'
+    partial.close(remove=True)
+    assert not path.exists()
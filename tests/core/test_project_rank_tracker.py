@@ -1,6 +1,7 @@
+import json
 import pytest
 from unittest.mock import patch, MagicMock
-from awareness.core.project_rank_tracker import ProjectRankTracker
+from awareness.core.project_rank_tracker import ProjectRankTracker, GroupRankTracker, group_output_path
 
 @pytest.fixture
 def tracker():
@@ -92,6 +93,13 @@ def test_get_search_results(mock_get, tracker, mock_search_response):
     assert len(results['items']) == 3
     assert results['searchInformation']['totalResults'] == '12345'
 
+@patch('requests.get')
+def test_get_search_results_requests_item_fields(mock_get, tracker, mock_search_response):
+    mock_get.return_value = mock_search_response
+    tracker._get_search_results('test term', num_results=10)
+    assert mock_get.call_args.kwargs['params']['fields'] == \
+        'searchInformation/totalResults,items(title,snippet,link)'
+
 @patch('requests.get')
 def test_get_search_results_pagination(mock_get, tracker, mock_search_response):
     # Set up mock to return different items for each page
@@ -158,4 +166,129 @@ def test_early_exit_optimization(mock_get, mock_input, tracker, mock_search_resp
     
     # Request 50 results, but should exit after first page since all projects are found
     results = tracker.search_project_ranks(['test term'], num_results=50)
-    assert mock_get.call_count == 1  # Only one API call needed
\ No newline at end of file
+    assert mock_get.call_count == 1  # Only one API call needed
+
+def make_page(titles):
+    response = MagicMock()
+    response.status_code = 200
+    response.json.return_value = {
+        'items': [{'title': title, 'snippet': '', 'link': ''} for title in titles],
+        'searchInformation': {'totalResults': '5000'}
+    }
+    return response
+
+@patch('requests.get')
+def test_group_ranks_share_fetches(mock_get, tmp_path):
+    page1 = [f'Result {i}' for i in range(1, 11)]
+    page1[1] = 'django tutorial'
+    page2 = [f'Result {i}' for i in range(11, 21)]
+    page2[4] = 'pytorch install'
+    page2[6] = 'flask quickstart'
+    mock_get.side_effect = [make_page(page1), make_page(page2), make_page(['unused'] * 10)]
+    tracker = GroupRankTracker('test_key', 'test_cx', {
+        'web': {'projects': ['django', 'flask'], 'num_results': 10},
+        'ml': {'projects': ['pytorch'], 'num_results': 50}
+    })
+    tracker.usage_file = str(tmp_path / 'api_usage.json')
+    tracker.daily_usage['count'] = 0
+
+    results = tracker.search_group_ranks(['python'], show_progress=False)
+
+    # web is capped at depth 10 and ml is resolved on page 2, so page 3 is never fetched
+    assert mock_get.call_count == 2
+    assert tracker.daily_usage['count'] == 2
+    assert results['web']['python']['project_rankings'] == {'django': 2, 'flask': None}
+    assert results['ml']['python']['project_rankings'] == {'pytorch': 15}
+    assert results['ml']['python']['total_results'] == 5000
+
+@patch('requests.get')
+def test_group_ranks_fetch_deepest_unresolved(mock_get, tmp_path):
+    mock_get.side_effect = [make_page([f'Result {i}' for i in range(10)]) for _ in range(3)]
+    tracker = GroupRankTracker('test_key', 'test_cx', {
+        'web': {'projects': ['django'], 'num_results': 10},
+        'ml': {'projects': ['pytorch'], 'num_results': 30}
+    })
+    tracker.usage_file = str(tmp_path / 'api_usage.json')
+    results = tracker.search_group_ranks(['python'], show_progress=False)
+    assert mock_get.call_count == 3
+    assert results['ml']['python']['project_rankings'] == {'pytorch': None}
+
+def test_group_output_path():
+    assert group_output_path('out/rankings.json', 'web') == 'out/rankings_web.json'
+    assert group_output_path('out/{group}/rankings.json', 'ml') == 'out/ml/rankings.json'
+
+@patch('requests.get')
+def test_search_project_ranks_indexes_items(mock_get, tracker, mock_search_response, tmp_path):
+    from awareness.utils.text_index import TextIndex, phrase_query
+    mock_get.return_value = mock_search_response
+    tracker.usage_file = str(tmp_path / 'api_usage.json')
+    tracker.daily_usage['count'] = 0
+    tracker.text_index = TextIndex(str(tmp_path / 'text.db'))
+
+    tracker.search_project_ranks(['test term'], num_results=10, show_progress=False)
+
+    rows = tracker.text_index.search(phrase_query('project2 documentation'))
+    assert [(r['term'], r['position'], r['provider']) for r in rows] == [('test term', 3, 'google')]
+
+@patch('requests.get')
+def test_search_project_ranks_detects_unchanged_terms(mock_get, tracker, mock_search_response, tmp_path):
+    from awareness.core.fingerprints import FingerprintStore
+    mock_get.return_value = mock_search_response
+    tracker.usage_file = str(tmp_path / 'api_usage.json')
+    tracker.daily_usage['count'] = 0
+    tracker.fingerprints = FingerprintStore(str(tmp_path / 'fingerprints.json'))
+
+    first = tracker.search_project_ranks(['test term'], num_results=10, show_progress=False)
+    second = tracker.search_project_ranks(['test term'], num_results=10, show_progress=True)
+
+    assert 'project_rankings' in first['test term']
+    assert second['test term']['unchanged_since'] == first['test term']['timestamp']
+    assert 'project_rankings' not in second['test term']
+
+@patch('requests.get')
+def test_search_project_ranks_variants(mock_get, tracker, mock_search_response, tmp_path):
+    mock_get.return_value = mock_search_response
+    tracker.usage_file = str(tmp_path / 'api_usage.json')
+    tracker.daily_usage['count'] = 0
+
+    results = tracker.search_project_ranks(['test term'], num_results=10, show_progress=False,
+                                           variants=[{'gl': 'us', 'name': 'us'}, {'hl': 'fr', 'name': 'fr'}])
+
+    assert results['test term']['us']['project_rankings'] == {'project1': 1, 'project2': 3}
+    assert set(results['test term']) == {'us', 'fr'}
+    assert [call.kwargs['params'].get('hl') for call in mock_get.call_args_list] == [None, 'fr']
+
+@patch('requests.get')
+def test_search_project_ranks_returns_plain_dicts(mock_get, tracker, mock_search_response, tmp_path):
+    mock_get.return_value = mock_search_response
+    tracker.usage_file = str(tmp_path / 'api_usage.json')
+    tracker.daily_usage['count'] = 0
+    results = tracker.search_project_ranks(['test term'], num_results=10, show_progress=False)
+    assert json.loads(json.dumps(results)) == results
+    assert results['test term']['project_matches']['project1'] == [{'rank': 1, 'match': 'mentioned'}]
+
+@patch('requests.get')
+def test_pipeline_project_ranks_matches_sequential(mock_get, tracker, mock_search_response, tmp_path):
+    from awareness.core.fingerprints import FingerprintStore
+    mock_get.return_value = mock_search_response
+    tracker.usage_file = str(tmp_path / 'api_usage.json')
+    tracker.daily_usage['count'] = 0
+    tracker.fingerprints = FingerprintStore(str(tmp_path / 'fingerprints.json'))
+    variants = [{'gl': 'us', 'name': 'us'}, {'gl': 'us', 'name': 'us-copy'}, {'hl': 'fr', 'name': 'fr'}]
+    persisted, rendered = [], []
+
+    results = tracker.pipeline_project_ranks(
+        ['alpha', 'beta'], num_results=10, show_progress=False, variants=variants, depth=1,
+        persist=lambda term, variant, record: persisted.append((term, variant['name'])),
+        render=lambda term, variant, record: rendered.append(term))
+
+    assert list(results) == ['alpha', 'beta']
+    assert results['alpha']['us']['project_rankings'] == {'project1': 1, 'project2': 3}
+    # The copy shares the first variant's fetch; fingerprints are kept per variant
+    assert results['alpha']['us-copy'] == results['alpha']['us']
+    assert mock_get.call_count == 4
+    assert tracker.daily_usage['count'] == 4
+    assert persisted == [(term, name) for term in ('alpha', 'beta') for name in ('us', 'us-copy', 'fr')]
+    assert rendered == ['alpha'] * 3 + ['beta'] * 3
+    assert set(tracker.fingerprints.data) == {'google@us', 'google@fr'}
+    assert tracker.variant is None
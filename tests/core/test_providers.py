@@ -0,0 +1,133 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import pytest
+from unittest.mock import patch
+from awareness.core.providers import (
+    GoogleProvider, SearxngProvider, build_providers, fan_out
+)
+from awareness.core.project_rank_tracker import ProjectRankTracker
+from awareness.core.search_tracker import GoogleSearchTracker
+from awareness.core.rate_controller import get_rate_controller
+
+@pytest.fixture(autouse=True)
+def no_pacing(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with patch('awareness.core.rate_controller.RateController.acquire', return_value=0):
+        yield
+
+@pytest.fixture
+def searxng_settings():
+    """Page length, last page and reported total of the stub; tests may change them"""
+    return {'per_page': 10, 'last_page': None, 'number_of_results': 4200}
+
+@pytest.fixture
+def searxng_stub(searxng_settings):
+    """A local SearXNG-style endpoint serving numbered pages of results"""
+    requests_seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            params = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+            requests_seen.append(params)
+            page = int(params.get('pageno', 1))
+            per_page, last_page = searxng_settings['per_page'], searxng_settings['last_page']
+            results = [{'title': f"{params['q']} result {i}", 'content': 'generic',
+                        'url': f'https://example{i}.com'} for i in range((page - 1) * per_page, page * per_page)]
+            if last_page is not None and page > last_page:
+                results = []
+            if page == 2 and results:
+                results[4] = {'title': 'Flask', 'content': 'micro framework', 'url': 'https://flask.palletsprojects.com'}
+            body = json.dumps({'query': params['q'], 'number_of_results': searxng_settings['number_of_results'],
+                               'results': results}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}', requests_seen
+    server.shutdown()
+    server.server_close()
+
+def test_google_provider_requests():
+    provider = GoogleProvider('key', 'cx')
+    assert provider.count_params('q')['num'] == 1
+    assert provider.page_params('q', 11, 10)['start'] == 11
+    assert provider.pages(25) == [(1, 10), (11, 10), (21, 5)]
+    assert len(provider.pages(500)) == 10
+    assert provider.total_results({'searchInformation': {'totalResults': '42'}}) == 42
+
+def test_searxng_provider_normalizes_items():
+    provider = SearxngProvider('http://localhost:8888/')
+    assert provider.url == 'http://localhost:8888/search'
+    assert provider.page_params('q', 21, 10) == {'q': 'q', 'format': 'json', 'pageno': 3}
+    data = {'results': [{'title': 'T', 'content': 'S', 'url': 'https://x.com'}]}
+    assert provider.items(data) == [{'title': 'T', 'snippet': 'S', 'link': 'https://x.com'}]
+    assert provider.total_results(data) is None
+    assert provider.total_results(dict(data, number_of_results=0)) is None
+    assert provider.total_results(dict(data, number_of_results=4200)) == 4200
+    assert len(provider.pages(10)) == 10
+
+def test_build_providers_validates_settings():
+    assert [p.name for p in build_providers(['google', 'searxng'], 'k', 'cx', 'http://s')] == ['google', 'searxng']
+    with pytest.raises(ValueError):
+        build_providers(['google'])
+    with pytest.raises(ValueError):
+        build_providers(['searxng'], 'k', 'cx')
+
+def test_rank_against_local_stub(searxng_stub):
+    url, requests_seen = searxng_stub
+    tracker = ProjectRankTracker(None, None, ['Flask', 'Django'], provider=SearxngProvider(url))
+    results = tracker.search_project_ranks(['python web framework'], num_results=30, show_progress=False)
+
+    record = results['python web framework']
+    assert record['total_results'] == 4200
+    assert record['project_rankings'] == {'Flask': 15, 'Django': None}
+    assert [r['pageno'] for r in requests_seen] == ['1', '2', '3']
+    # Unbilled providers leave the quota ledger alone and use their own rate controller
+    assert tracker.daily_usage['count'] == 0
+    assert tracker.rate_controller is get_rate_controller('searxng')
+    assert tracker.rate_controller is not get_rate_controller('google')
+
+def test_rank_paginates_by_page_number(searxng_stub, searxng_settings):
+    url, requests_seen = searxng_stub
+    searxng_settings.update(per_page=6, last_page=4, number_of_results=0)
+    tracker = ProjectRankTracker(None, None, ['Flask', 'Django'], provider=SearxngProvider(url))
+    results = tracker.search_project_ranks(['python web framework'], num_results=100, show_progress=False)
+
+    record = results['python web framework']
+    # Short pages do not stop the run early; the empty fifth page ends it
+    assert record['project_rankings'] == {'Flask': 11, 'Django': None}
+    assert [r['pageno'] for r in requests_seen] == ['1', '2', '3', '4', '5']
+    assert record['total_results'] is None
+
+def test_search_leaves_out_unreported_counts(searxng_stub, searxng_settings):
+    url, _ = searxng_stub
+    searxng_settings['number_of_results'] = 0
+    tracker = GoogleSearchTracker(None, None, provider=SearxngProvider(url))
+    assert tracker.search(['term one'], show_progress=False) == {}
+
+def test_fan_out_keeps_results_per_provider(searxng_stub):
+    url, _ = searxng_stub
+    trackers = {name: GoogleSearchTracker(None, None, provider=SearxngProvider(url)) for name in ('a', 'b')}
+    threads = set()
+    # Both calls must be in flight at once; a sequential fan-out times out here
+    started = threading.Barrier(2, timeout=5)
+
+    def call(tracker):
+        threads.add(threading.current_thread().name)
+        started.wait()
+        return tracker.search(['term one', 'term two'], show_progress=False)
+
+    results = fan_out(trackers, call)
+    assert set(results) == {'a', 'b'}
+    assert results['a']['term one']['count'] == 4200
+    assert len(threads) == 2
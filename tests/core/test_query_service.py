@@ -0,0 +1,138 @@
+import json
+import os
+import threading
+import time
+import urllib.request
+import urllib.error
+import pytest
+from datetime import datetime
+from unittest.mock import MagicMock
+from awareness.core.query_service import ResultStore, QueryService, QueryError, make_server
+
+@pytest.fixture
+def results_dir(tmp_path):
+    with open(tmp_path / 'rank_day1.json', 'w') as f:
+        json.dump({'python web framework': {
+            'total_results': 1000,
+            'project_rankings': {'Django': 3, 'Flask': None},
+            'timestamp': '2024-02-25 10:00:00'
+        }}, f)
+    with open(tmp_path / 'rank_day2.json', 'w') as f:
+        json.dump({'python web framework': {
+            'total_results': 1200,
+            'project_rankings': {'Django': 1, 'Flask': 7},
+            'timestamp': '2024-02-26 10:00:00'
+        }}, f)
+    with open(tmp_path / 'counts.json', 'w') as f:
+        json.dump({'python': {'count': 5000, 'timestamp': '2024-02-26 10:00:00'}}, f)
+    with open(tmp_path / 'api_usage.json', 'w') as f:
+        json.dump({'date': '2024-02-26', 'count': 3}, f)
+    return tmp_path
+
+def test_rank_returns_latest(results_dir):
+    service = QueryService(ResultStore(str(results_dir)))
+    result = service.rank('python web framework', 'Flask')
+    assert result['rank'] == 7
+    assert result['total_results'] == 1200
+    assert result['source'] == 'rank_day2.json'
+
+def test_history_for_project(results_dir):
+    service = QueryService(ResultStore(str(results_dir)))
+    history = service.history('python web framework', 'Django')
+    assert [entry['rank'] for entry in history] == [3, 1]
+
+def test_count_lookup(results_dir):
+    service = QueryService(ResultStore(str(results_dir)))
+    assert service.count('python')['count'] == 5000
+    assert service.store.terms() == {'rankings': ['python web framework'], 'counts': ['python']}
+
+def test_unchanged_records_repeat_their_since_run(results_dir):
+    with open(results_dir / 'rank_day3.json', 'w') as f:
+        json.dump({'python web framework': {'unchanged_since': '2024-02-26 10:00:00', 'fingerprint': 'abc',
+                                            'timestamp': '2024-02-27 10:00:00'}}, f)
+    service = QueryService(ResultStore(str(results_dir)))
+    result = service.rank('python web framework', 'Flask')
+    assert result['rank'] == 7
+    assert result['timestamp'] == '2024-02-27 10:00:00'
+    assert result['source'] == 'rank_day3.json'
+    assert len(service.history('python web framework', 'Django')) == 3
+
+def test_variant_matrix_indexed_per_pair(results_dir):
+    with open(results_dir / 'rank_variants.json', 'w') as f:
+        json.dump({'python web framework': {
+            'us': {'total_results': 900, 'project_rankings': {'Django': 2}, 'timestamp': '2024-02-27 10:00:00'},
+            'de': {'total_results': 400, 'project_rankings': {'Django': 5}, 'timestamp': '2024-02-27 10:00:00'}
+        }}, f)
+    service = QueryService(ResultStore(str(results_dir)))
+    assert service.rank('python web framework [de]', 'Django')['rank'] == 5
+    assert service.rank('python web framework', 'Django')['rank'] == 1
+    assert 'python web framework [us]' in service.store.terms()['rankings']
+
+def test_unknown_term_is_404(results_dir):
+    service = QueryService(ResultStore(str(results_dir)))
+    with pytest.raises(QueryError) as exc_info:
+        service.rank('missing', 'Django')
+    assert exc_info.value.status == 404
+
+def test_lookups_hit_lru(results_dir):
+    service = QueryService(ResultStore(str(results_dir)))
+    service.rank('python web framework', 'Django')
+    service.rank('python web framework', 'Django')
+    assert service.cache.hits == 1
+
+def test_new_files_invalidate_cache(results_dir):
+    store = ResultStore(str(results_dir), scan_interval=0)
+    service = QueryService(store)
+    assert service.rank('python web framework', 'Django')['rank'] == 1
+    with open(results_dir / 'rank_day3.json', 'w') as f:
+        json.dump({'python web framework': {
+            'total_results': 1300,
+            'project_rankings': {'Django': 2},
+            'timestamp': '2024-02-27 10:00:00'
+        }}, f)
+    assert service.rank('python web framework', 'Django')['rank'] == 2
+
+def test_refresh_requires_tracker(results_dir):
+    service = QueryService(ResultStore(str(results_dir)))
+    with pytest.raises(QueryError):
+        service.rank('python web framework', 'Django', refresh=True)
+
+def test_refresh_coalesces_concurrent_requests(results_dir):
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    tracker = MagicMock()
+
+    def search_project_ranks(terms, num_results, show_progress):
+        time.sleep(0.2)
+        return {terms[0]: {'total_results': 1500, 'project_rankings': {'Django': 4}, 'timestamp': now}}
+
+    tracker.search_project_ranks.side_effect = search_project_ranks
+    service = QueryService(ResultStore(str(results_dir)), tracker)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(
+        service.rank('python web framework', 'Django', refresh=True)['rank'])) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert tracker.search_project_ranks.call_count == 1
+    assert results == [4] * 5
+    # Data is now fresh, so another refresh is answered without an upstream fetch
+    service.rank('python web framework', 'Django', refresh=True)
+    assert tracker.search_project_ranks.call_count == 1
+
+def test_http_api(results_dir):
+    service = QueryService(ResultStore(str(results_dir)))
+    server = make_server(service, 0, '127.0.0.1')
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f'http://127.0.0.1:{server.server_address[1]}'
+    try:
+        with urllib.request.urlopen(f'{base}/rank?term=python+web+framework&project=Django') as response:
+            assert json.loads(response.read())['rank'] == 1
+        with pytest.raises(urllib.error.HTTPError) as exc_info:
+            urllib.request.urlopen(f'{base}/rank?term=python+web+framework')
+        assert exc_info.value.code == 400
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,76 @@
+import pytest
+from unittest.mock import patch, MagicMock
+from awareness.core.rate_controller import RateController, get_rate_controller
+from awareness.core.search_tracker import GoogleSearchTracker
+from awareness.core.project_rank_tracker import ProjectRankTracker
+
+@pytest.fixture
+def controller():
+    return RateController(initial_rate=1.0, min_rate=0.25, max_rate=2.0,
+                          increase=0.5, decrease=0.5, latency_target=1.0)
+
+def test_additive_increase_on_fast_success(controller):
+    controller.record(0.1, 200)
+    assert controller.rate == 1.5
+    controller.record(0.1, 200)
+    controller.record(0.1, 200)
+    assert controller.rate == 2.0  # Capped at ceiling
+    assert controller.increases == 2
+
+def test_multiplicative_decrease_on_throttle(controller):
+    controller.record(0.1, 429)
+    assert controller.rate == 0.5
+    controller.record(0.1, 429)
+    controller.record(0.1, 503)
+    assert controller.rate == 0.25  # Held at floor
+    assert controller.throttled == 3
+
+def test_decrease_on_slow_response(controller):
+    controller.record(5.0, 200)
+    assert controller.rate == 0.5
+    assert controller.stats()['decreases'] == 1
+
+def test_client_errors_leave_rate_unchanged(controller):
+    controller.record(0.1, 403)
+    assert controller.rate == 1.0
+
+def test_listener_receives_adjustments(controller):
+    events = []
+    controller.add_listener(events.append)
+    controller.record(0.1, 429)
+    assert events == [{'rate': 0.5, 'previous_rate': 1.0, 'reason': 'throttled'}]
+
+@patch('awareness.core.rate_controller.time.sleep')
+def test_acquire_paces_requests(mock_sleep, controller):
+    assert controller.acquire() == 0  # Bucket starts full
+    waited = controller.acquire()
+    assert waited == pytest.approx(1.0, abs=0.05)
+    mock_sleep.assert_called_once()
+
+def test_configure_rejects_inverted_bounds(controller):
+    with pytest.raises(ValueError):
+        controller.configure(min_rate=5.0)
+    assert (controller.min_rate, controller.max_rate, controller.rate) == (0.25, 2.0, 1.0)
+
+def test_configure_rejects_non_positive_floor(controller):
+    for floor in (0, -1.0):
+        with pytest.raises(ValueError):
+            controller.configure(min_rate=floor, max_rate=0)
+    assert controller.min_rate == 0.25
+
+def test_shared_across_trackers():
+    search = GoogleSearchTracker('test_key', 'test_cx')
+    rank = ProjectRankTracker('test_key', 'test_cx', ['project1'])
+    assert search.rate_controller is rank.rate_controller
+    assert search.rate_controller is get_rate_controller()
+
+@patch('requests.get')
+def test_tracker_reports_status_to_controller(mock_get):
+    mock_response = MagicMock()
+    mock_response.status_code = 429
+    mock_response.text = "Rate limit exceeded"
+    mock_get.return_value = mock_response
+    tracker = GoogleSearchTracker('test_key', 'test_cx')
+    tracker.rate_controller = RateController()
+    tracker.search(['test term'])
+    assert tracker.rate_controller.throttled == 1
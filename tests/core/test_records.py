@@ -0,0 +1,46 @@
+import json
+import pytest
+from awareness.core.records import (
+    SearchItem, CountResult, ProjectMatch, RankResult, counts_from_rankings, result_default
+)
+
+def test_search_item_strips_api_fields():
+    item = SearchItem.from_api({
+        'title': 'Django', 'snippet': 'Web framework', 'link': 'https://djangoproject.com',
+        'htmlSnippet': '<b>Web</b> framework', 'pagemap': {'metatags': [{'og:image': 'x.png'}]}
+    })
+    assert item.to_dict() == {'title': 'Django', 'snippet': 'Web framework', 'link': 'https://djangoproject.com'}
+    assert item.get('title') == 'Django'
+    assert item.get('pagemap', 'missing') == 'missing'
+    assert not hasattr(item, '__dict__')
+
+def test_records_behave_like_dicts():
+    record = CountResult(1234, '2024-11-26 10:30:45')
+    assert record['count'] == 1234
+    assert 'timestamp' in record
+    assert record == {'count': 1234, 'timestamp': '2024-11-26 10:30:45'}
+    assert dict(record, source='live')['source'] == 'live'
+    with pytest.raises(KeyError):
+        record['total_results']
+    assert not hasattr(record, '__dict__')
+
+def test_rank_result_json_matches_dict_output():
+    timestamp = '2024-11-26 10:30:45'
+    record = RankResult(1234567, {'project1': 15, 'project2': None},
+                        {'project1': [ProjectMatch(15, 'owned')], 'project2': []}, timestamp)
+    expected = {
+        'total_results': 1234567,
+        'project_rankings': {'project1': 15, 'project2': None},
+        'project_matches': {'project1': [{'rank': 15, 'match': 'owned'}], 'project2': []},
+        'timestamp': timestamp
+    }
+    assert json.dumps({'term': record}, indent=4, default=result_default) == json.dumps({'term': expected}, indent=4)
+
+def test_result_default_rejects_other_objects():
+    with pytest.raises(TypeError):
+        json.dumps(object(), default=result_default)
+
+def test_counts_from_rankings():
+    results = {'term': RankResult(1234567, {'project1': 15}, {'project1': [ProjectMatch(15, 'owned')]},
+                                  '2024-11-26 10:30:45')}
+    assert counts_from_rankings(results) == {'term': {'count': 1234567, 'timestamp': '2024-11-26 10:30:45'}}
@@ -0,0 +1,100 @@
+import json
+import pytest
+from datetime import datetime
+from awareness.core.query_service import ResultStore
+from awareness.core.records import counts_from_rankings, is_unchanged
+from awareness.core.refresh import RefreshPlan, RefreshScheduler, volatility
+
+
+def rank_record(day, rankings, total=1000, hour=10):
+    return {'total_results': total, 'project_rankings': rankings,
+            'timestamp': f'2024-02-{day:02d} {hour:02d}:00:00'}
+
+
+@pytest.fixture
+def results_dir(tmp_path):
+    runs = {
+        'run1': {'stable': rank_record(20, {'Django': 1}), 'volatile': rank_record(20, {'Django': 2}),
+                 'single': rank_record(25, {'Django': 4}, hour=12)},
+        'run2': {'stable': rank_record(24, {'Django': 1}), 'volatile': rank_record(24, {'Django': 40}, total=3000)},
+    }
+    for name, data in runs.items():
+        with open(tmp_path / f'{name}.json', 'w') as f:
+            json.dump(data, f)
+    return tmp_path
+
+
+NOW = datetime(2024, 2, 26, 10, 0, 0)
+
+
+def test_volatility_rates():
+    history = [rank_record(20, {'Django': 1, 'Flask': None}), rank_record(22, {'Django': 5, 'Flask': 9})]
+    moves = volatility(history, depth=10)
+    # Django moved 4 and Flask 11 -> 9 (not found counts as depth + 1) over two days
+    assert moves['rank'] == pytest.approx((4 + 2) / 2 / 2)
+    assert moves['count'] == 0.0
+
+
+def test_plan_picks_volatile_terms_within_budget(results_dir):
+    scheduler = RefreshScheduler(ResultStore(str(results_dir)), num_results=10)
+    plan = scheduler.plan(['stable', 'volatile', 'single', 'new'], budget=2, now=NOW)
+
+    # The unseen term is forced; the volatile one outranks the stable one
+    assert plan.refresh == ['volatile', 'new']
+    assert set(plan.carried) == {'stable', 'single'}
+    assert plan.scores['volatile'] > plan.scores['single'] > plan.scores['stable']
+
+
+def test_plan_forces_stale_terms(results_dir):
+    scheduler = RefreshScheduler(ResultStore(str(results_dir)), num_results=10, max_age_hours=24)
+    plan = scheduler.plan(['stable', 'volatile', 'single'], budget=2, now=NOW)
+    assert plan.refresh == ['stable', 'volatile']
+
+
+def test_unchanged_record_is_a_fresh_observation(results_dir):
+    with open(results_dir / 'run3.json', 'w') as f:
+        json.dump({'stable': {'unchanged_since': '2024-02-24 10:00:00', 'fingerprint': 'abc',
+                              'timestamp': '2024-02-25 12:00:00'}}, f)
+    scheduler = RefreshScheduler(ResultStore(str(results_dir)), num_results=10, max_age_hours=24)
+    plan = scheduler.plan(['stable', 'volatile', 'single'], budget=2, now=NOW)
+    assert plan.refresh == ['volatile', 'single']
+    assert plan.carried['stable']['timestamp'] == '2024-02-25 12:00:00'
+    assert plan.carried['stable']['project_rankings'] == {'Django': 1}
+
+
+def test_carried_repeat_of_unchanged_run_is_a_plain_ranking(results_dir):
+    with open(results_dir / 'run3.json', 'w') as f:
+        json.dump({'stable': {'unchanged_since': '2024-02-24 10:00:00', 'fingerprint': 'abc',
+                              'timestamp': '2024-02-25 12:00:00'}}, f)
+    plan = RefreshScheduler(ResultStore(str(results_dir)), num_results=10).plan(['stable'], budget=0, now=NOW)
+    carried = plan.merge(['stable'], None)
+    assert 'unchanged_since' not in carried['stable']
+    assert not is_unchanged(carried['stable'])
+    assert counts_from_rankings(carried)['stable'] == {'count': 1000, 'timestamp': '2024-02-25 12:00:00',
+                                                       'carried_forward': True, 'age_hours': 22.0}
+
+def test_budget_counts_pages_per_term(results_dir):
+    scheduler = RefreshScheduler(ResultStore(str(results_dir)), num_results=100)
+    assert scheduler.term_cost() == 10
+    assert scheduler.plan(['stable', 'volatile'], budget=15, now=NOW).refresh == ['volatile']
+
+
+def test_carried_records_and_merge(results_dir):
+    scheduler = RefreshScheduler(ResultStore(str(results_dir)), num_results=10)
+    plan = scheduler.plan(['stable', 'volatile'], budget=1, now=NOW)
+
+    carried = plan.carried['stable']
+    assert carried['carried_forward'] is True
+    assert carried['age_hours'] == 48.0
+    assert carried['project_rankings'] == {'Django': 1}
+    assert 'source' not in carried
+
+    fresh = {'volatile': rank_record(26, {'Django': 3})}
+    merged = plan.merge(['stable', 'volatile'], fresh)
+    assert list(merged) == ['stable', 'volatile']
+    assert merged['volatile'] is fresh['volatile']
+
+
+def test_merge_keeps_carried_when_nothing_fetched():
+    plan = RefreshPlan([], {'a': {'carried_forward': True}}, {})
+    assert plan.merge(['a', 'b'], None) == {'a': {'carried_forward': True}}
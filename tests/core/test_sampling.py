@@ -0,0 +1,62 @@
+import json
+from collections import Counter
+import pytest
+from awareness.core.sampling import SamplePlan, SamplingError, allocate, estimate_groups
+
+@pytest.fixture
+def groups():
+    return {'frameworks': [f'framework {i}' for i in range(20)],
+            'databases': [f'database {i}' for i in range(6)]}
+
+def test_allocate_is_proportional_with_floors():
+    assert allocate({'a': 100, 'b': 10, 'c': 1}, 20) == {'a': 16, 'b': 3, 'c': 1}
+    assert allocate({'a': 3, 'b': 3}, 100) == {'a': 3, 'b': 3}
+    assert sum(allocate({'a': 7, 'b': 5, 'c': 9}, 10).values()) == 10
+    with pytest.raises(SamplingError):
+        allocate({'a': 10, 'b': 10, 'c': 10}, 5)
+
+def test_rotation_refreshes_every_term_each_cycle(groups, tmp_path):
+    state = str(tmp_path / 'state.json')
+    seen = Counter()
+    for run in range(3):
+        plan = SamplePlan(groups, 13, state, seed=run)
+        terms = plan.select()
+        assert len(terms) == 13
+        assert len(set(terms)) == 13
+        plan.save()
+        seen.update(terms)
+    # 9 of 20 frameworks and 4 of 6 databases per run: three runs cover every term
+    assert plan.allocation == {'frameworks': 9, 'databases': 4}
+    assert plan.cycle_runs('frameworks') == 3
+    assert set(seen) == set(groups['frameworks']) | set(groups['databases'])
+    assert max(seen.values()) == 2
+    assert json.loads((tmp_path / 'state.json').read_text())['run'] == 3
+
+def test_new_terms_are_sampled_next(groups, tmp_path):
+    state = str(tmp_path / 'state.json')
+    plan = SamplePlan(groups, 4, state, seed=1)
+    plan.select()
+    plan.save()
+    groups['databases'].append('database new')
+    plan = SamplePlan(groups, 4, state, seed=2)
+    plan.select()
+    assert 'database new' in plan.samples['databases']
+
+def test_estimates_with_confidence_intervals(groups, tmp_path):
+    plan = SamplePlan(groups, 8, str(tmp_path / 'state.json'), seed=0)
+    terms = plan.select()
+    results = {term: {'count': 1000 if term.startswith('framework') else 50, 'timestamp': '2024-01-01 12:00:00'}
+               for term in terms}
+    estimates = estimate_groups(plan, results, confidence=0.9)
+
+    frameworks = estimates['groups']['frameworks']
+    assert frameworks['total_count'] == 20000
+    assert frameworks['ci_low'] == frameworks['ci_high'] == 20000  # no variance in the sample
+    assert frameworks['cycle_runs'] == 4
+    assert estimates['overall']['total_count'] == 20300
+    assert estimates['overall']['sampled'] == 8
+
+    results[plan.samples['frameworks'][0]]['count'] = 5000
+    spread = estimate_groups(plan, results)['groups']['frameworks']
+    assert spread['ci_low'] < spread['total_count'] < spread['ci_high']
+    assert spread['standard_error'] > 0
@@ -1,4 +1,6 @@
 import pytest
+import threading
+import time
 import json
 from unittest.mock import patch, MagicMock
 from awareness.core.search_tracker import GoogleSearchTracker
@@ -100,4 +102,87 @@ def test_search_cost_warning_yes(mock_get, mock_input, tracker, mock_response):
     tracker.daily_usage['count'] = 95
     results = tracker.search(['term1', 'term2', 'term3', 'term4', 'term5', 'term6'])
     assert results is not None
-    assert mock_get.call_count == 6
\ No newline at end of file
+    assert mock_get.call_count == 6
+
+@patch('requests.get')
+def test_search_requests_partial_gzip_response(mock_get, tracker, mock_response):
+    mock_get.return_value = mock_response
+    tracker.daily_usage['count'] = 0
+    tracker.search(['test term'])
+    call = mock_get.call_args
+    assert call.kwargs['params']['fields'] == 'searchInformation/totalResults'
+    assert call.kwargs['headers']['Accept-Encoding'] == 'gzip'
+    assert '(gzip)' in call.kwargs['headers']['User-Agent']
+    assert tracker.transport.responses == 1
+
+@patch('requests.get')
+def test_search_variants_matrix(mock_get, tracker, mock_response, tmp_path):
+    mock_get.return_value = mock_response
+    tracker.usage_file = str(tmp_path / 'api_usage.json')
+    tracker.daily_usage['count'] = 0
+    variants = [{'gl': 'us', 'hl': 'en', 'name': 'us'}, {'gl': 'de', 'hl': 'de', 'name': 'de'},
+                {'gl': 'us', 'hl': 'en', 'name': 'us-copy'}]
+
+    results = tracker.search(['python', 'rust'], show_progress=False, variants=variants)
+
+    assert set(results) == {'python', 'rust'}
+    assert set(results['python']) == {'us', 'de', 'us-copy'}
+    # Identical requests are shared across variants: 2 terms x 2 distinct variants
+    assert mock_get.call_count == 4
+    sent = [(call.kwargs['params']['q'], call.kwargs['params'].get('gl')) for call in mock_get.call_args_list]
+    assert sent == [('python', 'us'), ('python', 'de'), ('rust', 'us'), ('rust', 'de')]
+    assert tracker.variant is None
+
+def test_hedged_request_is_billed(tracker, mock_response, tmp_path):
+    from awareness.core.hedging import HedgePolicy
+    tracker.usage_file = str(tmp_path / 'api_usage.json')
+    tracker.daily_usage['count'] = 0
+    tracker.hedging = HedgePolicy(max_extra=1, min_delay=0.01)
+    for _ in range(tracker.hedging.min_samples):
+        tracker.hedging.observe(0.001)
+    # The first request stalls until the test releases it, so the duplicate always wins
+    release, closed = threading.Event(), threading.Event()
+    slow_response = MagicMock(status_code=200)
+    slow_response.close.side_effect = closed.set
+    calls = []
+    def slow_get(url, **kwargs):
+        calls.append(1)
+        if len(calls) == 1:
+            release.wait(5)
+            return slow_response
+        return mock_response
+    with patch('requests.get', side_effect=slow_get):
+        results = tracker.search(['python', 'rust'], show_progress=False)
+    release.set()
+
+    assert results['python']['count'] == 1234567
+    assert tracker.hedging.hedged == 1
+    assert tracker.daily_usage['hedged'] == 1
+    assert tracker.daily_usage['hedged_won'] == 1
+    with open(tracker.usage_file) as f:
+        assert json.load(f)['hedged_won'] == 1
+    # Two terms plus one duplicate
+    assert tracker.daily_usage['count'] == 3
+    # The run released the hedging workers, and the stalled loser's response is closed once it arrives
+    assert tracker.hedging._pool is None
+    assert closed.wait(5)
+
+@patch('requests.get')
+def test_search_returns_plain_dicts(mock_get, tracker, mock_response, tmp_path):
+    mock_get.return_value = mock_response
+    tracker.usage_file = str(tmp_path / 'api_usage.json')
+    tracker.daily_usage['count'] = 0
+    results = tracker.search(['python'], show_progress=False)
+    assert json.loads(json.dumps(results)) == results
+    results['python']['count'] += 1
+
+@patch('requests.get')
+def test_main_writes_records_as_json(mock_get, mock_response, tmp_path, monkeypatch):
+    from awareness.core.search_tracker import main
+    mock_get.return_value = mock_response
+    monkeypatch.chdir(tmp_path)
+    output = tmp_path / 'results.json'
+    monkeypatch.setattr('sys.argv', ['search_tracker', '--key', 'k', '--cx', 'c', '-t', 'python', '-o', str(output)])
+    main()
+    with open(output) as f:
+        assert json.load(f)['python']['count'] == 1234567
@@ -0,0 +1,41 @@
+import gzip
+import io
+import json
+import requests
+from unittest.mock import MagicMock
+from urllib3.response import HTTPResponse
+from awareness.core.transport import TransportStats, parse_response
+
+def gzip_response(payload):
+    body = gzip.compress(json.dumps(payload).encode('utf-8'))
+    raw = HTTPResponse(body=io.BytesIO(body), headers={'Content-Encoding': 'gzip'},
+                       status=200, preload_content=False)
+    response = requests.Response()
+    response.raw = raw
+    response.status_code = 200
+    return response, len(body)
+
+def test_parse_response_counts_wire_and_decoded_bytes():
+    payload = {'searchInformation': {'totalResults': '1000'},
+               'items': [{'title': 'Django', 'snippet': 'web framework ' * 20, 'link': 'https://djangoproject.com'}]}
+    response, compressed = gzip_response(payload)
+    data, wire_bytes, body_bytes, parse_seconds = parse_response(response)
+    assert data == payload
+    assert wire_bytes == compressed
+    assert body_bytes == len(json.dumps(payload))
+    assert wire_bytes < body_bytes
+    assert parse_seconds >= 0
+
+def test_parse_response_falls_back_to_json():
+    response = MagicMock()
+    response.json.return_value = {'searchInformation': {'totalResults': '5'}}
+    data, wire_bytes, body_bytes, _ = parse_response(response)
+    assert data == {'searchInformation': {'totalResults': '5'}}
+    assert (wire_bytes, body_bytes) == (0, 0)
+
+def test_transport_stats_summary():
+    stats = TransportStats()
+    stats.record(100, 400, 0.001)
+    stats.record(50, 200, 0.002)
+    assert stats.summary() == {'responses': 2, 'wire_bytes': 150, 'body_bytes': 600, 'parse_seconds': 0.003}
+    assert '4.0x compression' in stats.describe()
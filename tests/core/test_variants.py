@@ -0,0 +1,57 @@
+import json
+import pytest
+from awareness.core.providers import GoogleProvider, SearxngProvider
+from awareness.core.variants import (expand, fetch_key, flatten_variants, is_matrix, load_variants,
+                                     parse_variant, put_result, split_variants)
+
+
+def test_parse_variant_with_and_without_name():
+    assert parse_variant('us:gl=us,hl=en') == {'gl': 'us', 'hl': 'en', 'name': 'us'}
+    assert parse_variant('gl=de, lr=lang_de') == {'gl': 'de', 'lr': 'lang_de', 'name': 'de-lang_de'}
+    with pytest.raises(ValueError):
+        parse_variant('us:cr=countryUS')
+    with pytest.raises(ValueError):
+        parse_variant('gl=')
+
+
+def test_load_variants_from_file_and_specs(tmp_path):
+    path = tmp_path / 'variants.yml'
+    path.write_text("variants:\n  uk: {gl: uk, hl: en}\n  fr: {gl: fr, hl: fr}\n")
+    variants = load_variants([str(path), 'jp:gl=jp,hl=ja'])
+    assert [v['name'] for v in variants] == ['uk', 'fr', 'jp']
+    json_path = tmp_path / 'variants.json'
+    json_path.write_text(json.dumps([{'gl': 'us'}]))
+    assert load_variants([str(json_path)]) == [{'gl': 'us', 'name': 'us'}]
+    with pytest.raises(ValueError):
+        load_variants(['gl=us', 'us:hl=en'])
+
+
+def test_expand_is_lazy_and_term_major():
+    pairs = expand(iter(['a', 'b']), [{'name': 'x'}, {'name': 'y'}])
+    assert next(pairs) == ('a', {'name': 'x'})
+    assert [(t, v['name']) for t, v in pairs] == [('a', 'y'), ('b', 'x'), ('b', 'y')]
+    assert list(expand(['a'])) == [('a', None)]
+
+
+def test_fetch_key_follows_provider_params():
+    google, searxng = GoogleProvider('k', 'cx'), SearxngProvider('http://localhost:8888')
+    us = {'gl': 'us', 'hl': 'en', 'name': 'us'}
+    us_lr = {'gl': 'us', 'hl': 'en', 'lr': 'lang_en', 'name': 'us-lr'}
+    assert google.variant_params(us_lr) == {'gl': 'us', 'hl': 'en', 'lr': 'lang_en'}
+    assert searxng.variant_params(us) == {'language': 'en-US'}
+    # SearXNG has no lr, so these two variants are the same request there
+    assert fetch_key(google, 't', us) != fetch_key(google, 't', us_lr)
+    assert fetch_key(searxng, 't', us) == fetch_key(searxng, 't', us_lr)
+
+
+def test_matrix_helpers():
+    results = {}
+    record = {'count': 1, 'timestamp': '2024-02-26 10:00:00'}
+    put_result(results, 'python', {'name': 'us'}, record)
+    put_result(results, 'python', {'name': 'de'}, dict(record, count=2))
+    assert is_matrix(results)
+    assert not is_matrix({'python': record})
+    assert split_variants(results) == {'us': {'python': record}, 'de': {'python': dict(record, count=2)}}
+    assert flatten_variants(results) == {'python [us]': record, 'python [de]': dict(record, count=2)}
+    plain = {'python': record}
+    assert flatten_variants(plain) is plain
@@ -0,0 +1,165 @@
+import os
+import json
+import pytest
+import yaml
+from unittest.mock import patch, MagicMock
+from awareness.core.watch import (
+    WatchDaemon, WatchJob, TermCache, ScheduleError, load_schedule, parse_interval
+)
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with patch('awareness.core.rate_controller.RateController.acquire', return_value=0):
+        yield tmp_path
+
+@pytest.fixture
+def session():
+    def get(url, params=None, **kwargs):
+        response = MagicMock()
+        response.status_code = 200
+        response.json.return_value = {
+            'items': [{'title': f"{params['q']} project1", 'snippet': '', 'link': 'https://project1.com'}],
+            'searchInformation': {'totalResults': '1000'}
+        }
+        return response
+    mock = MagicMock()
+    mock.get.side_effect = get
+    return mock
+
+def write_schedule(path, jobs, mtime=None):
+    with open(path, 'w') as f:
+        yaml.safe_dump({'jobs': jobs}, f)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return str(path)
+
+def queried_terms(session):
+    return [call.kwargs['params']['q'] for call in session.get.call_args_list]
+
+def test_parse_interval():
+    assert parse_interval(90) == 90
+    assert parse_interval('15m') == 900
+    assert parse_interval('6h') == 21600
+    assert parse_interval('1d') == 86400
+    with pytest.raises(ScheduleError):
+        parse_interval('often')
+    with pytest.raises(ScheduleError):
+        parse_interval(0)
+
+def test_load_schedule_validation(workdir):
+    path = write_schedule(workdir / 'schedule.yml', [{'name': 'ranks', 'type': 'rank', 'terms': ['a'],
+                                                      'interval': '1h'}])
+    with pytest.raises(ScheduleError):
+        load_schedule(path)
+    path = write_schedule(workdir / 'schedule.yml', [{'name': 'counts', 'terms': ['a']}])
+    with pytest.raises(ScheduleError):
+        load_schedule(path)
+
+def test_run_once_writes_outputs(workdir, session):
+    path = write_schedule(workdir / 'schedule.yml', [
+        {'name': 'counts', 'terms': ['a', 'b'], 'interval': '1h', 'output': 'out/{name}.json'},
+        {'name': 'ranks', 'type': 'rank', 'projects': ['project1'], 'terms': ['c'],
+         'interval': '1h', 'num_results': 10, 'output': 'out/{name}.json'}
+    ])
+    daemon = WatchDaemon('key', 'cx', path, session=session)
+    daemon.run_once()
+
+    with open(workdir / 'out' / 'counts.json') as f:
+        assert set(json.load(f)) == {'a', 'b'}
+    with open(workdir / 'out' / 'ranks.json') as f:
+        assert json.load(f)['c']['project_rankings'] == {'project1': 1}
+    # Both trackers share one usage ledger
+    trackers = list(daemon._trackers.values())
+    assert trackers[0].daily_usage is trackers[1].daily_usage
+    assert trackers[0].daily_usage['count'] == 3
+
+def test_submitted_job_jumps_ahead_of_batch(workdir, session):
+    path = write_schedule(workdir / 'schedule.yml', [
+        {'name': 'batch', 'terms': [f'bulk{i}' for i in range(6)], 'interval': '1h',
+         'chunk_size': 2, 'priority': 10}
+    ])
+    daemon = WatchDaemon('key', 'cx', path, session=session)
+    daemon.run_pending()  # First chunk of the batch
+    daemon.submit(WatchJob(name='urgent', kind='search', terms=['urgent'], priority=0))
+    while daemon.run_next():
+        pass
+    assert queried_terms(session) == ['bulk0', 'bulk1', 'urgent', 'bulk2', 'bulk3', 'bulk4', 'bulk5']
+
+def test_schedule_hot_reload(workdir, session):
+    schedule = workdir / 'schedule.yml'
+    path = write_schedule(schedule, [{'name': 'first', 'terms': ['a'], 'interval': '1h'}], mtime=1000)
+    daemon = WatchDaemon('key', 'cx', path, session=session)
+    write_schedule(schedule, [{'name': 'second', 'terms': ['b'], 'interval': '1h'}], mtime=2000)
+    assert daemon.reload_if_changed()
+    assert set(daemon.jobs) == {'second'}
+    daemon.run_once()
+    assert queried_terms(session) == ['b']
+
+def test_invalid_reload_keeps_previous_schedule(workdir, session):
+    schedule = workdir / 'schedule.yml'
+    path = write_schedule(schedule, [{'name': 'first', 'terms': ['a'], 'interval': '1h'}], mtime=1000)
+    daemon = WatchDaemon('key', 'cx', path, session=session)
+    write_schedule(schedule, [{'name': 'broken'}], mtime=2000)
+    assert not daemon.reload_if_changed()
+    assert set(daemon.jobs) == {'first'}
+
+def test_inbox_jobs_run_first(workdir, session):
+    inbox = workdir / 'inbox'
+    inbox.mkdir()
+    path = write_schedule(workdir / 'schedule.yml', [
+        {'name': 'batch', 'terms': ['bulk0', 'bulk1'], 'interval': '1h', 'chunk_size': 1}
+    ])
+    with open(inbox / 'adhoc.json', 'w') as f:
+        json.dump({'name': 'adhoc', 'terms': ['adhoc']}, f)
+    daemon = WatchDaemon('key', 'cx', path, inbox_dir=str(inbox), session=session)
+    daemon.run_once()
+    assert queried_terms(session)[0] == 'adhoc'
+    assert not os.listdir(inbox)
+
+def test_invalid_integer_field_is_a_schedule_error(workdir, session):
+    with pytest.raises(ScheduleError, match='priority'):
+        WatchJob.from_dict({'name': 'bad', 'terms': ['a'], 'priority': 'high'})
+    schedule = workdir / 'schedule.yml'
+    path = write_schedule(schedule, [{'name': 'first', 'terms': ['a'], 'interval': '1h'}], mtime=1000)
+    daemon = WatchDaemon('key', 'cx', path, session=session)
+    write_schedule(schedule, [{'name': 'first', 'terms': ['a'], 'interval': '1h', 'chunk_size': 'ten'}],
+                   mtime=2000)
+    assert not daemon.reload_if_changed()
+    assert daemon.jobs['first'].chunk_size == 10
+
+def test_rejected_inbox_files_are_quarantined(workdir, session):
+    inbox = workdir / 'inbox'
+    inbox.mkdir()
+    path = write_schedule(workdir / 'schedule.yml', [{'name': 'batch', 'terms': ['bulk0'], 'interval': '1h'}])
+    with open(inbox / 'bad.json', 'w') as f:
+        json.dump({'name': 'bad', 'terms': ['x'], 'priority': 'high'}, f)
+    daemon = WatchDaemon('key', 'cx', path, inbox_dir=str(inbox), session=session)
+    daemon.run_once()
+    daemon.run_once()
+    assert os.listdir(inbox) == ['bad.json.rejected']
+    assert 'x' not in queried_terms(session)
+
+@patch('builtins.input', side_effect=AssertionError("daemon must not prompt"))
+def test_daemon_skips_cost_prompt(mock_input, workdir, session):
+    path = write_schedule(workdir / 'schedule.yml', [
+        {'name': 'counts', 'terms': [f't{i}' for i in range(5)], 'interval': '1h'}
+    ])
+    daemon = WatchDaemon('key', 'cx', path, session=session)
+    tracker = daemon._tracker(daemon.jobs['counts'])
+    tracker.daily_usage['count'] = 99
+    daemon.run_once()
+    assert session.get.call_count == 5
+
+def test_term_cache_rereads_changed_file(workdir):
+    terms_file = workdir / 'terms.txt'
+    terms_file.write_text('a\nb\n')
+    os.utime(terms_file, (1000, 1000))
+    cache = TermCache()
+    assert cache.load(str(terms_file)) == ['a', 'b']
+    with patch('awareness.core.watch.SearchTermsLoader.load_terms') as mock_load:
+        cache.load(str(terms_file))
+        mock_load.assert_not_called()
+    terms_file.write_text('c\n')
+    os.utime(terms_file, (2000, 2000))
+    assert cache.load(str(terms_file)) == ['c']
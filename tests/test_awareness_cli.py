@@ -1,12 +1,25 @@
 import pytest
 import json
 import os
+import sys
 from unittest.mock import patch, MagicMock
-from awareness.awareness_cli import search_command, rank_command, charts_command
+from awareness.awareness_cli import search_command, rank_command, charts_command, main
 
-@pytest.fixture
-def mock_args():
-    return MagicMock(
+# Parser defaults of the optional flags; each test sets only the ones it exercises
+OPTION_DEFAULTS = {
+    'project_rules': None, 'groups': None, 'term_groups': None, 'format': 'json',
+    'min_rate': None, 'max_rate': None, 'metrics_file': None,
+    'providers': ['google'], 'searxng_url': None, 'hedge_percentile': None,
+    'history': None, 'rollup_dir': None, 'counts_output': None, 'text_index': None, 'discover': None,
+    'sample_budget': None, 'refresh_budget': None, 'fingerprints': None, 'changes_only': False,
+    'variants': None, 'pipeline': False, 'pipeline_depth': 16, 'pipeline_charts': None,
+    'granularity': 'run', 'chart_format': 'png', 'layout': 'single', 'per_page': 12,
+    'downsample': 'minmax', 'max_points': 1200,
+}
+
+def make_args(**overrides):
+    """Parsed arguments for a command: the fixture's values, option defaults, then overrides"""
+    values = dict(
         key='test_key',
         cx='test_cx',
         terms=['test term'],
@@ -18,6 +31,13 @@ def mock_args():
         input_dir='input',
         output_dir='output'
     )
+    values.update(OPTION_DEFAULTS)
+    values.update(overrides)
+    return MagicMock(**values)
+
+@pytest.fixture
+def mock_args():
+    return make_args()
 
 @pytest.fixture
 def mock_search_results():
@@ -149,4 +169,459 @@ def test_rank_command_usage(mock_args):
         rank_command(mock_args)
         
         mock_tracker.get_remaining_calls.assert_called_once()
-        mock_tracker.search_project_ranks.assert_not_called()
\ No newline at end of file
+        mock_tracker.search_project_ranks.assert_not_called()
+
+@patch('awareness.awareness_cli.ProjectRankTracker')
+def test_rank_command_writes_metrics(MockRankTracker, mock_args, mock_rank_results, tmp_path):
+    metrics_file = tmp_path / 'awareness.prom'
+    mock_args.metrics_file = str(metrics_file)
+    mock_tracker = MagicMock()
+    mock_tracker.search_project_ranks.return_value = mock_rank_results
+    MockRankTracker.return_value = mock_tracker
+
+    rank_command(mock_args)
+
+    assert metrics_file.exists()
+
+@patch('awareness.awareness_cli.generate_charts')
+def test_main_profile_writes_trace(mock_generate_charts, tmp_path):
+    trace_file = tmp_path / 'trace.json'
+    argv = ['awareness', 'charts', '--input-dir', str(tmp_path), '--output-dir', str(tmp_path),
+            '--profile', str(trace_file)]
+    with patch('sys.argv', argv):
+        main()
+    mock_generate_charts.assert_called_once()
+    assert 'traceEvents' in json.loads(trace_file.read_text())
+
+@patch('awareness.awareness_cli.ProjectRankTracker')
+def test_rank_command_with_project_rules(MockRankTracker, mock_args, tmp_path):
+    rules_file = tmp_path / 'projects.yml'
+    rules_file.write_text("projects:\n  - name: PyTorch\n    domains: [pytorch.org]\n  - Django\n")
+    mock_args.project_rules = str(rules_file)
+    MockRankTracker.return_value = MagicMock()
+
+    rank_command(mock_args)
+
+    MockRankTracker.assert_called_once_with(
+        'test_key', 'test_cx', [{'name': 'PyTorch', 'domains': ['pytorch.org']}, 'Django'])
+
+@patch('awareness.awareness_cli.GroupRankTracker')
+def test_rank_command_with_groups(MockGroupTracker, mock_args, mock_rank_results, tmp_path):
+    groups_file = tmp_path / 'groups.yml'
+    groups_file.write_text("web: [django, flask]\nml:\n  projects: [pytorch]\n  num_results: 30\n")
+    mock_args.groups = str(groups_file)
+    mock_args.output = str(tmp_path / 'rankings.json')
+    mock_tracker = MagicMock()
+    mock_tracker.search_group_ranks.return_value = {'web': mock_rank_results, 'ml': mock_rank_results}
+    MockGroupTracker.return_value = mock_tracker
+
+    rank_command(mock_args)
+
+    mock_tracker.search_group_ranks.assert_called_once_with(['test term'], 100)
+    with open(tmp_path / 'rankings_web.json') as f:
+        assert json.load(f) == mock_rank_results
+    assert (tmp_path / 'rankings_ml.json').exists()
+
+@patch('awareness.awareness_cli.GroupRankTracker')
+def test_rank_command_groups_usage(MockGroupTracker, mock_args, tmp_path, capsys):
+    groups_file = tmp_path / 'groups.yml'
+    groups_file.write_text("web: [django, flask]\n")
+    mock_args.groups = str(groups_file)
+    mock_args.usage = True
+    mock_tracker = MagicMock()
+    mock_tracker.get_remaining_calls.return_value = {'date': '2024-01-01', 'used_today': 5, 'free_remaining': 95}
+    mock_tracker.daily_usage = {'count': 5}
+    MockGroupTracker.return_value = mock_tracker
+
+    rank_command(mock_args)
+
+    assert 'Queries used today: 5' in capsys.readouterr().out
+    mock_tracker.search_group_ranks.assert_not_called()
+
+@patch('awareness.awareness_cli.ProjectRankTracker')
+def test_rank_command_appends_history(MockRankTracker, mock_args, mock_rank_results, tmp_path):
+    mock_args.history = str(tmp_path / 'history')
+    mock_tracker = MagicMock()
+    mock_tracker.search_project_ranks.return_value = mock_rank_results
+    MockRankTracker.return_value = mock_tracker
+
+    rank_command(mock_args)
+
+    from awareness.utils.history_store import HistoryStore
+    assert len(HistoryStore(mock_args.history).records()) == 2
+
+@patch('awareness.awareness_cli.GroupRankTracker')
+def test_rank_command_groups_append_history(MockGroupTracker, mock_args, tmp_path):
+    groups_file = tmp_path / 'groups.yml'
+    groups_file.write_text("web: [django]\nml: [pytorch]\n")
+    mock_args.groups = str(groups_file)
+    mock_args.history = str(tmp_path / 'history')
+    record = {'total_results': 10, 'timestamp': '2024-01-01 12:00:00'}
+    mock_tracker = MagicMock()
+    mock_tracker.search_group_ranks.return_value = {
+        'web': {'python': dict(record, project_rankings={'django': 2})},
+        'ml': {'python': dict(record, project_rankings={'pytorch': None})}}
+    MockGroupTracker.return_value = mock_tracker
+
+    rank_command(mock_args)
+
+    from awareness.utils.history_store import HistoryStore
+    store = HistoryStore(mock_args.history)
+    assert len(store.records()) == 2
+    assert store.rankings('python', 'django')['rank'].tolist() == [2]
+
+@patch('awareness.awareness_cli.GroupRankTracker')
+def test_rank_command_groups_update_rollups(MockGroupTracker, mock_args, tmp_path):
+    groups_file = tmp_path / 'groups.yml'
+    groups_file.write_text("web: [django]\nml: [pytorch]\n")
+    mock_args.groups = str(groups_file)
+    mock_args.rollup_dir = str(tmp_path / 'rollups')
+    record = {'total_results': 10, 'timestamp': '2024-01-01 12:00:00'}
+    mock_tracker = MagicMock()
+    mock_tracker.search_group_ranks.return_value = {
+        'web': {'python': dict(record, project_rankings={'django': 2})},
+        'ml': {'python': dict(record, project_rankings={'pytorch': None})}}
+    MockGroupTracker.return_value = mock_tracker
+
+    rank_command(mock_args)
+
+    from awareness.utils.rollups import RollupStore
+    rows = RollupStore(mock_args.rollup_dir).ranking_report('daily')
+    assert sorted((row['project'], row['runs']) for row in rows) == [('django', 1), ('pytorch', 1)]
+
+@patch('awareness.awareness_cli.ProjectRankTracker')
+def test_rank_command_history_per_provider(MockRankTracker, mock_args, mock_rank_results, tmp_path):
+    mock_args.providers = ['google', 'searxng']
+    mock_args.searxng_url = 'http://localhost:8888'
+    mock_args.history = str(tmp_path / 'history')
+    mock_tracker = MagicMock()
+    mock_tracker.search_project_ranks.return_value = mock_rank_results
+    MockRankTracker.return_value = mock_tracker
+
+    rank_command(mock_args)
+
+    from awareness.utils.history_store import HistoryStore
+    for provider in ('google', 'searxng'):
+        assert len(HistoryStore(str(tmp_path / f'history_{provider}')).records()) == 2
+    assert not (tmp_path / 'history').exists()
+
+@patch('awareness.awareness_cli.ProjectRankTracker')
+def test_rank_command_rollups_per_provider(MockRankTracker, mock_args, mock_rank_results, tmp_path):
+    mock_args.providers = ['google', 'searxng']
+    mock_args.searxng_url = 'http://localhost:8888'
+    mock_args.rollup_dir = str(tmp_path / 'rollups_{provider}')
+    mock_tracker = MagicMock()
+    mock_tracker.search_project_ranks.return_value = mock_rank_results
+    MockRankTracker.return_value = mock_tracker
+
+    rank_command(mock_args)
+
+    for provider in ('google', 'searxng'):
+        assert (tmp_path / f'rollups_{provider}' / 'daily').is_dir()
+
+def test_main_history_import(mock_rank_results, tmp_path, capsys):
+    results_file = tmp_path / 'rankings.json'
+    results_file.write_text(json.dumps(mock_rank_results))
+    argv = ['awareness', 'history', '--history-dir', str(tmp_path / 'history'), '--import', str(results_file)]
+    with patch('sys.argv', argv):
+        main()
+    assert 'Imported 2 records from 1 files' in capsys.readouterr().out
+
+@patch('awareness.awareness_cli.GoogleSearchTracker')
+def test_search_command_updates_rollups(MockSearchTracker, mock_args, mock_search_results, tmp_path):
+    mock_args.rollup_dir = str(tmp_path / 'rollups')
+    mock_tracker = MagicMock()
+    mock_tracker.search.return_value = mock_search_results
+    MockSearchTracker.return_value = mock_tracker
+
+    search_command(mock_args)
+
+    assert (tmp_path / 'rollups' / 'daily' / '2024-01-01.json').exists()
+    assert (tmp_path / 'rollups' / 'weekly' / '2024-W01.json').exists()
+
+@patch('awareness.awareness_cli.GoogleSearchTracker')
+def test_search_command_multiple_providers(MockSearchTracker, mock_args, mock_search_results, tmp_path):
+    mock_args.providers = ['google', 'searxng']
+    mock_args.searxng_url = 'http://localhost:8888'
+    mock_args.output = str(tmp_path / 'counts.json')
+    mock_tracker = MagicMock()
+    mock_tracker.search.return_value = mock_search_results
+    MockSearchTracker.return_value = mock_tracker
+
+    search_command(mock_args)
+
+    providers = [call.kwargs['provider'].name for call in MockSearchTracker.call_args_list]
+    assert providers == ['google', 'searxng']
+    assert (tmp_path / 'counts_google.json').exists()
+    assert (tmp_path / 'counts_searxng.json').exists()
+
+@patch('awareness.awareness_cli.GoogleSearchTracker')
+def test_search_command_hedging_policy_per_provider(MockSearchTracker, mock_args, mock_search_results, tmp_path):
+    from awareness.core.hedging import HedgePolicy
+    mock_args.providers = ['google', 'searxng']
+    mock_args.searxng_url = 'http://localhost:8888'
+    mock_args.output = str(tmp_path / 'counts.json')
+    mock_args.hedge_percentile = 90
+    mock_args.hedge_max = 3
+    trackers = [MagicMock(), MagicMock()]
+    for tracker in trackers:
+        tracker.search.return_value = mock_search_results
+    MockSearchTracker.side_effect = trackers
+
+    search_command(mock_args)
+
+    policies = [tracker.hedging for tracker in trackers]
+    assert all(isinstance(policy, HedgePolicy) for policy in policies)
+    assert policies[0] is not policies[1]
+    assert (policies[0].percentile, policies[0].max_extra) == (0.9, 3)
+
+def test_search_command_requires_provider_settings(mock_args, capsys):
+    mock_args.providers = ['searxng']
+    search_command(mock_args)
+    assert '--searxng-url' in capsys.readouterr().out
+
+@patch('awareness.awareness_cli.GoogleSearchTracker')
+def test_search_command_sampling(MockSearchTracker, mock_args, tmp_path):
+    groups_file = tmp_path / 'groups.yml'
+    groups_file.write_text("web: [django, flask, fastapi, bottle]\nml: [pytorch, jax]\n")
+    mock_args.terms = None
+    mock_args.term_groups = str(groups_file)
+    mock_args.sample_budget = 4
+    mock_args.sample_state = str(tmp_path / 'state.json')
+    mock_args.estimates_output = str(tmp_path / 'estimates.json')
+    mock_args.confidence = 0.95
+    mock_tracker = MagicMock()
+    mock_tracker.search.side_effect = lambda terms: {
+        term: {'count': 100, 'timestamp': '2024-01-01 12:00:00'} for term in terms}
+    MockSearchTracker.return_value = mock_tracker
+
+    search_command(mock_args)
+
+    assert len(mock_tracker.search.call_args.args[0]) == 4
+    with open(mock_args.estimates_output) as f:
+        estimates = json.load(f)
+    assert estimates['groups']['web']['total_count'] == 400
+    assert estimates['groups']['ml']['sampled'] == 2
+    assert (tmp_path / 'state.json').exists()
+
+@patch('awareness.awareness_cli.ProjectRankTracker')
+def test_rank_command_writes_counts(MockRankTracker, mock_args, mock_rank_results, tmp_path):
+    mock_args.output = str(tmp_path / 'rankings.json')
+    mock_args.counts_output = str(tmp_path / 'counts.json')
+    mock_tracker = MagicMock()
+    mock_tracker.search_project_ranks.return_value = mock_rank_results
+    MockRankTracker.return_value = mock_tracker
+
+    rank_command(mock_args)
+
+    with open(tmp_path / 'counts.json') as f:
+        assert json.load(f) == {'test term': {'count': 12345, 'timestamp': '2024-01-01 12:00:00'}}
+
+    from awareness.charts.generate_charts import load_json_files, generate_search_count_chart
+    charts = tmp_path / 'charts'
+    charts.mkdir()
+    generate_search_count_chart(load_json_files(str(tmp_path)), str(charts))
+    assert (charts / 'search_counts_counts.png').exists()
+
+@patch('awareness.awareness_cli.ProjectRankTracker')
+def test_rank_command_refresh_budget(MockRankTracker, mock_args, mock_rank_results, tmp_path):
+    history = tmp_path / 'history'
+    history.mkdir()
+    with open(history / 'old.json', 'w') as f:
+        json.dump({'old term': {'total_results': 10, 'project_rankings': {'project1': 2},
+                                'timestamp': '2024-01-01 12:00:00'}}, f)
+    mock_args.terms = ['test term', 'old term']
+    mock_args.refresh_budget = 1
+    mock_args.refresh_from = str(history)
+    mock_args.max_age_hours = None
+    mock_args.num_results = 10
+    mock_args.output = str(tmp_path / 'rankings.json')
+    mock_tracker = MagicMock()
+    mock_tracker.search_project_ranks.return_value = mock_rank_results
+    MockRankTracker.return_value = mock_tracker
+
+    rank_command(mock_args)
+
+    # Only the term without history fits the budget; the other is carried forward
+    mock_tracker.search_project_ranks.assert_called_once_with(['test term'], 10)
+    with open(tmp_path / 'rankings.json') as f:
+        saved = json.load(f)
+    assert list(saved) == ['test term', 'old term']
+    assert saved['old term']['carried_forward'] is True
+
+def test_grep_command(tmp_path, capsys):
+    from awareness.utils.text_index import TextIndex
+    path = str(tmp_path / 'text.db')
+    index = TextIndex(path)
+    index.add('web framework', '2024-02-26 10:00:00',
+              [{'title': 'An alternative to Django', 'snippet': 'Flask', 'link': 'https://flask.example'}])
+    index.close()
+
+    with patch('sys.argv', ['awareness', 'grep', 'alternative to django', '--text-index', path, '--first']):
+        main()
+    assert '2024-02-26 10:00:00  web framework' in capsys.readouterr().out
+
+    with patch('sys.argv', ['awareness', 'grep', 'alternative', '--near', 'flask', '--text-index', path]):
+        main()
+    assert 'https://flask.example' in capsys.readouterr().out
+
+    with patch('sys.argv', ['awareness', 'grep', 'vue', '--text-index', path]):
+        main()
+    assert 'No matches' in capsys.readouterr().out
+
+@patch('awareness.awareness_cli.ProjectRankTracker')
+def test_rank_command_discovery(MockRankTracker, mock_args, mock_rank_results, tmp_path, capsys):
+    from awareness.core.matcher import ProjectMatcher
+    mock_args.discover = 5
+    mock_args.discovery_state = str(tmp_path / 'discovery.npz')
+    mock_args.discovery_output = str(tmp_path / 'discovery.json')
+    mock_tracker = MagicMock()
+    mock_tracker.matcher = ProjectMatcher.from_projects(['project1'])
+
+    def search(terms, num_results):
+        mock_tracker.discovery.feed([{'link': 'https://rival.dev/docs'}, {'link': 'https://project1.org'}], 1)
+        return mock_rank_results
+    mock_tracker.search_project_ranks.side_effect = search
+    MockRankTracker.return_value = mock_tracker
+
+    rank_command(mock_args)
+    rank_command(mock_args)
+
+    with open(tmp_path / 'discovery.json') as f:
+        report = json.load(f)
+    assert [row['key'] for row in report['run']] == ['rival.dev']
+    assert report['history'][0]['score'] == 2.0
+    assert 'Top unknown domains and repos (all runs' in capsys.readouterr().out
+
+def test_charts_command_html(mock_args, mock_rank_results, tmp_path):
+    input_dir = tmp_path / 'output'
+    input_dir.mkdir()
+    with open(input_dir / 'rankings.json', 'w') as f:
+        json.dump(mock_rank_results, f)
+    mock_args.input_dir = str(input_dir)
+    mock_args.output_dir = str(tmp_path / 'charts')
+    mock_args.chart_format = 'html'
+
+    charts_command(mock_args)
+
+    assert (tmp_path / 'charts' / 'index.html').exists()
+    assert (tmp_path / 'charts' / 'data' / 'index.json').exists()
+
+@patch('awareness.awareness_cli.generate_charts')
+def test_charts_command_grid_layout(mock_generate_charts, mock_args):
+    mock_args.input_dir = 'output'
+    mock_args.output_dir = 'charts'
+    mock_args.layout = 'grid'
+    mock_args.per_page = 20
+    mock_args.downsample = 'lttb'
+    with patch('sys.argv', ['awareness']):
+        charts_command(mock_args)
+        assert sys.argv[-8:] == ['--layout', 'grid', '--per-page', '20',
+                                 '--downsample', 'lttb', '--max-points', '1200']
+    mock_generate_charts.assert_called_once()
+
+@patch('awareness.awareness_cli.ProjectRankTracker')
+def test_rank_command_pipeline(MockRankTracker, mock_args, mock_rank_results, tmp_path):
+    mock_args.pipeline = True
+    mock_args.pipeline_charts = str(tmp_path / 'charts')
+    mock_args.output = str(tmp_path / 'rankings.json')
+    partial_path = tmp_path / 'rankings.json.partial.jsonl'
+    partial_lines = []
+
+    def pipeline_project_ranks(terms, num_results, persist=None, render=None, depth=16):
+        for term, record in mock_rank_results.items():
+            persist(term, None, record)
+            render(term, None, record)
+        with open(partial_path) as f:
+            partial_lines.extend(f)
+        return mock_rank_results
+
+    mock_tracker = MagicMock()
+    mock_tracker.provider.name = 'google'
+    mock_tracker.pipeline_project_ranks.side_effect = pipeline_project_ranks
+    MockRankTracker.return_value = mock_tracker
+
+    rank_command(mock_args)
+
+    mock_tracker.search_project_ranks.assert_not_called()
+    assert mock_tracker.pipeline_project_ranks.call_args.kwargs['depth'] == 16
+    assert len(partial_lines) == len(mock_rank_results)
+    # The partial file is removed once the full output is written
+    assert not partial_path.exists()
+    with open(mock_args.output) as f:
+        assert json.load(f) == mock_rank_results
+    assert (tmp_path / 'charts' / 'rankings_test term_rankings.png').exists()
+
+def test_rank_command_pipeline_charts_requires_pipeline(mock_args, capsys):
+    mock_args.pipeline_charts = 'charts'
+    rank_command(mock_args)
+    assert 'requires --pipeline' in capsys.readouterr().out
+
+@patch('awareness.awareness_cli.ProjectRankTracker')
+def test_rank_command_changes_only(MockRankTracker, mock_args, tmp_path, capsys):
+    from awareness.core.records import UnchangedResult
+    mock_args.terms = ['same', 'moved']
+    mock_args.fingerprints = str(tmp_path / 'fingerprints.json')
+    mock_args.changes_only = True
+    mock_args.output = str(tmp_path / 'changes.json')
+    moved = {'total_results': 5, 'project_rankings': {'project1': 2}, 'timestamp': '2024-01-02 12:00:00'}
+    mock_tracker = MagicMock()
+    mock_tracker.search_project_ranks.return_value = {
+        'same': UnchangedResult('2024-01-01 12:00:00', 'aaaa', '2024-01-02 12:00:00'), 'moved': moved}
+    MockRankTracker.return_value = mock_tracker
+
+    rank_command(mock_args)
+
+    with open(tmp_path / 'changes.json') as f:
+        assert json.load(f) == {'moved': moved}
+    assert (tmp_path / 'fingerprints.json').exists()
+    assert '1 of 2 terms unchanged since the previous run' in capsys.readouterr().out
+
+def test_rank_command_changes_only_requires_fingerprints(mock_args, capsys):
+    mock_args.changes_only = True
+    rank_command(mock_args)
+    assert '--changes-only requires --fingerprints' in capsys.readouterr().out
+
+@patch('awareness.awareness_cli.ProjectRankTracker')
+def test_rank_command_variants(MockRankTracker, mock_args, tmp_path):
+    record = {'total_results': 5, 'project_rankings': {'project1': 2}, 'timestamp': '2024-01-02 12:00:00'}
+    mock_args.variants = ['us:gl=us,hl=en', 'de:gl=de']
+    mock_args.output = str(tmp_path / 'rankings.json')
+    mock_args.counts_output = str(tmp_path / 'counts.json')
+    mock_args.history = str(tmp_path / 'history')
+    mock_tracker = MagicMock()
+    mock_tracker.search_project_ranks.return_value = {'test term': {'us': record, 'de': record}}
+    MockRankTracker.return_value = mock_tracker
+
+    rank_command(mock_args)
+
+    variants = mock_tracker.search_project_ranks.call_args.kwargs['variants']
+    assert [v['name'] for v in variants] == ['us', 'de']
+    with open(tmp_path / 'counts.json') as f:
+        assert json.load(f)['test term']['de'] == {'count': 5, 'timestamp': '2024-01-02 12:00:00'}
+    from awareness.utils.history_store import HistoryStore
+    assert HistoryStore(str(tmp_path / 'history')).terms == ['test term [us]', 'test term [de]']
+
+@patch('awareness.awareness_cli.ProjectRankTracker')
+def test_rank_command_rejects_inverted_rate_bounds(MockRankTracker, mock_args, capsys):
+    from awareness.core.rate_controller import get_rate_controller
+    floor = get_rate_controller().min_rate
+    mock_args.min_rate = get_rate_controller().max_rate + 1
+    rank_command(mock_args)
+    assert 'Error: min_rate must not exceed max_rate' in capsys.readouterr().out
+    assert get_rate_controller().min_rate == floor
+    MockRankTracker.assert_not_called()
+
+def test_rank_command_variants_reject_groups(mock_args, capsys):
+    mock_args.variants = ['us:gl=us']
+    mock_args.groups = 'groups.yml'
+    rank_command(mock_args)
+    assert '--variants cannot be combined with --groups' in capsys.readouterr().out
+
+@patch('awareness.awareness_cli.GroupRankTracker')
+def test_rank_command_refresh_budget_rejects_groups(MockGroupTracker, mock_args, capsys):
+    mock_args.refresh_budget = 10
+    mock_args.groups = 'groups.yml'
+    rank_command(mock_args)
+    assert '--refresh-budget cannot be combined with --groups' in capsys.readouterr().out
+    MockGroupTracker.assert_not_called()
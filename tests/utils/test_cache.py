@@ -0,0 +1,63 @@
+import threading
+import time
+import pytest
+from awareness.utils.cache import LRUCache, SingleFlight
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert len(cache) == 2
+
+def test_lru_counts_hits_and_misses():
+    cache = LRUCache(maxsize=4)
+    cache.get('missing')
+    cache.put('key', 'value')
+    cache.get('key')
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+def test_lru_rejects_invalid_size():
+    with pytest.raises(ValueError):
+        LRUCache(maxsize=0)
+
+def test_single_flight_coalesces_concurrent_calls():
+    flights = SingleFlight()
+    calls = []
+    started = threading.Event()
+
+    def slow():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return 'result'
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flights.do('term', slow)))
+    leader.start()
+    started.wait()
+    followers = [threading.Thread(target=lambda: results.append(flights.do('term', slow)))
+                 for _ in range(3)]
+    for thread in followers:
+        thread.start()
+    for thread in [leader] + followers:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sorted(results) == [('result', False)] + [('result', True)] * 3
+
+def test_single_flight_propagates_errors():
+    flights = SingleFlight()
+
+    def failing():
+        raise RuntimeError("upstream failed")
+
+    with pytest.raises(RuntimeError):
+        flights.do('term', failing)
+    # The failed flight is cleared so the next call runs again
+    assert flights.do('term', lambda: 'ok') == ('ok', False)
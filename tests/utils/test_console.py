@@ -0,0 +1,35 @@
+import io
+import json
+import pytest
+from awareness.utils.console import ConsoleLog
+
+def test_text_output_is_buffered():
+    stream = io.StringIO()
+    log = ConsoleLog(buffer_size=3, flush_interval=60, stream=stream)
+    log.event('term_result', 'Term: a')
+    log.event('term_result', 'Term: b')
+    assert stream.getvalue() == ''
+    log.event('term_result', 'Term: c')
+    assert stream.getvalue() == 'Term: a\nTerm: b\nTerm: c\n'
+
+def test_errors_flush_immediately():
+    stream = io.StringIO()
+    log = ConsoleLog(flush_interval=60, stream=stream)
+    log.event('term_result', 'Term: a')
+    log.event('term_error', 'Error processing term', level='error')
+    assert stream.getvalue() == 'Term: a\nError processing term\n'
+
+def test_json_records():
+    stream = io.StringIO()
+    log = ConsoleLog(fmt='json', stream=stream)
+    log.event('term_result', 'Term: a', term='a', count=10)
+    log.flush()
+    record = json.loads(stream.getvalue())
+    assert record['event'] == 'term_result'
+    assert record['term'] == 'a'
+    assert record['count'] == 10
+    assert 'ts' in record
+
+def test_configure_rejects_unknown_format():
+    with pytest.raises(ValueError):
+        ConsoleLog().configure(fmt='xml')
@@ -0,0 +1,75 @@
+import json
+import numpy as np
+import pytest
+from awareness.utils.history_store import (
+    HistoryStore, convert_json_files, RECORD_DTYPE, NO_PROJECT, NOT_FOUND, to_epoch, from_epoch
+)
+
+def rank_results(timestamp, django_rank):
+    return {
+        'python web framework': {
+            'total_results': 1234567,
+            'project_rankings': {'Django': django_rank, 'Flask': 3},
+            'timestamp': timestamp
+        }
+    }
+
+def test_append_and_memmap_records(tmp_path):
+    store = HistoryStore(str(tmp_path / 'history'))
+    assert len(store.records()) == 0
+    assert store.append_results(rank_results('2024-02-26 10:30:45', 1)) == 2
+    assert store.append_results(rank_results('2024-02-27 10:30:45', None)) == 2
+    assert store.append_results({'python tutorial': {'count': 800000, 'timestamp': '2024-02-27 10:30:47'}}) == 1
+
+    reopened = HistoryStore(str(tmp_path / 'history'))
+    records = reopened.records()
+    assert isinstance(records, np.memmap)
+    assert records.dtype == RECORD_DTYPE
+    assert len(records) == 5
+    assert reopened.terms == ['python web framework', 'python tutorial']
+    assert reopened.projects == ['Django', 'Flask']
+
+    django = reopened.rankings('python web framework', 'Django')
+    assert django['rank'].tolist() == [1, NOT_FOUND]
+    assert [str(from_epoch(t)) for t in django['run_time']] == ['2024-02-26 10:30:45', '2024-02-27 10:30:45']
+    counts = reopened.counts('python tutorial')
+    assert counts['total_results'].tolist() == [800000]
+    assert counts['project_id'].tolist() == [NO_PROJECT]
+    assert len(reopened.rankings('unknown', 'Django')) == 0
+
+def test_records_file_is_fixed_width(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    store.append([(to_epoch('2024-02-26 10:30:45'), 'term', 'project', 7, 100)])
+    size = (tmp_path / 'records.bin').stat().st_size
+    store.append([(to_epoch('2024-02-26 10:30:45'), 'term', 'project', 8, 100)])
+    assert (tmp_path / 'records.bin').stat().st_size == size + RECORD_DTYPE.itemsize
+
+def test_rejects_foreign_file(tmp_path):
+    (tmp_path / 'records.bin').write_bytes(b'not a history file')
+    with pytest.raises(ValueError):
+        HistoryStore(str(tmp_path)).records()
+
+def test_convert_json_files_skips_imported_sources(tmp_path):
+    output = tmp_path / 'output'
+    output.mkdir()
+    (output / 'rankings.json').write_text(json.dumps(rank_results('2024-02-26 10:30:45', 1)))
+    (output / 'api_usage.json').write_text(json.dumps({'date': '2024-02-26', 'count': 5}))
+    paths = [str(p) for p in output.iterdir()]
+
+    assert convert_json_files(paths, str(tmp_path / 'history')) == (1, 2)
+    assert convert_json_files(paths, str(tmp_path / 'history')) == (0, 0)
+    assert len(HistoryStore(str(tmp_path / 'history')).records()) == 2
+
+def test_convert_json_files_flattens_variant_matrix(tmp_path):
+    output = tmp_path / 'output'
+    output.mkdir()
+    record = rank_results('2024-02-26 10:30:45', 1)['python web framework']
+    (output / 'matrix.json').write_text(json.dumps({'python web framework': {'us': record, 'de': record}}))
+    (output / 'estimates.json').write_text(json.dumps({'run': 1, 'groups': {}}))
+    paths = [str(p) for p in output.iterdir()]
+
+    assert convert_json_files(paths, str(tmp_path / 'history')) == (1, 4)
+    store = HistoryStore(str(tmp_path / 'history'))
+    assert store.terms == ['python web framework [us]', 'python web framework [de]']
+    # Files that contributed nothing are not remembered as imported
+    assert store.sources == [str(output / 'matrix.json')]
@@ -0,0 +1,92 @@
+import pytest
+import urllib.request
+from unittest.mock import patch, MagicMock
+from awareness.utils.metrics import MetricsRegistry, get_registry, set_registry, start_http_exporter
+from awareness.core.project_rank_tracker import ProjectRankTracker
+
+@pytest.fixture
+def registry():
+    original = get_registry()
+    registry = MetricsRegistry()
+    set_registry(registry)
+    yield registry
+    set_registry(original)
+
+def test_counter_render(registry):
+    counter = registry.counter('requests_total', 'Requests issued', ('status',))
+    counter.inc(status=200)
+    counter.inc(2, status=429)
+    text = registry.render_prometheus()
+    assert '# TYPE requests_total counter' in text
+    assert 'requests_total{status="200"} 1' in text
+    assert 'requests_total{status="429"} 2' in text
+
+def test_counter_rejects_wrong_labels(registry):
+    counter = registry.counter('requests_total', 'Requests issued', ('status',))
+    with pytest.raises(ValueError):
+        counter.inc(tracker='rank')
+
+def test_registry_returns_existing_metric(registry):
+    first = registry.counter('hits_total', 'Hits')
+    assert registry.counter('hits_total', 'Hits') is first
+    with pytest.raises(ValueError):
+        registry.gauge('hits_total', 'Hits')
+
+def test_histogram_render(registry):
+    histogram = registry.histogram('latency_seconds', 'Latency', buckets=(0.1, 1.0))
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    histogram.observe(3)
+    text = registry.render_prometheus()
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{le="1"} 2' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in text
+    assert 'latency_seconds_count 3' in text
+    assert histogram.sum() == pytest.approx(3.55)
+
+def test_gauge_function(registry):
+    gauge = registry.gauge('rate', 'Current rate')
+    gauge.set_function(lambda: 1.5)
+    assert 'rate 1.5' in registry.render_prometheus()
+
+def test_label_values_escaped(registry):
+    registry.counter('terms_total', 'Terms', ('term',)).inc(term='say "hi"\n')
+    assert 'terms_total{term="say \\"hi\\"\\n"} 1' in registry.render_prometheus()
+
+def test_write_prometheus(registry, tmp_path):
+    registry.counter('hits_total', 'Hits').inc()
+    path = tmp_path / 'metrics.prom'
+    registry.write_prometheus(str(path))
+    assert 'hits_total 1' in path.read_text()
+
+def test_http_exporter(registry):
+    registry.counter('hits_total', 'Hits').inc()
+    server = start_http_exporter(0, registry, host='127.0.0.1')
+    try:
+        port = server.server_address[1]
+        with urllib.request.urlopen(f'http://127.0.0.1:{port}/metrics') as response:
+            assert 'hits_total 1' in response.read().decode()
+    finally:
+        server.shutdown()
+
+@patch('requests.get')
+def test_rank_tracker_instrumentation(mock_get, registry, tmp_path):
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_response.json.return_value = {
+        'items': [{'title': 'project1 docs', 'snippet': '', 'link': 'https://project1.com'}],
+        'searchInformation': {'totalResults': '100'}
+    }
+    mock_get.return_value = mock_response
+    tracker = ProjectRankTracker('test_key', 'test_cx', ['project1'])
+    tracker.usage_file = str(tmp_path / 'api_usage.json')
+
+    tracker.search_project_ranks(['test term'], num_results=50, show_progress=False)
+
+    assert registry.get('awareness_requests_total').value(tracker='rank', status='200') == 1
+    assert registry.get('awareness_request_latency_seconds').count(tracker='rank') == 1
+    assert registry.get('awareness_early_exit_pages_saved_total').value() == 4
+    assert registry.get('awareness_items_scanned_total').value() >= 1
+    assert registry.get('awareness_quota_used_total').value(tracker='rank') == 1
+    assert registry.get('awareness_pages_per_term').count() == 1
+    assert 'awareness_rate_limit_qps' in registry.render_prometheus()
@@ -0,0 +1,64 @@
+import json
+import pstats
+import pytest
+from awareness.utils.profiling import Profiler, get_profiler, profile_session, span
+
+def test_span_records_complete_event():
+    profiler = Profiler()
+    with profiler.span('fetch_page', term='python'):
+        pass
+    event = profiler.events[0]
+    assert event['name'] == 'fetch_page'
+    assert event['ph'] == 'X'
+    assert event['dur'] >= 0
+    assert event['args'] == {'term': 'python'}
+
+def test_span_recorded_on_exception():
+    profiler = Profiler()
+    with pytest.raises(ValueError):
+        with profiler.span('parse'):
+            raise ValueError("bad json")
+    assert profiler.events[0]['name'] == 'parse'
+
+def test_summary_groups_by_name():
+    profiler = Profiler()
+    for _ in range(3):
+        with profiler.span('match'):
+            pass
+    assert profiler.summary()['match']['count'] == 3
+
+def test_module_span_is_noop_without_profiler():
+    assert get_profiler() is None
+    with span('match'):
+        pass
+
+def test_write_chrome_trace(tmp_path):
+    profiler = Profiler()
+    with profiler.span('term'):
+        pass
+    path = tmp_path / 'trace.json'
+    profiler.write(str(path))
+    trace = json.loads(path.read_text())
+    assert trace['traceEvents'][0]['name'] == 'term'
+
+def test_write_json_lines(tmp_path):
+    profiler = Profiler()
+    with profiler.span('term'):
+        pass
+    with profiler.span('write_output'):
+        pass
+    path = tmp_path / 'trace.jsonl'
+    profiler.write(str(path))
+    lines = path.read_text().splitlines()
+    assert [json.loads(line)['name'] for line in lines] == ['term', 'write_output']
+
+def test_profile_session(tmp_path):
+    trace_path = tmp_path / 'trace.json'
+    stats_path = tmp_path / 'run.prof'
+    with profile_session(str(trace_path), str(stats_path)) as profiler:
+        with span('load_terms'):
+            sum(range(1000))
+    assert get_profiler() is None
+    assert profiler.summary()['load_terms']['count'] == 1
+    assert trace_path.exists()
+    assert pstats.Stats(str(stats_path)).total_calls > 0
@@ -0,0 +1,81 @@
+import json
+import pytest
+from awareness.utils.rollups import RollupStore, bucket_key
+
+def rank_run(timestamp, django_rank, flask_rank=3):
+    return {'python web framework': {'total_results': 1000,
+                                     'project_rankings': {'Django': django_rank, 'Flask': flask_rank},
+                                     'timestamp': timestamp}}
+
+def count_run(timestamp, count):
+    return {'python tutorial': {'count': count, 'timestamp': timestamp}}
+
+def test_bucket_key():
+    assert bucket_key('2024-02-26 10:30:45', 'daily') == '2024-02-26'
+    assert bucket_key('2024-02-26 10:30:45', 'weekly') == '2024-W09'
+    assert bucket_key('2024-12-30 00:00:00', 'weekly') == '2025-W01'
+    with pytest.raises(ValueError):
+        bucket_key('2024-02-26 10:30:45', 'hourly')
+
+def test_update_touches_only_affected_buckets(tmp_path):
+    store = RollupStore(str(tmp_path))
+    assert store.update(rank_run('2024-02-26 10:00:00', 4)) == {'daily': 1, 'weekly': 1}
+    monday = tmp_path / 'daily' / '2024-02-26.json'
+    before = monday.stat().st_mtime_ns
+    store.update(rank_run('2024-02-27 10:00:00', 2))
+    assert monday.stat().st_mtime_ns == before
+    store.update(rank_run('2024-02-27 18:00:00', None))
+
+    daily = {(row['bucket'], row['project']): row for row in store.ranking_report('daily')}
+    assert daily[('2024-02-27', 'Django')] == {
+        'bucket': '2024-02-27', 'term': 'python web framework', 'project': 'Django',
+        'runs': 2, 'found': 1, 'average_rank': 2.0, 'best_rank': 2, 'last_rank': None}
+    weekly = {row['project']: row for row in store.ranking_report('weekly')}
+    assert weekly['Django']['runs'] == 3
+    assert weekly['Django']['average_rank'] == 3.0
+    assert weekly['Flask']['best_rank'] == 3
+
+def test_count_growth_with_out_of_order_runs(tmp_path):
+    store = RollupStore(str(tmp_path))
+    store.update(count_run('2024-02-26 18:00:00', 1500))
+    store.update(count_run('2024-02-26 08:00:00', 1000))
+    store.update(count_run('2024-02-26 12:00:00', 1200))
+    [row] = store.count_report('daily')
+    assert row['last_count'] == 1500
+    assert row['growth'] == 500
+    assert row['runs'] == 3
+
+def test_update_is_idempotent(tmp_path):
+    store = RollupStore(str(tmp_path))
+    store.update(rank_run('2024-02-26 10:00:00', 4))
+    store.update(count_run('2024-02-26 10:00:00', 1000))
+    store.update(rank_run('2024-02-26 10:00:00', 4))
+    store.update(count_run('2024-02-26 10:00:00', 1000))
+    assert [row['runs'] for row in store.ranking_report('daily')] == [1, 1]
+    assert store.count_report('weekly')[0]['runs'] == 1
+
+def test_rebuild_from_result_files(tmp_path):
+    output = tmp_path / 'output'
+    output.mkdir()
+    (output / 'monday.json').write_text(json.dumps(rank_run('2024-02-26 10:00:00', 4)))
+    (output / 'tuesday.json').write_text(json.dumps(count_run('2024-02-27 10:00:00', 800)))
+    (output / 'api_usage.json').write_text(json.dumps({'date': '2024-02-27', 'count': 2}))
+    store = RollupStore(str(tmp_path / 'rollups'))
+    store.update(rank_run('2024-02-26 11:00:00', 1))
+
+    assert store.rebuild(str(output)) == 2
+    assert [bucket for bucket, _ in store.buckets('daily')] == ['2024-02-26', '2024-02-27']
+    assert [row['runs'] for row in store.ranking_report('weekly')] == [1, 1]
+    assert store.count_report('weekly', terms=['other']) == []
+
+def test_rebuild_flattens_variant_matrix(tmp_path):
+    output = tmp_path / 'output'
+    output.mkdir()
+    record = rank_run('2024-02-26 10:00:00', 4)['python web framework']
+    (output / 'matrix.json').write_text(json.dumps({'python web framework': {'us': record, 'de': record}}))
+    store = RollupStore(str(tmp_path / 'rollups'))
+
+    assert store.rebuild(str(output)) == 1
+    assert [bucket for bucket, _ in store.buckets('daily')] == ['2024-02-26']
+    assert sorted({row['term'] for row in store.ranking_report('daily')}) == [
+        'python web framework [de]', 'python web framework [us]']
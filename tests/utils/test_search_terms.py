@@ -99,4 +99,18 @@ def test_load_terms_with_whitespace(tmp_path):
         f.write('  term1  \n\nterm2\n  term3  \n\n')
     
     loaded_terms = SearchTermsLoader.load_terms(str(whitespace_file))
-    assert loaded_terms == ['term1', 'term2', 'term3']
\ No newline at end of file
+    assert loaded_terms == ['term1', 'term2', 'term3']
+
+def test_load_term_groups(tmp_path):
+    yaml_file = tmp_path / "groups.yml"
+    yaml_file.write_text("groups:\n  web: [django, flask]\n  ml: [pytorch]\n")
+    assert SearchTermsLoader.load_term_groups(str(yaml_file)) == {'web': ['django', 'flask'], 'ml': ['pytorch']}
+
+    csv_file = tmp_path / "groups.csv"
+    csv_file.write_text("django,web\nflask,web\npytorch,ml\nmisc term\n")
+    assert SearchTermsLoader.load_term_groups(str(csv_file)) == {
+        'web': ['django', 'flask'], 'ml': ['pytorch'], 'all': ['misc term']}
+
+    txt_file = tmp_path / "terms.txt"
+    txt_file.write_text("django\nflask\n")
+    assert SearchTermsLoader.load_term_groups(str(txt_file)) == {'all': ['django', 'flask']}
@@ -0,0 +1,50 @@
+import json
+import pytest
+from awareness.core.records import CountResult, RankResult, ProjectMatch, result_default
+from awareness.utils import serialization
+from awareness.utils.serialization import dump, dumps, load, loads, decode
+
+@pytest.fixture
+def results():
+    return {
+        'python web framework': RankResult(1234567, {'Django': 1, 'Flask': None},
+                                           {'Django': [ProjectMatch(1, 'owned')], 'Flask': []},
+                                           '2024-02-26 10:30:45'),
+        'café': CountResult(800000, '2024-02-26 10:30:47')
+    }
+
+def test_json_output_is_byte_compatible(results, tmp_path):
+    path = tmp_path / 'results.json'
+    dump(results, str(path), default=result_default)
+    legacy = tmp_path / 'legacy.json'
+    with open(legacy, 'w') as f:
+        json.dump(results, f, indent=4, default=result_default)
+    assert path.read_bytes() == legacy.read_bytes()
+    assert load(str(path))['café']['count'] == 800000
+
+def test_loads_accepts_bytes_and_str():
+    assert loads(b'{"a": [1, 2]}') == {'a': [1, 2]}
+    assert loads('{"a": null}') == {'a': None}
+
+def test_stdlib_fallback(monkeypatch):
+    monkeypatch.setattr(serialization, 'orjson', None)
+    assert serialization.backend() == 'json'
+    assert loads(b'{"a": 1}') == {'a': 1}
+
+def test_msgpack_round_trip_is_detected(results, tmp_path):
+    pytest.importorskip('msgpack')
+    path = tmp_path / 'results.msgpack'
+    dump(results, str(path), fmt='msgpack', default=result_default)
+    assert path.stat().st_size < len(dumps(results, default=result_default))
+    assert load(str(path)) == json.loads(dumps(results, default=result_default))
+
+def test_msgpack_missing(monkeypatch):
+    monkeypatch.setattr(serialization, 'msgpack', None)
+    with pytest.raises(ValueError):
+        dumps({'a': 1}, fmt='msgpack')
+    with pytest.raises(ValueError):
+        decode(b'\x81\xa1a\x01')
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        dumps({}, fmt='xml')
@@ -0,0 +1,63 @@
+import pytest
+from awareness.utils.text_index import TextIndex, phrase_query
+
+
+def item(title, snippet='', link='https://example.com'):
+    return {'title': title, 'snippet': snippet, 'link': link}
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = TextIndex(str(tmp_path / 'index' / 'text.db'))
+    index.add('web framework', '2024-02-20 10:00:00', [item('Flask quickstart'), item('Django docs')])
+    index.add('web framework', '2024-02-26 10:00:00',
+              [item('Best alternative to Django', 'Flask is a lightweight alternative to Django'),
+               item('Django docs')])
+    index.add('orm', '2024-02-24 10:00:00', [item('SQLAlchemy, an alternative to Django ORM')])
+    yield index
+    index.close()
+
+
+def test_phrase_query_quotes_text():
+    assert phrase_query('alternative to "x"') == '"alternative to ""x"""'
+    assert phrase_query('altern', prefix=True) == '"altern" *'
+
+
+def test_search_phrase_oldest_first(index):
+    rows = index.search(phrase_query('alternative to Django'))
+    assert [(r['run_time'], r['term'], r['position']) for r in rows] == [
+        ('2024-02-24 10:00:00', 'orm', 1),
+        ('2024-02-26 10:00:00', 'web framework', 1),
+    ]
+    # Word order matters for a phrase
+    assert index.search(phrase_query('Django alternative')) == []
+
+
+def test_search_prefix_term_and_limit(index):
+    assert len(index.search(phrase_query('altern', prefix=True))) == 2
+    assert [r['term'] for r in index.search(phrase_query('alternative'), term='orm')] == ['orm']
+    rows = index.search(phrase_query('django'), limit=1, latest_first=True)
+    assert len(rows) == 1 and rows[0]['run_time'] == '2024-02-26 10:00:00'
+
+
+def test_first_seen_per_term(index):
+    rows = index.first_seen(phrase_query('django'))
+    assert [(r['term'], r['first_seen'], r['runs']) for r in rows] == [
+        ('web framework', '2024-02-20 10:00:00', 2),
+        ('orm', '2024-02-24 10:00:00', 1),
+    ]
+
+
+def test_same_run_is_indexed_once(index):
+    assert index.add('orm', '2024-02-24 10:00:00', [item('SQLAlchemy, an alternative to Django ORM')]) == 0
+    assert index.stats()['items'] == 5
+    assert index.stats()['runs'] == 3
+
+
+def test_index_persists(tmp_path):
+    path = str(tmp_path / 'text.db')
+    first = TextIndex(path)
+    assert first.add('t', '2024-02-20 10:00:00', [item('persisted title')], start_rank=11) == 1
+    first.close()
+    rows = TextIndex(path).search(phrase_query('persisted'))
+    assert rows[0]['position'] == 11